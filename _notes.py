@@ -52,13 +52,14 @@ class MapScene:
 
 # scenes/scene_fight.py
 class FightScene:
+    """Input and drawing for a fight; the fight itself (grid, enemies, towers, waves) is a Simulation."""
     def __init__(self, game, level):
-        """Initializes the fight scene for a given level."""
+        """Builds the Simulation for the level plus the camera, selection and overlay state."""
     # Core Logic
     def handle_input(self, events):
         """Handles all user input for the fight scene."""
     def update(self, dt):
-        """Updates game state (enemies, towers, projectiles)."""
+        """Advances the simulation by the fixed steps this frame covers and plays its sounds."""
     def render(self, screen):
         """Renders the entire fight scene."""
     # Piece & Tower Placement
@@ -91,24 +92,87 @@ class FightScene:
     # Misc Helpers
     def _start_wave_action(self):
         """Starts the next wave if conditions are met."""
-    def spawn_wave(self):
-        """Initializes the spawning sequence for the current wave."""
     def show_tower_range(self, e):
         """Sets the tower to be hovered for displaying its range."""
     def _switch_algo(self):
         """Cycles to the next pathfinding algorithm."""
+    def _toggle_comparison(self):
+        """Turns comparison mode on (every algorithm in worker processes) or off."""
+    def _toggle_time_slicing(self):
+        """Switches searches between the background thread and budgeted slices run by update()."""
+    def _toggle_counters(self):
+        """Shows or hides the search counters, re-running the route search to measure them."""
+    def _clear_level(self):
+        """Marks the level cleared in the run and shows Victory, or GrandVictory once every level is."""
     def _win_level(self):
         """Developer hotkey action to instantly win the level."""
     def _return_to_map(self):
         """Saves HP and returns to the map scene."""
+    def _dev_auto_place_pieces(self):
+        """Developer hotkey to randomly place all pieces from the deck."""
+    def _get_placement_map(self, wait=False):
+        """Returns the valid anchors (with their resulting paths) for the current piece, or None while the path service is still building it."""
+def _build_placement_map(grid, cells, start, goal, spawns, cores, algorithm):
+    """Path service job in steps form: the placement map for one rotated piece on a grid snapshot."""
 class Camera:
     pass
+
+# simulation.py
 class Phase(Enum): # type: ignore
-    """Enum for different phases of the fight scene (Prepare, Running, etc.)."""
+    """Enum for different phases of a fight (Prepare, Running, etc.)."""
+class Simulation:
+    """One fight without pygame, stepped at FIXED_DT with a seeded RNG; FightScene is a view over it."""
+    def __init__(self, level, player=None, seed=None, algorithm="astar", path_service=None, want_visited=False, size=GRID_SIZE, projectile_mode="homing"):
+        """Builds the seeded grid, deck and routes for a level; projectile_mode picks the projectile store from PROJECTILE_MODES."""
+    def _add_terrain(self):
+        """Scatters fixed obstacles and swamp patches from the simulation's RNG."""
+    # Time
+    def advance(self, dt):
+        """Turns `dt` seconds of frame time into whole steps, carrying the remainder. Returns the number of steps run."""
+    def step(self):
+        """Advances the fight by one FIXED_DT tick."""
+    def _spawn_enemy(self, enemy_type):
+        """Creates one enemy at the next spawn gate, already walking its route."""
+    def pop_events(self):
+        """Returns the events ("enemy_died", "core_hit") since the last call and forgets them."""
+    # Actions
+    def start_wave(self):
+        """Queues the next wave's enemies with their jittered spawn times. Returns False if none can start."""
+    def place_piece(self, gx, gy, rotation=0):
+        """Places the next piece of the deck at a grid location. Returns False if it doesn't fit or would cut a route."""
+    def auto_place_pieces(self, max_attempts_per_piece=200):
+        """Drops every remaining piece at random valid spots; returns how many were placed."""
+    def place_tower(self, tower_id, gx, gy):
+        """Buys a tower at a grid location. Returns it, or None if the spot is taken or gold is short."""
+    def sell_tower(self, tower):
+        """Removes a tower for half its cost back. Returns the refund."""
+    def set_algorithm(self, algorithm):
+        """Switches the search enemies are routed with and re-plans everything."""
+    def use_path_service(self, service):
+        """Moves searches onto `service` (None: run them inline) and re-plans everything there."""
+    # Routing
+    def _on_grid_changed(self, cells):
+        """Refreshes per-grid search state after set_cells changed `cells`."""
+    def get_distance_map(self):
+        """Returns the NumPy distance field toward the goal, recomputing it if the grid changed."""
+    def recompute_route(self):
+        """Plans the start -> goal route, and the shared tables the algorithm routes enemies with, for the current grid."""
+    def _set_route(self, result):
+        """Adopts a finished route search's (path, stats, visited)."""
+    def reroute_enemies(self):
+        """Re-plans every live enemy for the current grid and algorithm."""
+    def collect_routes(self):
+        """Picks up finished background searches. Answers for an older grid were cancelled or are no longer asked for."""
+    def _measure_search_counters(self):
+        """Re-runs the route search inline, instrumented and under tracemalloc, apart from the timed run (no path service only)."""
+def _search_counters(stats):
+    """The counter entries of an instrumented find_path's stats, without the timed run's own fields."""
+def run_level(level, seed=None, algorithm="astar", setup=None, max_time=600.0, projectile_mode="homing"):
+    """Plays a whole level headless (setup(sim) places pieces and towers first) and returns the Simulation."""
 
 # level.py
 class Level:
-    def __init__(self, name, waves, gold=50, total_wave=0):
+    def __init__(self, name, waves, gold=50, total_wave=0, spawns=None, cores=None):
         """Initializes a level with its data."""
     """Contains data for a single level, including its waves."""
 class EnemyGroup:
@@ -125,68 +189,403 @@ def create_run_state():
     """Initializes core HP, gold, level map, player position, etc. for a new run."""
 def advance_to_next_level(run_state, level_id):
     """Moves player to the chosen level and loads its data."""
+def load_level(json_level_id):
+    """Builds the Level with this id in data/levels.json."""
 
 # grid.py
+class Grid:
+    """Row-major grid stored as one flat bytearray of cell codes, with a side table for piece identity."""
+    def __init__(self, w, h):
+        """Allocates an all-EMPTY w*h grid."""
+    def get(self, x, y):
+        """Returns the cell code at (x, y)."""
+    def piece_at(self, x, y):
+        """Returns the piece key occupying (x, y), or None."""
+    def cost(self, x, y):
+        """Returns the cost of stepping onto (x, y)."""
+    def is_walkable(self, x, y):
+        """Returns True if (x, y) is inside the grid and EMPTY."""
+    def set_cells(self, cells, state):
+        """Sets (x,y) cells to a cell code, or to PIECE when state is a piece key."""
+    def set_terrain(self, cells, cost):
+        """Sets the movement cost (1-255) of (x,y) cells without touching their cell codes."""
+    def neighbors(self, x, y):
+        """Returns the walkable 4-neighbors of (x, y), in get_neighbors4 order."""
+    def copy(self):
+        """Returns an independent copy (one bytearray copy plus the side table)."""
 def create_grid(w, h):
-    """Returns a 2D list initialized with EMPTY cells."""
+    """Returns a Grid initialized with EMPTY cells."""
 def in_bounds(x, y, w, h):
     """Checks if a coordinate is inside the grid bounds."""
 def is_walkable(grid, x, y):
     """Returns True if a cell is EMPTY and walkable."""
 def set_cells(grid, cells, state):
-    """Sets a list of (x,y) cells to the given state (EMPTY/OBSTACLE/TOWER)."""
+    """Sets a list of (x,y) cells to the given state (EMPTY/OBSTACLE/piece key)."""
 def cell_center(x, y, cell_size):
     """Returns pixel center coordinates of a grid cell for drawing."""
 def get_neighbors4(x, y):
     """Returns 4-neighbor coordinates for A* pathfinding."""
+def set_terrain(grid, cells, cost):
+    """Sets the movement cost of a list of (x,y) cells (GROUND/SWAMP/...)."""
+def get_cost(grid, x, y):
+    """Returns the movement cost for a given cell."""
 
 # piece.py
 def get_piece_shapes():
     """Returns dictionary of tetris-shaped pieces (list of relative coords)."""
 def rotate_piece(cells, rotation):
     """Rotates a piece's relative cell coordinates by 90° increments."""
-def can_place_piece(grid, gx, gy, cells, start, goal):
-    """Checks if piece fits legally at grid position (in bounds, no collision, doesn't block path)."""
-def is_path_blocked(grid, cells, start, goal):
-    """Check if placing cells on grid would block path from start to goal."""
+def can_place_piece(grid, gx, gy, cells, spawns, cores, index=None):
+    """Checks if piece fits legally at grid position (in bounds, no collision, doesn't block any spawn)."""
+def is_path_blocked(grid, cells, spawns, cores):
+    """Check if placing cells on grid would cut any spawn off from every core."""
+def compute_placement_map(grid, cells, start, goal, index, route, route_visited, algorithm="astar"):
+    """Checks every anchor for one rotated piece in a single pass. Returns {(gx, gy): (path, visited_nodes)}."""
+def compute_placement_map_steps(grid, cells, start, goal, index, route, route_visited, algorithm="astar", slice_size=0):
+    """compute_placement_map in steps form: each anchor's search yields every slice_size expansions."""
 def get_absolute_cells(gx, gy, cells):
     """Converts relative piece coords into absolute grid coords for placement."""
 
 # pathfinding.py
-def astar(grid, start, goal):
+class SearchBuffers:
+    """Reusable cost/parent tables for one grid size; an entry is live only while stamp[i] == generation."""
+    def __init__(self, size):
+        """Preallocates the cost, parent and stamp lists."""
+    def begin(self):
+        """Starts a new search and returns its generation; every older entry becomes stale at once."""
+def get_search_buffers(size, slot=0):
+    """Returns this thread's buffers for `slot` (bidirectional searches use 0 and 1), resized if the grid size changed."""
+def _neighbor_ids(cells, w, size, i):
+    """Returns the walkable 4-neighbor ids of flat id i, in get_neighbors4 order."""
+def _id_path(parent, start_id, end_id, w):
+    """Follows parent links from end_id back to start_id and returns the (x, y) path start→end."""
+def _visited_result(touched, visited_count, w):
+    """The (x, y) set of touched ids when the caller asked for it, otherwise just the count."""
+class SearchCounters:
+    """Open-list counters for the searches run while installed, plus the peak allocation if tracemalloc is tracing."""
+    def __init__(self):
+        """Zeroes the counters and notes the tracemalloc baseline."""
+    def as_stats(self):
+        """The counters as find_path stats entries; expanded counts every pop that did neighbor work."""
+def start_counters():
+    """Installs a fresh SearchCounters for this thread's searches and returns it."""
+def stop_counters(counters):
+    """Uninstalls counters (restoring whatever was installed before) and returns their stats."""
+def _queue_ops(push, pop, initial=0):
+    """Returns (push, pop, counters) for one search's open list(s), wrapped to count only when counters are installed."""
+def run_steps(steps):
+    """Runs a steps generator to the end and returns its result."""
+def astar(grid, start, goal, want_visited=True):
     """Computes shortest path from start to goal using A* on grid."""
-def dijkstra(grid, start, goal):
-    """Computes the shortest path from start to goal using Dijkstra's algorithm."""
-def greedy_bfs(grid, start, goal):
+def astar_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """A* in steps form: yields every slice_size expansions."""
+def ucs(grid, start, goal, want_visited=True):
+    """Computes the shortest path from start to goal using Uniform Cost Search."""
+def ucs_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """UCS in steps form: yields every slice_size expansions."""
+def dial(grid, start, goal, want_visited=True):
+    """Dijkstra for small integer cell costs using a ring of max_cost + 1 buckets instead of a heap."""
+def dial_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """Dial's algorithm in steps form: yields every slice_size expansions."""
+def greedy_bfs(grid, start, goal, want_visited=True):
     """Greedy Best-First Search. Chooses path based only on closeness to goal."""
-def dfs(grid, start, goal):
+def greedy_bfs_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """Greedy best-first in steps form: yields every slice_size expansions."""
+def dfs(grid, start, goal, want_visited=True):
     """Depth-First Search. Finds a path, but it will be long and inefficient."""
+def dfs_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """DFS in steps form: yields every slice_size expansions."""
+def bidirectional_astar(grid, start, goal, want_visited=True):
+    """A* from start and from goal at once; stops once neither frontier can beat the best meeting."""
+def bidirectional_astar_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """Bidirectional A* in steps form: yields every slice_size expansions."""
+def bidirectional_bfs(grid, start, goal, want_visited=True):
+    """Breadth-first search from both ends, one whole layer at a time, until the layers touch."""
+def bidirectional_bfs_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """Bidirectional BFS in steps form: yields every slice_size expansions."""
+def _join_bidirectional(meeting, came_from_f, start_id, came_from_b, goal_id, w):
+    """Stitches the start→meeting and meeting→goal halves of a bidirectional search."""
+def jps(grid, start, goal, want_visited=True):
+    """Jump Point Search for 4-connected uniform-cost grids. Returns the full cell path."""
+def jps_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """JPS in steps form: yields every slice_size expansions."""
+def _jps_directions(cells, w, node, parent):
+    """Pruned successor steps (flat id offsets) for a jump point given the jump point it was reached from."""
+def _jump(cells, w, size, node, step, goal_id):
+    """Scans from node by `step` (±1 or ±w) and returns the next jump point id, or -1 at a wall."""
+def flow_field(grid, goal):
+    """Reverse Dijkstra from goal. Returns (dist, next_step) tables covering every reachable cell."""
+def flow_field_steps(grid, goal, slice_size=0):
+    """flow_field in steps form: yields every slice_size expansions."""
+def flow_field_path(field, start):
+    """Follows next_step pointers from start to the field's goal. Returns the cell path or None."""
+class LPAStar:
+    """Goal-rooted Lifelong Planning A* that keeps its g/rhs tables between grid changes."""
+    def __init__(self, grid, goal):
+        """Seeds the tables with the goal as the only inconsistent node."""
+    def _update_vertex(self, node):
+        """Recomputes rhs for node and (re)queues it if it became locally inconsistent."""
+    def compute(self):
+        """Expands inconsistent nodes until the whole table is consistent again."""
+    def compute_steps(self, slice_size=0):
+        """compute() in steps form: yields every slice_size expansions. The grid must not change until it finishes."""
+    def update_cells(self, cells):
+        """Repairs the tables after the given cells changed walkability or cost."""
+    def path(self, start):
+        """Descends the g table from start to goal. Returns the cell path or None."""
+def lpa_star(grid, start, goal, want_visited=True):
+    """Runs a fresh LPAStar to convergence. The scene keeps its own instance to repair incrementally."""
+def lpa_star_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=None):
+    """lpa_star in steps form: yields every slice_size expansions."""
+class HPAStar:
+    """Hierarchical A* over square clusters: border entrances form an abstract graph, refined with cached in-cluster paths."""
+    def __init__(self, grid, cluster_size=HPA_CLUSTER_SIZE):
+        """Scans every cluster border for entrances; in-cluster costs are left for the first query."""
+    def _build_border(self, key):
+        """(Re)scans one border for entrances. axis 0 is the border to the right of (cx, cy), axis 1 the one below it."""
+    def _unlink(self, a, b):
+        """Removes the a -> b border edge."""
+    def _cluster_of(self, i):
+        """Cluster coordinates of flat id i."""
+    def _cluster_nodes(self, cx, cy):
+        """Entrance ids on this cluster's side of its four borders."""
+    def _local_search(self, source, cluster, reverse=False, targets=None):
+        """Dijkstra from source that never leaves `cluster`. Returns (dist, parent) dicts."""
+    def _chain(self, parent, end):
+        """Ids from just after the search source up to `end`, following a forward search's parent links."""
+    def _intra(self, cluster):
+        """Entrance-to-entrance costs and paths inside one cluster, searched on first use."""
+    def repaired(self, grid, cells):
+        """A new planner for grid after `cells` changed, sharing this one's untouched in-cluster tables."""
+    def differs_only_at(self, grid, cells):
+        """True if grid is this planner's grid with at most `cells` changed (so repaired() can catch it up)."""
+    def update_cells(self, cells):
+        """Rebuilds the borders the changed cells sit on and forgets the in-cluster tables those borders feed."""
+    def find(self, start, goal):
+        """Returns (path, expanded entrance ids). The path is None if goal can't be reached."""
+def multi_target_search(grid, starts, goals, want_visited=True):
+    """One multi-source reverse Dijkstra from every goal. Returns ({start: path to its nearest goal or None}, visited)."""
+def get_hpa_planner(grid):
+    """The HPAStar for grid's version: a cached one (snapshots share the live grid's), else a new one built on a copy of grid."""
+def _remember_hpa_planner(planner):
+    """Puts a planner at the front of the recent list, dropping the oldest one past HPA_CACHED_PLANNERS."""
+def hpa_star(grid, start, goal, want_visited=True):
+    """find_path adapter: answers from get_hpa_planner(grid), which builds one if no repaired planner fits the grid."""
+def hpa_update_cells(grid, cells):
+    """Repairs the HPAStar of grid's previous state (if one was built) into a new one for grid after set_cells changed `cells`."""
+def distance_field(grid, goal):
+    """Travel cost from every cell to goal as an (h, w) int32 array, -1 where unreachable."""
+def distance_field_steps(grid, goal, slice_size=0):
+    """distance_field in steps form: yields between rings once they've settled slice_size cells since the last yield."""
+def distance_field_path(dist, start, costs=None):
+    """Walks downhill on a distance_field from start to its goal. Returns the cell path or None."""
+class Landmarks:
+    """Travel-cost tables to a few landmarks for the ALT heuristic; never changed once built."""
+    def __init__(self, grid, landmarks, tables, anchors=()):
+        """Stores the tables with the walkable mask and costs they were built for."""
+    def fits(self, grid):
+        """True if the tables still bound grid's costs: nothing opened up, no cost changed and only a few cells were filled."""
+    def repaired(self, grid, cells):
+        """A new set for grid after `cells` were filled; only the distances those cells actually lengthened are redone."""
+    def heuristic_to(self, grid, goal_id):
+        """Returns h(n) for flat ids n toward goal_id: the best of Manhattan distance and every landmark's bound."""
+def _open_mask(grid):
+    """Flat boolean array of grid's walkable cells."""
+def build_landmarks(grid, anchors=()):
+    """Picks the open cells nearest each corner plus the walkable anchors, and builds a distance_field for each."""
+def _repair_table(table, grid, blocked, target):
+    """Copy of one landmark table after the `blocked` ids were filled, re-settling only the cells that lost their route."""
+def get_landmarks(grid, anchors=()):
+    """A Landmarks set that fits grid: an exact one, else a recent one that still bounds it, else a new one around anchors."""
+def _remember_landmarks(landmarks):
+    """Puts a set at the front of the recent list, dropping the oldest one past ALT_CACHED_SETS."""
+def alt_update_cells(grid, cells):
+    """Repairs the Landmarks set of grid's previous state (if one was built) after set_cells filled `cells`."""
+def alt(grid, start, goal, want_visited=True):
+    """A* guided by the best of Manhattan distance and the landmark bounds of get_landmarks(grid)."""
+def alt_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """ALT in steps form: yields every slice_size expansions. A grid without a fitting Landmarks set builds one first."""
 def heuristic(a, b):
     """Manhattan distance for A*."""
-def find_path(grid, start, goal, algorithm="astar"):
+def flow_field_search(grid, start, goal, want_visited=True):
+    """find_path adapter: builds a flow field and reads the route for start from it."""
+def flow_field_search_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=None):
+    """flow_field_search in steps form."""
+def wavefront_search(grid, start, goal, want_visited=True):
+    """find_path adapter: builds a distance_field and walks down it from start."""
+def wavefront_search_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=None):
+    """wavefront_search in steps form."""
+def hpa_star_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=None):
+    """hpa_star in steps form, run as a single slice over the planner get_hpa_planner shares for the grid's version."""
+def path_cache_stats():
+    """Returns cumulative find_path cache hit/miss counters."""
+def _cache_get(key):
+    """The cached (path, stats, visited) for key as a fresh copy, or None; counts the hit or miss."""
+def _cache_put(key, result):
+    """Stores a copy of a (path, stats, visited) result, evicting the least recently used entry if full."""
+def _search_result(path, visited, want_visited, time_ms):
+    """Packs a search's (path, visited) into find_path's (path, stats, visited_nodes_set)."""
+def find_path(grid, start, goal, algorithm="astar", use_cache=True, want_visited=True, instrument=False):
     """General function to find a path using a specified algorithm."""
+def _take_spare_buffers(size):
+    """A spare SearchBuffers for this grid size, or a new one."""
+def find_path_steps(grid, start, goal, algorithm="astar", use_cache=True, want_visited=True, slice_size=SLICE_EXPANSIONS):
+    """find_path as a generator: yields every slice_size expansions on buffers of its own and returns (path, stats, visited)."""
+
+# connectivity.py
+class ConnectivityIndex:
+    """Spawn/core connectivity summary for one grid state, rebuilt once per grid change."""
+    def __init__(self, grid, spawns, cores):
+        """Builds the cut-cell and route tables for the current grid."""
+    def _build(self):
+        """Runs one Tarjan DFS from the first core and keeps the articulation points that split off a spawn or core."""
+    def blocks(self, cells):
+        """True if filling `cells` would leave some spawn without a route to some core."""
+    def _locally_connected(self, cells):
+        """True if the free cells bordering `cells` still reach each other inside a 1-cell margin around them."""
+    def _search_blocked(self, cells):
+        """Fallback: searches a copy of the grid with `cells` filled."""
+
+# compare.py
+def get_pool():
+    """Returns the shared worker pool, starting it on first use."""
+def run_algorithm(grid, start, goal, algorithm):
+    """Worker entry point: one uncached search on a grid snapshot. Returns (path, stats)."""
+class AlgorithmComparison:
+    """Runs every registered algorithm on a snapshot of the grid in worker processes, without ever blocking the caller."""
+    def __init__(self, algorithms=None):
+        """Starts with no batch submitted."""
+    def request(self, grid, start, goal):
+        """Submits a fresh batch unless the last one was for this same grid state."""
+    def poll(self):
+        """Moves finished futures into results. Returns True if any arrived."""
+    def cancel(self):
+        """Drops the current batch; searches a worker already started just finish unread."""
+
+# path_service.py
+class PathService:
+    """Runs searches on one background thread over a snapshot per grid version and hands back futures."""
+    def __init__(self):
+        """Starts the single worker thread."""
+    def _snapshot_for(self, grid):
+        """The snapshot for grid's current version, cancelling older jobs when the version moved on."""
+    def submit(self, grid, key, fn, *args):
+        """Future for fn(snapshot, *args) on the current grid version; fn may return a steps generator. Requests with the same key share one future."""
+    def _start(self, fn, snapshot, *args):
+        """Queues one job and returns its future."""
+    def request(self, grid, start, goal, algorithm, want_visited=False):
+        """Future for find_path(start -> goal) on the current grid version, resolving to (path, stats, visited)."""
+    def request_counters(self, grid, start, goal, algorithm):
+        """Future for an uncached, instrumented find_path on the current grid version; alloc_kb stays None."""
+    def advance(self):
+        """Per-frame hook; the worker thread runs jobs on its own, so there's nothing to do here."""
+    def in_progress(self):
+        """How many jobs for the current grid version haven't finished yet."""
+    def cancel(self):
+        """Cancels every queued job."""
+class SlicedJob:
+    """Future-like handle for a steps generator that SlicedPathService runs a slice at a time."""
+    def __init__(self, steps):
+        """Wraps the generator; nothing runs yet."""
+    def step(self):
+        """Runs one slice. Returns True once the job has its result."""
+    def done(self):
+        """True once the job finished or was cancelled."""
+    def cancelled(self):
+        """True if the job was cancelled before it finished."""
+    def cancel(self):
+        """Stops the job between slices. False if it had already finished."""
+    def result(self):
+        """The job's result, running its remaining slices right away if it hasn't finished."""
+class SlicedPathService(PathService):
+    """PathService without threads: the frame loop advances jobs round-robin, a slice at a time, within a per-frame budget."""
+    def __init__(self, budget_ms=FRAME_BUDGET_MS, slice_size=SLICE_EXPANSIONS):
+        """Starts with no jobs queued."""
+    def _start(self, fn, snapshot, *args):
+        """Wraps the job in a SlicedJob and queues it; nothing runs until advance()."""
+    def request(self, grid, start, goal, algorithm, want_visited=False):
+        """SlicedJob for find_path(start -> goal) on the current grid version, resolving to (path, stats, visited)."""
+    def advance(self):
+        """Gives every unfinished job a slice in turn until the frame budget is spent. Returns the ms used."""
+    def in_progress(self):
+        """How many jobs are still waiting for slices."""
+    def cancel(self):
+        """Cancels every unfinished job."""
+def measure_counters(grid, start, goal, algorithm):
+    """Job for request_counters: an uncached, instrumented find_path with alloc_kb blanked out."""
+def run_job(fn, *args):
+    """Runs a job to the end, whether fn returns its result or a steps generator."""
+def _as_steps(fn, *args):
+    """Steps form of any job: a steps generator is run slice by slice, anything else in one slice."""
+def get_path_service():
+    """Returns the shared PathService, starting it on first use."""
 
 # enemy.py
 class Enemy:
+    """One enemy: its path and stats, with pos/t/hp read from its EnemyStore row while it has one."""
     def __init__(self, start, goal, etype="basic"):
         """Initializes an enemy instance with its stats and position."""
+    def pos(self):
+        """Property: current position (x, y) in grid cells."""
+    def t(self):
+        """Property: progress (0..1) of the step from path[cursor] to the next cell."""
+    def hp(self):
+        """Property: hit points left."""
     def set_path(self, path):
         """Assign a new path and reset progress."""
-    def update(self, dt):
-        """Move along the path according to speed."""
+    def remaining_path(self):
+        """The cells still ahead, starting with the one being left."""
+    def adopt_path(self, path):
+        """Switches to a route planned in the background, joining it at the current cell. False if the enemy already left it."""
     def reached_goal(self):
         """True if this enemy has arrived at its goal."""
     def is_dead(self):
-        """True if the enemy's HP is at or below zero."""
+        """True once the enemy's hp has run out (the death sound is the scene's job now)."""
+class EnemyStore:
+    """Every live enemy as one row of NumPy arrays, moved in one vectorized step; iterates like a list of Enemy."""
+    def __init__(self, grid=None, capacity=64):
+        """Allocates the per-enemy arrays."""
+    def _grow(self):
+        """Doubles every array's capacity."""
+    def append(self, enemy):
+        """Gives the enemy a row, moving its pos/t/hp into the arrays."""
+    def remove(self, enemy):
+        """Takes the enemy's row back out and moves the last row into it."""
+    def load_step(self, i):
+        """Fills row i's step from its enemy's path cursor and restarts it."""
+    def update(self, dt):
+        """Moves every enemy along its path at once. Returns the enemies that reached their goal."""
+    def route_ahead(self, enemy, horizon):
+        """Lazily yields the straight pieces (x, y, vx, vy, duration) the enemy walks over the next `horizon` seconds on its current path."""
+    def _in_radius(self, x, y, radius):
+        """Rows of the living enemies within `radius` cells of (x, y), from the spatial index (or a plain scan for a handful)."""
+    def nearest(self, x, y, radius):
+        """The living enemy closest to (x, y) within `radius` cells, or None."""
+    def within(self, x, y, radius):
+        """The living enemies within `radius` cells of (x, y)."""
+    def dead(self):
+        """The enemies whose hp has run out."""
 def create_enemy(etype, start, goal):
     """Factory function to create an enemy instance from its type ID."""
-def update_enemies(enemies, dt, goal):
-    """Update all enemies; return list of enemies that reached the goal."""
-def recompute_enemy_paths(enemies, grid, goal, algorithm="astar"):
-    """Recompute paths for all enemies, typically after the grid changes."""
+def update_enemies(enemies, dt):
+    """Update all enemies (an EnemyStore); return list of enemies that reached the goal."""
+def recompute_enemy_paths(enemies, grid, goal, algorithm="astar", field=None, planner=None, goals=None):
+    """Recompute paths for all enemies. With several `goals` (cores) each enemy heads for its nearest one."""
+def request_enemy_paths(enemies, grid, goal, algorithm, service):
+    """Asks the PathService for every enemy's route instead of searching inline. Returns [(enemy, future)]."""
 def enemy_data():
     """Exposes raw enemy data from JSON."""
 
+# spatial.py
+class SpatialHash:
+    """Uniform-grid index of points in cell units, rebuilt in one vectorized pass; radius queries only test nearby buckets."""
+    def __init__(self, bucket_size=BUCKET_SIZE):
+        """Starts empty with the given bucket side in cells."""
+    def rebuild(self, xs, ys):
+        """Indexes the points (xs[i], ys[i])."""
+    def candidates(self, x, y, radius):
+        """Indices of the points in the buckets overlapping the query circle's box, ascending. A superset of the answer."""
+
 # tower.py
 class Tower:
     def __init__(self, x, y, tower_id="bolt"):
@@ -196,25 +595,93 @@ class Tower:
     def get_stats(self):
         """Returns a dictionary of the tower's display-friendly stats."""
     def update(self, enemies, dt):
-        """Called each frame. If cooldown finished and there is a target, produce a Projectile instance (not applied to enemies directly).
-        Returns: Projectile instance or None."""
+        """Called each frame. If cooldown finished and there is a target, returns the enemy to fire at (None otherwise)."""
 class CannonTower(Tower):
-    pass
+    """Tower whose shots splash 1.5 cells around the impact."""
 def create_tower(tower_id, x, y):
     """Factory function to create a tower instance from its type ID."""
 def can_place_tower(grid, x, y, towers):
     """Checks if a tower can be placed at a given grid coordinate."""
 def update_towers(towers, enemies, dt, projectiles):
-    """Update towers; append spawned projectiles into projectiles list."""
+    """Update towers; every tower that fires launches a projectile into the ProjectileStore. Visits every tower (Simulation uses TowerScheduler)."""
+class TowerScheduler:
+    """Runs towers per tick without visiting them all: cooling towers wait on a timer wheel, idle ready ones on the cells their range covers."""
+    def __init__(self, grid, tick, slots=WHEEL_SLOTS):
+        """Empty wheel and per-cell watcher sets for a grid, with `tick` seconds per update()."""
+    def add(self, tower):
+        """Starts running a tower; it can fire on the next update()."""
+    def remove(self, tower):
+        """Stops running a tower, wherever it is parked."""
+    def _watch(self, tower):
+        """Parks a ready tower on the cells it covers."""
+    def _unwatch(self, tower):
+        """Takes a tower off the cells it covers, if it was watching them."""
+    def _cooldown_ticks(self, cooldown):
+        """Ticks a cooldown lasts, counted like Tower.update's per-tick countdown."""
+    def update(self, enemies, projectiles):
+        """Runs one tick: every tower that can fire launches a projectile into `projectiles`."""
 def tower_data():
     """Exposes raw tower data from JSON."""
 
 # projectile.py
-class Projectile:
-    def __init__(self, x, y, target, damage, speed=8.0, lifetime=5.0, origin_tower=None):
-        """Initializes a projectile."""
-    def update(self, dt):
-        """Moves the projectile towards its target and handles collision."""
+class ProjectileStore:
+    """Every projectile in flight as NumPy rows (position, target uid, speed, damage, splash, age), moved and hit-tested in one step per tick."""
+    def __init__(self, capacity=64):
+        """Allocates the per-projectile arrays."""
+    def _grow(self):
+        """Doubles every array's capacity."""
+    def fire(self, tower, target):
+        """Launches a projectile from the tower's cell at a target enemy."""
+    def positions(self):
+        """(x, y) of every projectile, for drawing."""
+    def update(self, dt, enemies):
+        """Moves every projectile toward its target, applies the hits to the EnemyStore and drops the finished ones."""
+def intercept(ox, oy, speed, pieces, max_time):
+    """Earliest (time, x, y) a straight shot from (ox, oy) meets a target walking `pieces`, or None within max_time."""
+class InterceptProjectileStore:
+    """Projectiles whose impact is solved when fired and kept on a heap by game time; positions are only interpolated for drawing."""
+    def __init__(self):
+        """Starts with an empty impact heap at game time 0."""
+    def fire(self, tower, target):
+        """Schedules the impact of a shot from the tower's cell at a target enemy."""
+    def positions(self):
+        """(x, y) of every projectile, interpolated along its flight for drawing."""
+    def update(self, dt, enemies):
+        """Advances the clock and lands the impacts that came due on the EnemyStore."""
+
+# benchmarks/maps.py
+def endpoints(w, h):
+    """Returns the (start, goal) pair FightScene would use on a w x h grid."""
+def random_map(w, h, seed=0, obstacle_chance=0.08):
+    """Scatters fixed obstacles like FightScene.__init__, keeping start/goal and their neighbors clear."""
+def swamp_map(w, h, seed=0, swamp_chance=0.08):
+    """Weighted terrain: random_map's obstacles plus 3x3 swamp patches covering roughly half the map."""
+def spiral_map(w, h, seed=0):
+    """Concentric walls with one gap each, alternating sides, so the route winds all the way in to the centre."""
+def tetromino_map(w, h, seed=0, density=0.4):
+    """Drops random tetrominoes until `density` of the map is covered, then carves a corridor if that cut off the goal."""
+def _reaches(grid, start, goal):
+    """Plain BFS reachability check used while generating maps."""
+
+# benchmarks/bench_pathfinding.py
+def parse_size(text):
+    """Parses 'WxH' into a (w, h) tuple."""
+def run_one(grid, start, goal, algorithm, repeat=1, measure_memory=True):
+    """Times one algorithm on one grid (best of `repeat`), then collects its search counters and peak allocation separately."""
+def run_benchmarks(sizes, styles, algorithms, seed=0, repeat=1, measure_memory=True, log=print, size_limits=SIZE_LIMITS):
+    """Runs the full size x style x algorithm matrix and returns one row dict per run."""
+def write_results(rows, out):
+    """Writes rows to <out>.csv and <out>.json."""
+def main(argv=None):
+    """Command-line entry point."""
+
+# benchmarks/bench_simulation.py
+def greedy_setup(sim, tower_id="bolt"):
+    """Scripted player: drops every piece at random, then buys towers on the piece cells closest to the goal."""
+def run_one(level_id, seed, algorithm, projectile_mode="homing"):
+    """Simulates one level to the end and returns a result row."""
+def main(argv=None):
+    """Command-line entry point."""
 
 # render/render_menu.py
 def draw_menu(surf):
@@ -241,11 +708,19 @@ def draw_tower_preview(surf, gx, gy, tower, cell_size, valid, camera):
     """Draws a ghost/preview of a tower at the mouse position."""
 def draw_piece_preview(surf, gx, gy, rotated_cells, cell_size, valid, camera):
     """Draws a ghost/preview of a piece at the mouse position."""
+def draw_valid_spots(surf, placement_map, current_length, cell_size, camera):
+    """Marks every anchor where the current piece fits; brighter marks lengthen the path more."""
+def draw_distance_heatmap(surf, dist, cell_size, camera):
+    """Tints every reachable cell by its distance to the core (blue near, red far)."""
 def draw_tower_range(surf, tower, cell_size, camera, color):
     """Draws a circle indicating a tower's attack range."""
+def draw_comparison_paths(surf, algorithms, results, cell_size, camera):
+    """Overlays every algorithm's path at once; each is nudged a little sideways so shared stretches stay visible."""
+def draw_comparison_table(surf, algorithms, results, pending, error=None):
+    """Side-by-side time / visited / length table for comparison mode, in the map's bottom-left corner."""
 def draw_projectiles(surf, projectiles, cell_size, camera):
     """Draws all active projectiles."""
-def draw_sidebar(surf, level, player, wave_index, deck_count, is_placing_tower, selected_tower=None, algorithm="astar"):
+def draw_sidebar(surf, level, player, wave_index, deck_count, is_placing_tower, selected_tower=None, algorithm="astar", path_stats=None, cache_stats=None, show_counters=False, search_load=None):
     """Draws the UI sidebar with game state info, tower selection, etc."""
 def sidebar_click_test(surf, mx, my):
     """Returns the name of the sidebar element that was clicked."""
@@ -0,0 +1,113 @@
+"""
+Headless pathfinding benchmark. Runs every algorithm registered in pathfinding.ALGORITHMS
+on generated maps of several sizes and obstacle styles and writes the results as CSV and JSON.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pathfinding
+    python -m benchmarks.bench_pathfinding --large --out results/bench
+    python -m benchmarks.bench_pathfinding --sizes 22x20 300x300 --algorithms astar jps --styles spiral
+"""
+import argparse
+import csv
+import json
+import time
+import tracemalloc
+
+from pathfinding import ALGORITHMS, find_path
+from benchmarks.maps import MAP_STYLES, endpoints
+
+DEFAULT_SIZES = [(22, 20), (100, 100), (500, 500)]
+LARGE_SIZES = [(1000, 1000), (2000, 2000)]
+
+# Algorithms whose cost blows up on big maps: name -> largest cell count to still run them on.
+# LPA* keeps its g/rhs tables in dicts and needs ~3 s per run at 500x500 (everything else stays
+# under 1.5 s), so by default it stops at 100x100-class maps; --no-size-limits runs it anyway.
+SIZE_LIMITS = {"lpa_star": 100_000}
+
+FIELDS = ["size", "style", "algorithm", "time_ms", "visited", "length", "cost",
+          "expanded", "pushes", "stale", "peak_open", "peak_kb", "note"]
+COUNTER_FIELDS = ["expanded", "pushes", "stale", "peak_open"]
+
+def parse_size(text):
+    """Parses 'WxH' into a (w, h) tuple."""
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+def run_one(grid, start, goal, algorithm, repeat=1, measure_memory=True):
+    """Times one algorithm on one grid (best of `repeat`), then collects its search counters and peak allocation separately."""
+    best_ms = float('inf')
+    stats = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        path, stats, _ = find_path(grid, start, goal, algorithm, use_cache=False, want_visited=False)
+        best_ms = min(best_ms, (time.perf_counter() - t0) * 1000)
+    # Counting and tracemalloc slow the search down, so they get their own untimed run
+    if measure_memory:
+        tracemalloc.start()
+    try:
+        _, counters, _ = find_path(grid, start, goal, algorithm, use_cache=False, want_visited=False, instrument=True)
+    finally:
+        if measure_memory:
+            tracemalloc.stop()
+    # Total terrain cost of the route (equals length - 1 on unweighted maps)
+    cost = sum(grid.cost(x, y) for x, y in path[1:]) if path else None
+    row = {"time_ms": round(best_ms, 3), "visited": stats["visited"], "length": stats["length"], "cost": cost,
+           "peak_kb": counters["alloc_kb"]}
+    row.update((k, counters[k]) for k in COUNTER_FIELDS)
+    return row
+
+def run_benchmarks(sizes, styles, algorithms, seed=0, repeat=1, measure_memory=True, log=print, size_limits=SIZE_LIMITS):
+    """Runs the full size x style x algorithm matrix and returns one row dict per run."""
+    rows = []
+    for w, h in sizes:
+        start, goal = endpoints(w, h)
+        for style in styles:
+            grid = MAP_STYLES[style](w, h, seed=seed)
+            for algorithm in algorithms:
+                row = {"size": f"{w}x{h}", "style": style, "algorithm": algorithm}
+                limit = size_limits.get(algorithm)
+                if limit is not None and w * h > limit:
+                    row.update(dict.fromkeys(FIELDS[3:-1]))
+                    row["note"] = f"skipped above {limit} cells"
+                else:
+                    row.update(run_one(grid, start, goal, algorithm, repeat, measure_memory))
+                    row["note"] = ""
+                rows.append(row)
+                log(f"{row['size']:>10} {style:>10} {algorithm:>11}  "
+                    f"{row['time_ms'] if row['time_ms'] is not None else '-':>10} ms  "
+                    f"visited={row['visited']}  length={row['length']}  cost={row['cost']}  "
+                    f"expanded={row['expanded']}  pushes={row['pushes']}  peak_open={row['peak_open']}  peak_kb={row['peak_kb']}  {row['note']}")
+    return rows
+
+def write_results(rows, out):
+    """Writes rows to <out>.csv and <out>.json."""
+    with open(out + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(out + ".json", "w") as f:
+        json.dump(rows, f, indent=2)
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Headless pathfinding benchmark")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, help="grid sizes as WxH (default: 22x20 100x100 500x500)")
+    parser.add_argument("--large", action="store_true", help="also run 1000x1000 and 2000x2000")
+    parser.add_argument("--styles", nargs="+", choices=list(MAP_STYLES), default=list(MAP_STYLES))
+    parser.add_argument("--algorithms", nargs="+", choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per case, best one is kept")
+    parser.add_argument("--no-memory", action="store_true", help="collect counters without tracemalloc (no peak_kb)")
+    parser.add_argument("--no-size-limits", action="store_true", help="run every algorithm at every size, ignoring SIZE_LIMITS")
+    parser.add_argument("--out", default="bench_pathfinding", help="output path prefix for .csv/.json")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or DEFAULT_SIZES + (LARGE_SIZES if args.large else [])
+    rows = run_benchmarks(sizes, args.styles, args.algorithms, seed=args.seed,
+                          repeat=args.repeat, measure_memory=not args.no_memory,
+                          size_limits={} if args.no_size_limits else SIZE_LIMITS)
+    write_results(rows, args.out)
+    print(f"Wrote {len(rows)} results to {args.out}.csv and {args.out}.json")
+
+if __name__ == "__main__":
+    main()
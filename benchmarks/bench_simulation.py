@@ -0,0 +1,60 @@
+"""
+Headless fight benchmark. Plays every level in data/levels.json through simulation.run_level
+with a simple scripted player, for several seeds and algorithms, and prints how long each whole
+level took to simulate. No window is opened and pygame is never imported.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_simulation
+    python -m benchmarks.bench_simulation --seeds 0 1 2 3 --algorithms astar flow_field
+    python -m benchmarks.bench_simulation --projectiles homing intercept
+"""
+import argparse
+import json
+import os
+import time
+
+from pathfinding import ALGORITHMS
+from projectile import PROJECTILE_MODES
+from run_state import load_level
+from simulation import FIXED_DT, run_level
+
+def greedy_setup(sim, tower_id="bolt"):
+    """Scripted player: drops every piece at random, then buys towers on the piece cells closest to the goal."""
+    sim.auto_place_pieces()
+    gx, gy = sim.goal
+    spots = [(x, y) for y in range(sim.grid.h) for x in range(sim.grid.w) if sim.grid.piece_at(x, y) is not None]
+    spots.sort(key=lambda c: abs(c[0] - gx) + abs(c[1] - gy))
+    for x, y in spots:
+        sim.place_tower(tower_id, x, y)
+
+def run_one(level_id, seed, algorithm, projectile_mode="homing"):
+    """Simulates one level to the end and returns a result row."""
+    t0 = time.perf_counter()
+    sim = run_level(load_level(level_id), seed=seed, algorithm=algorithm, setup=greedy_setup, projectile_mode=projectile_mode)
+    wall_ms = (time.perf_counter() - t0) * 1000
+    return {"level": level_id, "seed": seed, "algorithm": algorithm, "projectiles": projectile_mode, "phase": sim.phase.name,
+            "waves": sim.wave_index, "hp": sim.player.hp, "gold": sim.player.gold,
+            "game_s": round(sim.ticks * FIXED_DT, 1), "wall_ms": round(wall_ms, 1)}
+
+def main(argv=None):
+    """Command-line entry point."""
+    with open(os.path.join("data", "levels.json")) as f:
+        level_ids = [l["id"] for l in json.load(f)["levels"]]
+    parser = argparse.ArgumentParser(description="Headless fight benchmark")
+    parser.add_argument("--levels", nargs="+", type=int, choices=level_ids, default=level_ids)
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0, 1, 2])
+    parser.add_argument("--algorithms", nargs="+", choices=list(ALGORITHMS), default=["astar", "flow_field", "lpa_star"])
+    parser.add_argument("--projectiles", nargs="+", choices=list(PROJECTILE_MODES), default=["homing"])
+    args = parser.parse_args(argv)
+
+    for level_id in args.levels:
+        for algorithm in args.algorithms:
+            for mode in args.projectiles:
+                for seed in args.seeds:
+                    row = run_one(level_id, seed, algorithm, mode)
+                    print(f"level {row['level']}  {algorithm:>11}  {mode:>9}  seed {seed:>3}  {row['phase']:>9}  "
+                          f"waves={row['waves']}  hp={row['hp']}  gold={row['gold']}  "
+                          f"game={row['game_s']:>6} s  wall={row['wall_ms']:>7} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Seeded grid generators for the headless benchmarks. Start is (0, 0) and goal is the
+centre cell, the same layout FightScene uses."""
+import random
+from collections import deque
+from grid import create_grid, set_cells, set_terrain, FIXED_OBSTACLE, EMPTY, SWAMP
+from piece import get_piece_shapes, rotate_piece, get_absolute_cells
+
+def endpoints(w, h):
+    """Returns the (start, goal) pair FightScene would use on a w x h grid."""
+    return (0, 0), (w // 2, h // 2)
+
+def random_map(w, h, seed=0, obstacle_chance=0.08):
+    """Scatters fixed obstacles like FightScene.__init__, keeping start/goal and their neighbors clear."""
+    rng = random.Random(seed)
+    grid = create_grid(w, h)
+    start, goal = endpoints(w, h)
+    cells = []
+    for r in range(h):
+        for c in range(w):
+            if abs(r - start[1]) > 1 or abs(c - start[0]) > 1:
+                if abs(r - goal[1]) > 1 or abs(c - goal[0]) > 1:
+                    if rng.random() < obstacle_chance:
+                        cells.append((c, r))
+    set_cells(grid, cells, FIXED_OBSTACLE)
+    return grid
+
+def swamp_map(w, h, seed=0, swamp_chance=0.08):
+    """Weighted terrain: random_map's obstacles plus 3x3 swamp patches covering roughly half the map."""
+    rng = random.Random(seed)
+    grid = random_map(w, h, seed=seed)
+    cells = []
+    for r in range(h):
+        for c in range(w):
+            if rng.random() < swamp_chance:
+                cells.extend((c + dx, r + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+    set_terrain(grid, cells, SWAMP)
+    return grid
+
+def spiral_map(w, h, seed=0):
+    """Concentric walls with one gap each, alternating sides, so the route winds all the way in to the centre."""
+    grid = create_grid(w, h)
+    _, goal = endpoints(w, h)
+    cells = []
+    k = 0
+    while True:
+        o = 2 * k + 1
+        x0, y0, x1, y1 = o, o, w - 1 - o, h - 1 - o
+        # Stop before a ring would reach the goal's neighborhood
+        if x1 - x0 < 4 or y1 - y0 < 4 or not (x0 + 1 < goal[0] < x1 - 1 and y0 + 1 < goal[1] < y1 - 1):
+            break
+        ring = ([(x, y0) for x in range(x0, x1 + 1)] + [(x, y1) for x in range(x0, x1 + 1)] +
+                [(x0, y) for y in range(y0 + 1, y1)] + [(x1, y) for y in range(y0 + 1, y1)])
+        gap = (x1, y1 - 1) if k % 2 == 0 else (x0, y0 + 1)
+        cells.extend(c for c in ring if c != gap)
+        k += 1
+    set_cells(grid, cells, FIXED_OBSTACLE)
+    return grid
+
+def tetromino_map(w, h, seed=0, density=0.4):
+    """Drops random tetrominoes until `density` of the map is covered, then carves a corridor if that cut off the goal."""
+    rng = random.Random(seed)
+    grid = create_grid(w, h)
+    start, goal = endpoints(w, h)
+    shapes = list(get_piece_shapes().items())
+    target = int(w * h * density)
+    covered = 0
+    attempts = 0
+    while covered < target and attempts < target * 4:
+        attempts += 1
+        key, shape = rng.choice(shapes)
+        cells = get_absolute_cells(rng.randrange(w), rng.randrange(h), rotate_piece(shape, rng.randrange(4)))
+        if start in cells or goal in cells or not all(grid.is_walkable(x, y) for x, y in cells):
+            continue
+        set_cells(grid, cells, key)
+        covered += len(cells)
+    if not _reaches(grid, start, goal):
+        # Carve an L-shaped corridor: along the top row, then down the goal's column
+        corridor = [(x, start[1]) for x in range(start[0], goal[0] + 1)] + [(goal[0], y) for y in range(start[1], goal[1] + 1)]
+        set_cells(grid, corridor, EMPTY)
+    return grid
+
+def _reaches(grid, start, goal):
+    """Plain BFS reachability check used while generating maps."""
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        if current == goal:
+            return True
+        for n in grid.neighbors(*current):
+            if n not in seen:
+                seen.add(n)
+                queue.append(n)
+    return False
+
+# Obstacle style name -> generator(w, h, seed)
+MAP_STYLES = {
+    "random": random_map,
+    "swamp": swamp_map,
+    "spiral": spiral_map,
+    "tetromino": tetromino_map,
+}
@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pathfinding import ALGORITHMS, find_path
+
+# One pool for the whole game, started on the first comparison. Workers are spawned rather
+# than forked so they don't inherit the parent's SDL/pygame state. A spawned worker re-imports
+# main.py (as __mp_main__), which is why main.py only imports the scenes inside Game.
+_pool = None
+
+def get_pool():
+    """Returns the shared worker pool, starting it on first use."""
+    global _pool
+    if _pool is None:
+        workers = max(1, min(len(ALGORITHMS), os.cpu_count() or 1))
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def run_algorithm(grid, start, goal, algorithm):
+    """Worker entry point: one uncached search on a grid snapshot. Returns (path, stats)."""
+    path, stats, _ = find_path(grid, start, goal, algorithm, use_cache=False, want_visited=False)
+    return path, stats
+
+class AlgorithmComparison:
+    """
+    Runs every registered algorithm on a snapshot of the grid in worker processes.
+    request() only submits work and poll() only collects finished futures, so neither
+    ever waits on a worker; the scene calls both once per frame.
+    """
+    def __init__(self, algorithms=None):
+        self.algorithms = list(algorithms or ALGORITHMS)
+        self.key = None     # (grid version, start, goal) the current batch was submitted for
+        self.futures = {}   # algorithm -> Future still running for that batch
+        self.results = {}   # algorithm -> (path, stats) that came back for that batch
+        self.error = None
+
+    def request(self, grid, start, goal):
+        """Submits a fresh batch unless the last one was for this same grid state."""
+        key = (grid.version, start, goal)
+        if key == self.key:
+            return
+        self.cancel()
+        self.key = key
+        self.results = {}
+        snapshot = grid.copy() # the live grid keeps changing while the workers run
+        try:
+            pool = get_pool()
+            self.futures = {a: pool.submit(run_algorithm, snapshot, start, goal, a) for a in self.algorithms}
+            self.error = None
+        except (OSError, RuntimeError) as e:
+            self.error = str(e)
+
+    def poll(self):
+        """Moves finished futures into results. Returns True if any arrived."""
+        arrived = False
+        for algorithm, future in list(self.futures.items()):
+            if not future.done():
+                continue
+            del self.futures[algorithm]
+            if future.cancelled():
+                continue
+            try:
+                self.results[algorithm] = future.result()
+            except Exception as e:
+                self.results[algorithm] = (None, {"error": str(e)})
+            arrived = True
+        return arrived
+
+    def cancel(self):
+        """Drops the current batch; searches a worker already started just finish unread."""
+        for future in self.futures.values():
+            future.cancel()
+        self.futures = {}
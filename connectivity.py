@@ -0,0 +1,116 @@
+from pathfinding import multi_target_search
+
+class ConnectivityIndex:
+    """
+    Spawn/core connectivity summary for one grid state, rebuilt once per grid change.
+    blocks(cells) answers "would filling these cells cut any spawn off from any core?" from
+    precomputed tables in almost every case:
+      - cut cells: articulation points whose removal splits a spawn or core off the first core
+      - route cells: shortest routes from every spawn and core to the first core, which all stay valid if the cells miss them
+      - a local flood fill inside the cells' 1-cell margin for pieces that touch a route
+    Like is_path_blocked, covering a spawn cell itself is allowed.
+    Only a piece that sits on a route and pinches it against obstacles falls back to a
+    real search, and that answer is memoized until the next rebuild.
+    """
+    def __init__(self, grid, spawns, cores):
+        self.grid = grid
+        self.spawns = list(spawns)
+        self.cores = list(cores)
+        self.cut_cells = set()
+        self.route_cells = set()
+        self.spawn_exits = set() # open neighbors of covered spawns: the local flood fill can't vouch for them
+        self.connected = False
+        self._cache = {}
+        self._build()
+
+    def _build(self):
+        """Runs one Tarjan DFS from the first core and keeps the articulation points that split off a spawn or core."""
+        grid = self.grid
+        # Spawns only need to be sources (enemies can spawn on a covered spawn and walk out), cores must be open
+        if not all(grid.is_walkable(*core) for core in self.cores):
+            return
+        root = self.cores[0]
+        required = set(self.cores) | {s for s in self.spawns if grid.is_walkable(*s)}
+        disc = {root: 0}
+        low = {root: 0}
+        parent = {root: None}
+        below = {root: 1} # spawns/cores in each node's DFS subtree
+        stack = [(root, iter(grid.neighbors(*root)))]
+        t = 1
+        while stack:
+            v, neighbors = stack[-1]
+            for n in neighbors:
+                if n not in disc:
+                    disc[n] = low[n] = t
+                    t += 1
+                    parent[n] = v
+                    below[n] = 1 if n in required else 0
+                    stack.append((n, iter(grid.neighbors(*n))))
+                    break
+                elif n != parent[v]:
+                    low[v] = min(low[v], disc[n])
+            else:
+                stack.pop()
+                if stack:
+                    p = stack[-1][0]
+                    low[p] = min(low[p], low[v])
+                    below[p] += below[v]
+                    # p separates v's subtree from the root; that only matters if a spawn or core lives there
+                    if p != root and low[v] >= disc[p] and below[v]:
+                        self.cut_cells.add(p)
+        if not required <= disc.keys():
+            return
+        # A covered spawn just needs one open neighbor inside the component
+        for s in self.spawns:
+            if s not in required and not any(n in disc for n in grid.neighbors(*s)):
+                return
+        self.connected = True
+        self.spawn_exits = {n for s in self.spawns if s not in required for n in grid.neighbors(*s)}
+        routes, _ = multi_target_search(grid, self.spawns + self.cores[1:], [root], want_visited=False)
+        # A spawn at the head of its own route may be covered (enemies walk off it), so it isn't a route cell itself
+        self.route_cells = {c for start, path in routes.items() if path for c in (path[1:] if start in self.spawns else path)}
+
+    def blocks(self, cells):
+        """True if filling `cells` would leave some spawn without a route to some core."""
+        if not self.connected:
+            return True
+        if any(core in cells for core in self.cores):
+            return True
+        if any(c in self.cut_cells for c in cells):
+            return True
+        for s in self.spawns:
+            # A covered spawn still needs an open neighbor to walk out onto
+            if s in cells and not any(n not in cells for n in self.grid.neighbors(*s)):
+                return True
+        if not any(c in self.route_cells for c in cells):
+            return False # every known route survives untouched
+        key = frozenset(cells)
+        if key not in self._cache:
+            local = not any(c in self.spawn_exits for c in cells) and self._locally_connected(key)
+            self._cache[key] = not local and self._search_blocked(cells)
+        return self._cache[key]
+
+    def _locally_connected(self, cells):
+        """True if the free cells bordering `cells` still reach each other inside a 1-cell margin around them."""
+        grid = self.grid
+        xs = [x for x, _ in cells]
+        ys = [y for _, y in cells]
+        x0, x1 = min(xs) - 1, max(xs) + 1
+        y0, y1 = min(ys) - 1, max(ys) + 1
+        border = {n for c in cells for n in grid.neighbors(*c) if n not in cells}
+        if len(border) <= 1:
+            return True
+        first = next(iter(border))
+        seen = {first}
+        stack = [first]
+        while stack:
+            for n in grid.neighbors(*stack.pop()):
+                if n not in seen and n not in cells and x0 <= n[0] <= x1 and y0 <= n[1] <= y1:
+                    seen.add(n)
+                    stack.append(n)
+        return border <= seen
+
+    def _search_blocked(self, cells):
+        """Fallback: searches a copy of the grid with `cells` filled."""
+        from piece import is_path_blocked
+        return is_path_blocked(self.grid, list(cells), self.spawns, self.cores)
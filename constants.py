@@ -1,14 +1,14 @@
-import pygame
-
 EMPTY = 0
 OBSTACLE = 1
 FIXED_OBSTACLE = 2
+PIECE = 3 # player-placed piece; the piece key lives in Grid.pieces
+
+# Terrain movement costs, kept per cell in Grid.costs next to the cell codes above:
+# a swamp cell is still EMPTY (walkable), it just costs more to enter
+GROUND = 1
+SWAMP = 3
 
 # Default font for the game
 DEFAULT_FONT_NAME = "arial"
 DEFAULT_FONT_SIZE = 24
 DEFAULT_FONT_BOLD = False
-
-# Pre-create a Pygame Font object
-pygame.font.init()
-DEFAULT_FONT = pygame.font.SysFont(DEFAULT_FONT_NAME, DEFAULT_FONT_SIZE, bold=DEFAULT_FONT_BOLD)
@@ -1,62 +1,303 @@
 import json, os
-from pathfinding import find_path
-from assets import get_assets
-from sound_manager import play_sound
+import numpy as np
+from grid import get_cost
+from spatial import SpatialHash
+from pathfinding import find_path, flow_field, flow_field_path, distance_field, distance_field_path, multi_target_search
+
+INDEX_MIN_ENEMIES = 32 # below this many live enemies radius queries scan every row instead of the spatial index
 
 # Load enemy archetypes
 with open(os.path.join("data", "enemies.json")) as f:
     _ENEMY_DATA = {e["id"]: e for e in json.load(f)["enemies"]}
 
 class Enemy:
+    """
+    One enemy. Its per-cell path lives here, but while it belongs to an EnemyStore its position,
+    step progress and hp are rows of the store's arrays: pos, t and hp read and write those rows.
+    Taken out of the store it keeps the last values, so projectiles still aimed at it keep working.
+    """
     def __init__(self, start, goal, etype="basic"):
         data = _ENEMY_DATA[etype]
-        self.pos = start       # current grid cell (x, y)
+        self.store = None      # EnemyStore holding this enemy's row, if any
+        self.slot = -1         # its row in the store
+        self.uid = -1          # id from the store that outlives row swaps (projectiles aim by it)
+        self._pos = start      # pos/t/hp while outside a store
+        self._t = 0.0
+        self._hp = data["hp"]
         self.goal = goal
         self.path = []         # list of cells from start → goal
-        self.t = 0.0           # interpolation between path[0] and path[1]
-        self.hp = data["hp"]
+        self.cursor = 0        # index in path of the cell being left
         self.max_hp = data["hp"]
         self.speed = data["speed"]
         self.gold = data["gold"]
         self.etype = etype     # e.g. "fast", "tank", "basic"
         self.color = tuple(data["color"])
-        assets = get_assets()
-        self.image = assets["enemies"].get(etype)
+
+    @property
+    def pos(self):
+        """Current position (x, y) in grid cells, between path[cursor] and the next cell."""
+        if self.store is None:
+            return self._pos
+        return (self.store.x.item(self.slot), self.store.y.item(self.slot))
+
+    @property
+    def t(self):
+        """Progress (0..1) of the step from path[cursor] to the next cell."""
+        if self.store is None:
+            return self._t
+        return self.store.t.item(self.slot)
+
+    @t.setter
+    def t(self, value):
+        if self.store is None:
+            self._t = value
+        else:
+            self.store.t[self.slot] = value
+
+    @property
+    def hp(self):
+        """Hit points left."""
+        if self.store is None:
+            return self._hp
+        return self.store.hp.item(self.slot)
+
+    @hp.setter
+    def hp(self, value):
+        if self.store is None:
+            self._hp = value
+        else:
+            self.store.hp[self.slot] = value
 
     def set_path(self, path):
         """Assign a new path and reset progress."""
         self.path = path if path else []
-        self.t = 0.0
-
-    def update(self, dt):
-        """Move along the path according to speed, smoothly interpolating."""
-        if not self.path or len(self.path) < 2:
-            return
+        self.cursor = 0
+        if self.store is None:
+            self._t = 0.0
+        else:
+            self.store.load_step(self.slot)
 
-        p0 = self.path[0]
-        p1 = self.path[1]
+    def remaining_path(self):
+        """The cells still ahead, starting with the one being left."""
+        return self.path[self.cursor:]
 
-        self.t += self.speed * dt
-        if self.t >= 1.0:
-            # Move to next cell
-            self.pos = p1
-            self.path.pop(0)
-            self.t = 0.0
-        else:
-            # Smoothly interpolate between p0 and p1
-            self.pos = (p0[0] + (p1[0] - p0[0]) * self.t,
-                        p0[1] + (p1[1] - p0[1]) * self.t)
+    def adopt_path(self, path):
+        """
+        Switches to a route planned in the background from where the enemy stood when it was asked for.
+        The route is joined at the cell the enemy is on now, keeping its progress if the next
+        step is unchanged. Returns False if the enemy has already left the route.
+        """
+        remaining = self.remaining_path()
+        if not path or not remaining:
+            self.set_path(path)
+            return True
+        here = remaining[0]
+        if len(remaining) > 1 and path[0] == remaining[1]:
+            path = [here] + path # planned from the cell it is stepping onto
+        if here not in path:
+            return False
+        i = path.index(here)
+        keep_t = len(remaining) > 1 and len(path) > i + 1 and path[i + 1] == remaining[1]
+        t = self.t if keep_t else 0.0
+        self.set_path(path[i:])
+        self.t = t
+        return True
 
     def reached_goal(self):
         """True if this enemy has arrived at its goal."""
-        return len(self.path) <= 1 and self.pos == self.goal
+        return len(self.path) - self.cursor <= 1 and self.pos == self.goal
 
     def is_dead(self):
-        isDead = self.hp <= 0
-        if (isDead):
-            play_sound("enemy_die.mp3")
-            return True
-        return False
+        """True once the enemy's hp has run out."""
+        return self.hp <= 0
+
+class EnemyStore:
+    """
+    Every live enemy as one row of NumPy arrays: position, step progress, speed, hp and the
+    step being walked (the cell being left, the offset to the next one and the progress made
+    per second on that terrain). update() moves them all in one vectorized step; only the few
+    enemies that finish a cell this tick drop back to Python to load their next step, by moving
+    a path cursor rather than popping the path.
+    Radius queries (nearest, within) go through a SpatialHash of the positions, rebuilt on the
+    first query after enemies moved or rows changed, so once per tick.
+    It also behaves like the list of Enemy views it replaces (iteration, len, in, append,
+    remove), with removal swapping the last row into the gap. Each enemy also gets a uid that
+    survives those swaps; row_of maps uids to rows in one gather.
+    """
+    FIELDS = ("x", "y", "t", "speed", "hp", "from_x", "from_y", "dx", "dy", "rate", "moving")
+
+    def __init__(self, grid=None, capacity=64):
+        self.grid = grid   # terrain costs for the step being walked; None counts every cell as 1
+        self.views = []    # row -> Enemy
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.t = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.hp = np.zeros(capacity)
+        self.from_x = np.zeros(capacity) # cell being left (the enemy's spot when it isn't moving)
+        self.from_y = np.zeros(capacity)
+        self.dx = np.zeros(capacity)     # offset to the cell being entered
+        self.dy = np.zeros(capacity)
+        self.rate = np.zeros(capacity)   # t gained per second: speed / cost of the cell being entered, 0 when not moving
+        self.moving = np.zeros(capacity, dtype=bool)
+        self.index = SpatialHash() # rows bucketed by position
+        self.index_stale = True
+        self.row_of = np.full(capacity, -1, dtype=np.intp) # uid -> row, -1 once the enemy left the store
+        self.next_uid = 0
+
+    def __len__(self):
+        return len(self.views)
+
+    def __iter__(self):
+        return iter(self.views)
+
+    def __contains__(self, enemy):
+        return enemy.store is self
+
+    def _grow(self):
+        """Doubles every array's capacity."""
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(len(old) * 2, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def append(self, enemy):
+        """Gives the enemy a row, moving its pos/t/hp into the arrays."""
+        i = len(self.views)
+        if i == len(self.x):
+            self._grow()
+        self.views.append(enemy)
+        self.x[i], self.y[i] = enemy._pos
+        self.speed[i] = enemy.speed
+        self.hp[i] = enemy._hp
+        enemy.store = self
+        enemy.slot = i
+        enemy.uid = uid = self.next_uid
+        self.next_uid += 1
+        if uid == len(self.row_of):
+            self.row_of = np.concatenate([self.row_of, np.full(uid, -1, dtype=np.intp)])
+        self.row_of[uid] = i
+        self.load_step(i)
+        self.t[i] = enemy._t
+        self.index_stale = True
+
+    def remove(self, enemy):
+        """Takes the enemy's row back out (its last pos/t/hp stay on the view) and moves the last row into it."""
+        i = enemy.slot
+        enemy._pos, enemy._t, enemy._hp = enemy.pos, enemy.t, enemy.hp
+        enemy.store = None
+        enemy.slot = -1
+        self.row_of[enemy.uid] = -1
+        self.index_stale = True
+        last = len(self.views) - 1
+        moved = self.views.pop()
+        if i != last:
+            self.views[i] = moved
+            moved.slot = i
+            self.row_of[moved.uid] = i
+            for name in self.FIELDS:
+                a = getattr(self, name)
+                a[i] = a[last]
+
+    def load_step(self, i):
+        """Fills row i's step from its enemy's path cursor and restarts it."""
+        e = self.views[i]
+        self.t[i] = 0.0
+        path, c = e.path, e.cursor
+        if c + 1 < len(path):
+            (x0, y0), (x1, y1) = path[c], path[c + 1]
+            self.from_x[i], self.from_y[i] = x0, y0
+            self.dx[i], self.dy[i] = x1 - x0, y1 - y0
+            # A step takes as long as the cell being entered costs, so a swamp (cost 3) is crossed at a third of the speed
+            self.rate[i] = e.speed / (get_cost(self.grid, x1, y1) if self.grid is not None else 1)
+            self.moving[i] = True
+        else:
+            # Nowhere left to go: stay on the last cell, or where it stands if the path is empty
+            self.from_x[i], self.from_y[i] = path[c] if c < len(path) else (self.x[i], self.y[i])
+            self.dx[i] = self.dy[i] = self.rate[i] = 0.0
+            self.moving[i] = False
+
+    def update(self, dt):
+        """Moves every enemy along its path at once. Returns the enemies that reached their goal."""
+        n = len(self.views)
+        if not n:
+            return []
+        t = self.t[:n]
+        t += self.rate[:n] * dt
+        # Step 1: the enemies that finished their cell move their cursor on (usually a handful per tick)
+        for i in (t >= 1.0).nonzero()[0].tolist():
+            self.views[i].cursor += 1
+            self.load_step(i)
+        # Step 2: interpolate every position between the step's cells
+        np.multiply(self.dx[:n], t, out=self.x[:n])
+        self.x[:n] += self.from_x[:n]
+        np.multiply(self.dy[:n], t, out=self.y[:n])
+        self.y[:n] += self.from_y[:n]
+        self.index_stale = True
+        # Step 3: only enemies at the end of their path can be at their goal
+        return [self.views[i] for i in (~self.moving[:n]).nonzero()[0].tolist() if self.views[i].reached_goal()]
+
+    def route_ahead(self, enemy, horizon):
+        """
+        Yields the straight pieces (x, y, vx, vy, duration) the enemy will walk over the next
+        `horizon` seconds if its path stays as it is, starting from where it stands. Ends with a
+        standstill of infinite duration on the last cell if the path runs out before the horizon.
+        Lazy, so a caller that finds what it wants early never walks the rest of the path.
+        """
+        i = enemy.slot
+        x, y = self.x.item(i), self.y.item(i)
+        if not self.moving.item(i):
+            yield x, y, 0.0, 0.0, float("inf")
+            return
+        # Step 1: the rest of the step being walked, at its terrain's rate
+        rate = self.rate.item(i)
+        elapsed = (1.0 - self.t.item(i)) / rate
+        yield x, y, self.dx.item(i) * rate, self.dy.item(i) * rate, elapsed
+        # Step 2: whole steps from the cursor on, each taking as long as the cell entered costs
+        path, c = enemy.path, enemy.cursor + 1
+        while elapsed < horizon and c + 1 < len(path):
+            (x0, y0), (x1, y1) = path[c], path[c + 1]
+            duration = (get_cost(self.grid, x1, y1) if self.grid is not None else 1) / enemy.speed
+            yield x0, y0, (x1 - x0) / duration, (y1 - y0) / duration, duration
+            elapsed += duration
+            c += 1
+        if c + 1 >= len(path):
+            x, y = path[-1]
+            yield x, y, 0.0, 0.0, float("inf")
+
+    def _in_radius(self, x, y, radius):
+        """Rows of the living enemies within `radius` cells of (x, y), ascending, and their distances."""
+        n = len(self.views)
+        if n < INDEX_MIN_ENEMIES:
+            # A handful of rows: testing them all beats building the index
+            d = np.hypot(self.x[:n] - x, self.y[:n] - y)
+            rows = ((d <= radius) & (self.hp[:n] > 0)).nonzero()[0]
+            return rows, d[rows]
+        if self.index_stale:
+            self.index.rebuild(self.x[:n], self.y[:n])
+            self.index_stale = False
+        rows = self.index.candidates(x, y, radius)
+        d = np.hypot(self.x[rows] - x, self.y[rows] - y)
+        keep = (d <= radius) & (self.hp[rows] > 0)
+        return rows[keep], d[keep]
+
+    def nearest(self, x, y, radius):
+        """The living enemy closest to (x, y) within `radius` cells, or None."""
+        rows, d = self._in_radius(x, y, radius)
+        if not len(rows):
+            return None
+        return self.views[rows[d.argmin()]]
+
+    def within(self, x, y, radius):
+        """The living enemies within `radius` cells of (x, y)."""
+        rows, _ = self._in_radius(x, y, radius)
+        return [self.views[i] for i in rows.tolist()]
+
+    def dead(self):
+        """The enemies whose hp has run out."""
+        n = len(self.views)
+        return [self.views[i] for i in (self.hp[:n] <= 0).nonzero()[0].tolist()]
 
 ENEMY_CLASSES = {
     "basic": Enemy, 
@@ -71,23 +312,58 @@ def create_enemy(etype, start, goal):
     """Create enemy instance from JSON type."""
     return ENEMY_CLASSES.get(etype, Enemy)(start, goal, etype=etype)
 
-def update_enemies(enemies, dt, goal):
-    """Update all enemies; return list of enemies that reached the goal."""
-    reached = []
-    for e in enemies:
-        e.update(dt)
-        if e.reached_goal():
-            reached.append(e)
-    return reached
+def update_enemies(enemies, dt):
+    """Update all enemies (an EnemyStore); return list of enemies that reached the goal."""
+    return enemies.update(dt)
 
-def recompute_enemy_paths(enemies, grid, goal, algorithm="astar"):
-    """Recompute paths for all enemies."""
+def recompute_enemy_paths(enemies, grid, goal, algorithm="astar", field=None, planner=None, goals=None):
+    """Recompute paths for all enemies. With several `goals` (cores) each enemy heads for its nearest one."""
+    if goals is not None:
+        # One reverse search from every core at once serves every enemy
+        starts = [(round(e.pos[0]), round(e.pos[1])) for e in enemies]
+        routes, _ = multi_target_search(grid, starts, goals, want_visited=False)
+        for e, start_node in zip(enemies, starts):
+            path = routes[start_node]
+            if path:
+                e.goal = path[-1]
+            e.set_path(list(path) if path else None)
+        return
+    if algorithm == "lpa_star" and planner is not None:
+        # The planner's tables are already repaired for the new grid, just read routes from them
+        for e in enemies:
+            start_node = (round(e.pos[0]), round(e.pos[1]))
+            e.set_path(planner.path(start_node))
+        return
+    if algorithm == "flow_field":
+        # One reverse search serves every enemy; each one just walks the table
+        if field is None:
+            field = flow_field(grid, goal)
+        for e in enemies:
+            start_node = (round(e.pos[0]), round(e.pos[1]))
+            e.set_path(flow_field_path(field, start_node))
+        return
+    if algorithm == "wavefront":
+        # Same idea with the NumPy distance array: walk downhill toward the goal
+        if field is None:
+            field = distance_field(grid, goal)
+        for e in enemies:
+            start_node = (round(e.pos[0]), round(e.pos[1]))
+            e.set_path(distance_field_path(field, start_node, grid.costs))
+        return
     for e in enemies:
         start_node = (round(e.pos[0]), round(e.pos[1]))
         # use find_path
-        path, _, _ = find_path(grid, start_node, goal, algorithm)
+        path, _, _ = find_path(grid, start_node, goal, algorithm, want_visited=False)
         e.set_path(path)
 
+def request_enemy_paths(enemies, grid, goal, algorithm, service):
+    """Asks the PathService for every enemy's route instead of searching inline. Returns [(enemy, future)]."""
+    requests = []
+    for e in enemies:
+        start_node = (round(e.pos[0]), round(e.pos[1]))
+        requests.append((e, service.request(grid, start_node, goal, algorithm)))
+    return requests
+
 def enemy_data():
     """Exposes raw enemy data from JSON."""
     return _ENEMY_DATA
\ No newline at end of file
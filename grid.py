@@ -1,33 +1,120 @@
-from constants import EMPTY, OBSTACLE, FIXED_OBSTACLE
+from itertools import count
+from constants import EMPTY, OBSTACLE, FIXED_OBSTACLE, PIECE, GROUND, SWAMP
+
+# Shared across all grids so a version number identifies one grid state; copies keep the
+# version (same contents) until their first mutation hands them a fresh one
+_grid_versions = count(1)
+
+class Grid:
+    """
+    Row-major grid stored as one flat bytearray of cell codes (EMPTY/OBSTACLE/FIXED_OBSTACLE/PIECE).
+    Which piece occupies a PIECE cell is kept in a small side table keyed by flat index,
+    so the hot walkability checks only ever touch the bytearray.
+    Movement costs (GROUND/SWAMP/...) live in a parallel bytearray; `weighted` is False while every cost is GROUND.
+    """
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        self.cells = bytearray(w * h) # every cell starts as EMPTY (0)
+        self.pieces = {}              # flat index -> piece key, only for PIECE cells
+        self.costs = bytearray([GROUND]) * (w * h)
+        self.weighted = False
+        self.version = next(_grid_versions)
+
+    def get(self, x, y):
+        """Returns the cell code at (x, y)."""
+        return self.cells[y * self.w + x]
+
+    def piece_at(self, x, y):
+        """Returns the piece key occupying (x, y), or None."""
+        return self.pieces.get(y * self.w + x)
+
+    def cost(self, x, y):
+        """Returns the cost of stepping onto (x, y)."""
+        return self.costs[y * self.w + x]
+
+    def is_walkable(self, x, y):
+        """Returns True if (x, y) is inside the grid and EMPTY."""
+        return 0 <= x < self.w and 0 <= y < self.h and self.cells[y * self.w + x] == EMPTY
+
+    def set_cells(self, cells, state):
+        """Sets (x,y) cells to a cell code, or to PIECE when state is a piece key."""
+        w, h = self.w, self.h
+        self.version = next(_grid_versions)
+        for x, y in cells:
+            if 0 <= x < w and 0 <= y < h:
+                i = y * w + x
+                if isinstance(state, str):
+                    self.cells[i] = PIECE
+                    self.pieces[i] = state
+                else:
+                    self.cells[i] = state
+                    self.pieces.pop(i, None)
+
+    def set_terrain(self, cells, cost):
+        """Sets the movement cost (1-255) of (x,y) cells without touching their cell codes."""
+        w, h = self.w, self.h
+        self.version = next(_grid_versions)
+        for x, y in cells:
+            if 0 <= x < w and 0 <= y < h:
+                self.costs[y * w + x] = cost
+        self.weighted = self.costs.count(GROUND) != len(self.costs)
+
+    def neighbors(self, x, y):
+        """Returns the walkable 4-neighbors of (x, y), in get_neighbors4 order."""
+        w, cells = self.w, self.cells
+        i = y * w + x
+        out = []
+        if x + 1 < w and cells[i + 1] == EMPTY:
+            out.append((x + 1, y))
+        if x > 0 and cells[i - 1] == EMPTY:
+            out.append((x - 1, y))
+        if y + 1 < self.h and cells[i + w] == EMPTY:
+            out.append((x, y + 1))
+        if y > 0 and cells[i - w] == EMPTY:
+            out.append((x, y - 1))
+        return out
+
+    def copy(self):
+        """Returns an independent copy (one bytearray copy plus the side table)."""
+        g = Grid.__new__(Grid)
+        g.w = self.w
+        g.h = self.h
+        g.cells = bytearray(self.cells)
+        g.pieces = dict(self.pieces)
+        g.costs = bytearray(self.costs)
+        g.weighted = self.weighted
+        g.version = self.version
+        return g
 
 def create_grid(w, h):
-    """Returns a 2D list initialized with EMPTY cells."""
-    return [[EMPTY for _ in range(w)] for _ in range(h)]
-    
+    """Returns a Grid initialized with EMPTY cells."""
+    return Grid(w, h)
+
 def in_bounds(x, y, w, h):
     """Checks if a coordinate is inside the grid bounds."""
     return 0 <= x < w and 0 <= y < h
-    
+
 def is_walkable(grid, x, y):
     """Returns True if a cell is EMPTY and walkable."""
-    if not in_bounds(x, y, len(grid[0]), len(grid)):
-        return False
-    return grid[y][x] == EMPTY
-    
+    return grid.is_walkable(x, y)
+
 def set_cells(grid, cells, state):
-    """Sets a list of (x,y) cells to the given state (EMPTY/OBSTACLE/TOWER)."""
-    for x, y in cells:
-        if in_bounds(x, y, len(grid[0]), len(grid)):
-            grid[y][x] = state
-    
+    """Sets a list of (x,y) cells to the given state (EMPTY/OBSTACLE/piece key)."""
+    grid.set_cells(cells, state)
+
+def set_terrain(grid, cells, cost):
+    """Sets the movement cost of a list of (x,y) cells (GROUND/SWAMP/...)."""
+    grid.set_terrain(cells, cost)
+
 def cell_center(x, y, cell_size):
     """Returns pixel center coordinates of a grid cell for drawing."""
     return x * cell_size + cell_size // 2, y * cell_size + cell_size // 2
-    
+
 def get_neighbors4(x, y):
     """Returns 4-neighbor coordinates for A* pathfinding."""
     return [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
 
 def get_cost(grid, x, y):
     """Returns the movement cost for a given cell."""
-    return 1 # Normal cost
\ No newline at end of file
+    return grid.costs[y * grid.w + x]
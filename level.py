@@ -1,9 +1,11 @@
 class Level:
-    def __init__(self, name, waves, gold=50, total_wave=0):
+    def __init__(self, name, waves, gold=50, total_wave=0, spawns=None, cores=None):
         self.waves = waves
         self.name = name
         self.gold = gold
         self.total_wave = total_wave
+        self.spawns = spawns # [(x, y)] enemy spawn gates, None for the default top-left corner
+        self.cores = cores   # [(x, y)] cores to defend, None for the default map centre
 
 class EnemyGroup:
     def __init__(self, name, count, spawn_interval=0.5):
@@ -1,7 +1,6 @@
 import sys
 import pygame
 import traceback
-from scenes.scene_menu import MenuScene
 
 CELL_SIZE = 32
 GRID_W, GRID_H = 30, 20
@@ -10,6 +9,9 @@ FPS = 60
 
 class Game:
     def __init__(self):
+        # Imported here, not at module level: spawned worker processes (compare.get_pool) re-import
+        # this module, and the scenes pull in assets/sound_manager, which open the display and mixer
+        from scenes.scene_menu import MenuScene
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
         pygame.display.set_caption("Emberward Clone")
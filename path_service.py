@@ -0,0 +1,184 @@
+import time
+import types
+from collections import deque
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from pathfinding import find_path, find_path_steps, run_steps, SLICE_EXPANSIONS
+
+FRAME_BUDGET_MS = 2.0 # time SlicedPathService may spend on searches per frame
+
+class PathService:
+    """
+    Runs searches on one background thread and hands back futures, so the frame loop never
+    waits on a search. Jobs work on a snapshot taken once per grid version. The first request
+    for a newer version cancels everything still queued for older ones; a job that already
+    started just finishes, and its caller drops the result because it no longer asked for it.
+    """
+    def __init__(self):
+        # One worker: searches are pure Python, so more threads would only fight over the GIL
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="path-service")
+        self.version = None
+        self.snapshot = None
+        self.pending = {} # request key -> Future, for the current version only
+
+    def _snapshot_for(self, grid):
+        """The snapshot for grid's current version, cancelling older jobs when the version moved on."""
+        if grid.version != self.version:
+            self.cancel()
+            self.version = grid.version
+            self.snapshot = grid.copy()
+        return self.snapshot
+
+    def submit(self, grid, key, fn, *args):
+        """Future for fn(snapshot, *args) on the current grid version; fn may return a steps generator. Requests with the same key share one future."""
+        snapshot = self._snapshot_for(grid)
+        future = self.pending.get(key)
+        if future is None:
+            future = self.pending[key] = self._start(fn, snapshot, *args)
+        return future
+
+    def _start(self, fn, snapshot, *args):
+        """Queues one job and returns its future."""
+        return self.executor.submit(run_job, fn, snapshot, *args)
+
+    def request(self, grid, start, goal, algorithm, want_visited=False):
+        """Future for find_path(start -> goal) on the current grid version, resolving to (path, stats, visited)."""
+        return self.submit(grid, ("path", start, goal, algorithm, want_visited),
+                           find_path, start, goal, algorithm, True, want_visited)
+
+    def request_counters(self, grid, start, goal, algorithm):
+        """
+        Future for an uncached, instrumented find_path(start -> goal) on the current grid version,
+        resolving to its (path, stats, visited). Its allocation figure isn't measured: tracemalloc
+        is process-wide, so it would also count whatever the frame loop allocates meanwhile.
+        """
+        return self.submit(grid, ("counters", start, goal, algorithm), measure_counters, start, goal, algorithm)
+
+    def advance(self):
+        """Per-frame hook; the worker thread runs jobs on its own, so there's nothing to do here."""
+
+    def in_progress(self):
+        """How many jobs for the current grid version haven't finished yet."""
+        return sum(1 for future in self.pending.values() if not future.done())
+
+    def cancel(self):
+        """Cancels every queued job."""
+        for future in self.pending.values():
+            future.cancel()
+        self.pending = {}
+
+class SlicedJob:
+    """Future-like handle for a steps generator that SlicedPathService runs a slice at a time."""
+    def __init__(self, steps):
+        self.steps = steps
+        self.value = None
+        self.finished = False
+        self.was_cancelled = False
+
+    def step(self):
+        """Runs one slice. Returns True once the job has its result."""
+        try:
+            next(self.steps)
+        except StopIteration as done:
+            self.value = done.value
+            self.finished = True
+        return self.finished
+
+    def done(self):
+        """True once the job finished or was cancelled."""
+        return self.finished or self.was_cancelled
+
+    def cancelled(self):
+        """True if the job was cancelled before it finished."""
+        return self.was_cancelled
+
+    def cancel(self):
+        """Stops the job between slices. False if it had already finished."""
+        if self.finished:
+            return False
+        self.steps.close() # hands its search buffers back
+        self.was_cancelled = True
+        return True
+
+    def result(self):
+        """The job's result, running its remaining slices right away if it hasn't finished."""
+        if self.was_cancelled:
+            raise CancelledError()
+        while not self.finished:
+            self.step()
+        return self.value
+
+class SlicedPathService(PathService):
+    """
+    PathService without threads: jobs are steps generators that the frame loop advances through
+    advance(), round-robin, a slice at a time, until budget_ms is used up. A huge grid or a
+    runaway DFS then spreads over several frames instead of freezing one. A job without a steps
+    form runs as a single slice.
+    """
+    def __init__(self, budget_ms=FRAME_BUDGET_MS, slice_size=SLICE_EXPANSIONS):
+        self.version = None
+        self.snapshot = None
+        self.pending = {}
+        self.budget_ms = budget_ms
+        self.slice_size = slice_size
+        self.running = deque() # unfinished jobs, next turn first
+        self.used_ms = 0.0     # time the last advance() spent
+
+    def _start(self, fn, snapshot, *args):
+        """Wraps the job in a SlicedJob and queues it; nothing runs until advance()."""
+        job = SlicedJob(_as_steps(fn, snapshot, *args))
+        self.running.append(job)
+        return job
+
+    def request(self, grid, start, goal, algorithm, want_visited=False):
+        """SlicedJob for find_path(start -> goal) on the current grid version, resolving to (path, stats, visited)."""
+        return self.submit(grid, ("path", start, goal, algorithm, want_visited),
+                           find_path_steps, start, goal, algorithm, True, want_visited, self.slice_size)
+
+    def advance(self):
+        """Gives every unfinished job a slice in turn until the frame budget is spent. Returns the ms used."""
+        start_time = time.perf_counter()
+        deadline = start_time + self.budget_ms / 1000
+        while self.running and time.perf_counter() < deadline:
+            job = self.running.popleft()
+            # Skips jobs that were cancelled or already finished through result()
+            if not job.done() and not job.step():
+                self.running.append(job)
+        self.used_ms = (time.perf_counter() - start_time) * 1000
+        return self.used_ms
+
+    def in_progress(self):
+        """How many jobs are still waiting for slices."""
+        return sum(1 for job in self.running if not job.done())
+
+    def cancel(self):
+        """Cancels every unfinished job."""
+        super().cancel()
+        self.running.clear()
+
+def measure_counters(grid, start, goal, algorithm):
+    """Job for request_counters: an uncached, instrumented find_path with alloc_kb blanked out."""
+    path, stats, visited = find_path(grid, start, goal, algorithm, use_cache=False, want_visited=False, instrument=True)
+    stats["alloc_kb"] = None
+    return path, stats, visited
+
+def run_job(fn, *args):
+    """Runs a job to the end, whether fn returns its result or a steps generator."""
+    return run_steps(_as_steps(fn, *args))
+
+def _as_steps(fn, *args):
+    """Steps form of any job: a steps generator is run slice by slice, anything else in one slice."""
+    result = fn(*args)
+    if isinstance(result, types.GeneratorType):
+        result = yield from result
+    return result
+
+# Shared by every fight, started on first use
+_service = None
+
+def get_path_service():
+    """Returns the shared PathService, starting it on first use."""
+    global _service
+    if _service is None:
+        _service = PathService()
+    return _service
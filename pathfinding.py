@@ -1,169 +1,1848 @@
 # pathfinding.py
 # added algorithms to switch
+import threading
 import time
+import tracemalloc
+from collections import OrderedDict
+
+import numpy as np
 
 from heapq import heappush, heappop
-from grid import is_walkable, get_neighbors4, get_cost
+from grid import get_neighbors4, get_cost, EMPTY
+
+# Shared search core. Searches address cells by flat id (y * w + x) and keep their
+# cost/parent tables in preallocated per-thread buffers: a generation stamp marks which
+# entries belong to the current search, so nothing is cleared or reallocated between calls.
+_scratch = threading.local()
+
+class SearchBuffers:
+    """Reusable cost/parent tables for one grid size; an entry is live only while stamp[i] == generation."""
+    def __init__(self, size):
+        self.size = size
+        self.cost = [0] * size
+        self.parent = [-1] * size
+        self.stamp = [0] * size
+        self.generation = 0
+
+    def begin(self):
+        """Starts a new search and returns its generation; every older entry becomes stale at once."""
+        self.generation += 1
+        return self.generation
+
+def get_search_buffers(size, slot=0):
+    """Returns this thread's buffers for `slot` (bidirectional searches use 0 and 1), resized if the grid size changed."""
+    slots = getattr(_scratch, "slots", None)
+    if slots is None:
+        slots = _scratch.slots = {}
+    buf = slots.get(slot)
+    if buf is None or buf.size != size:
+        buf = slots[slot] = SearchBuffers(size)
+    return buf
+
+def _neighbor_ids(cells, w, size, i):
+    """Returns the walkable 4-neighbor ids of flat id i, in get_neighbors4 order."""
+    x = i % w
+    out = []
+    if x + 1 < w and cells[i + 1] == EMPTY:
+        out.append(i + 1)
+    if x > 0 and cells[i - 1] == EMPTY:
+        out.append(i - 1)
+    if i + w < size and cells[i + w] == EMPTY:
+        out.append(i + w)
+    if i >= w and cells[i - w] == EMPTY:
+        out.append(i - w)
+    return out
+
+def _id_path(parent, start_id, end_id, w):
+    """Follows parent links from end_id back to start_id and returns the (x, y) path start→end."""
+    path = []
+    i = end_id
+    while i != start_id:
+        path.append((i % w, i // w))
+        i = parent[i]
+    path.append((start_id % w, start_id // w))
+    path.reverse()
+    return path
+
+def _visited_result(touched, visited_count, w):
+    """The (x, y) set of touched ids when the caller asked for it, otherwise just the count."""
+    if touched is None:
+        return visited_count
+    return {(i % w, i // w) for i in touched}
+
+# Opt-in instrumentation. start_counters() installs a SearchCounters for this thread and every
+# search picks its open-list push/pop through _queue_ops, which hands back the plain functions
+# when nothing is installed, so uninstrumented searches run exactly as before.
+_instrument = threading.local()
+
+class SearchCounters:
+    """Open-list counters for the searches run while installed, plus the peak allocation if tracemalloc is tracing."""
+    def __init__(self):
+        self.pushes = 0
+        self.pops = 0
+        self.stale = 0     # pops thrown away because a cheaper entry for the node was already handled
+        self.peak_open = 0 # most entries one search held in its open list(s) at once
+        self.outer = None  # counters this one replaced, restored by stop_counters
+        self.alloc_base = None
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self.alloc_base = tracemalloc.get_traced_memory()[0]
+
+    def as_stats(self):
+        """The counters as find_path stats entries; expanded counts every pop that did neighbor work."""
+        alloc_kb = None
+        if self.alloc_base is not None and tracemalloc.is_tracing():
+            alloc_kb = round(max(0, tracemalloc.get_traced_memory()[1] - self.alloc_base) / 1024, 1)
+        return {"expanded": self.pops - self.stale, "pushes": self.pushes, "pops": self.pops,
+                "stale": self.stale, "peak_open": self.peak_open, "alloc_kb": alloc_kb}
+
+def start_counters():
+    """Installs a fresh SearchCounters for this thread's searches and returns it."""
+    counters = SearchCounters()
+    counters.outer = getattr(_instrument, "counters", None)
+    _instrument.counters = counters
+    return counters
+
+def stop_counters(counters):
+    """Uninstalls counters (restoring whatever was installed before) and returns their stats."""
+    _instrument.counters = counters.outer
+    return counters.as_stats()
+
+def _queue_ops(push, pop, initial=0):
+    """
+    Returns (push, pop, counters) for one search's open list(s): the given functions as they are
+    when no counters are installed, otherwise wrapped to count into them. `initial` is how many
+    entries the list already holds, for open lists that outlive a single search.
+    """
+    counters = getattr(_instrument, "counters", None)
+    if counters is None:
+        return push, pop, None
+    live = initial
+
+    def counted_push(queue, item):
+        nonlocal live
+        push(queue, item)
+        counters.pushes += 1
+        live += 1
+        if live > counters.peak_open:
+            counters.peak_open = live
+
+    def counted_pop(queue):
+        nonlocal live
+        counters.pops += 1
+        live -= 1
+        return pop(queue)
+    return counted_push, counted_pop, counters
+
+# Time slicing. Every search is written as a generator (its "steps" form) that yields once per
+# slice_size expansions, so a caller can spread one search over several frames. slice_size 0
+# never yields: the plain search functions just run their steps form to the end in one go.
+# A suspended search keeps stamps in its buffers, so sliced runs must pass buffers of their own.
+SLICE_EXPANSIONS = 64
+
+def run_steps(steps):
+    """Runs a steps generator to the end and returns its result."""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
 
 # A*
-def astar(grid, start, goal):
+def astar(grid, start, goal, want_visited=True):
     """Computes shortest path from start to goal using A* on grid."""
+    return run_steps(astar_steps(grid, start, goal, want_visited))
+
+def astar_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """A* in steps form: yields every slice_size expansions."""
     # 0. Check if goal is walkable from the start
-    if not is_walkable(grid, *goal):
+    if not grid.is_walkable(*goal):
         return None, 0
 
     # 1. Initialize data structure
+    w, cells, costs = grid.w, grid.cells, grid.costs
+    size = len(cells)
+    buf = buffers(size)
+    gen = buf.begin()
+    g_score, came_from, stamp = buf.cost, buf.parent, buf.stamp
+    start_id = start[1] * w + start[0]
+    goal_id = goal[1] * w + goal[0]
+    gx, gy = goal
+    stamp[start_id] = gen
+    g_score[start_id] = 0
+    touched = [start_id] if want_visited else None # only the overlay needs the visited cells themselves
+    visited_count = 1
+    push, pop, _ = _queue_ops(heappush, heappop)
     openq = []
-    heappush(openq, (0, start)) # (f_score, node)
-    came_from = {}
-    g_score = {start: 0}
-    visited_count = 0
-    visited_nodes_set = {start}
+    push(openq, (0, start_id)) # (f_score, node id)
 
+    left = slice_size
     while openq:
+        left -= 1
+        if not left: # end of a slice (never reached when slice_size is 0)
+            yield
+            left = slice_size
         # 2. Get the most promising node
-        _, current = heappop(openq)
+        _, current = pop(openq)
 
         # 3. Goal reached: reconstruct and return the path
-        if current == goal:
-            path = []
-            # ... backtrack using came_from ...
-            c = goal
-            while c in came_from:
-                path.append(c)
-                c = came_from[c]
-            path.append(start)
-            path.reverse()
-            return path, visited_nodes_set
+        if current == goal_id:
+            return _id_path(came_from, start_id, goal_id, w), _visited_result(touched, visited_count, w)
 
         # 4. Explore neighbors
-        for neighbor in get_neighbors4(*current):
-            if not is_walkable(grid, *neighbor):
-                continue
+        g = g_score[current]
+        for neighbor in _neighbor_ids(cells, w, size, current):
 
             # 5. Calculate cost to this neighbor
-            tentative_g_score = g_score.get(current, float('inf')) + get_cost(grid, *neighbor)
+            tentative_g_score = g + costs[neighbor]
 
-            # 6. If this path to neighbor is better, record it and add to queue
-            if tentative_g_score < g_score.get(neighbor, float('inf')):
-                g_score[neighbor] = tentative_g_score
-                f_score = tentative_g_score + heuristic(neighbor, goal)
-                heappush(openq, (f_score, neighbor))
-                came_from[neighbor] = current
-                visited_nodes_set.add(neighbor)
+            # 6. If this path to neighbor is better (or the first one), record it and add to queue
+            if stamp[neighbor] != gen:
+                stamp[neighbor] = gen
                 visited_count += 1
+                if touched is not None:
+                    touched.append(neighbor)
+            elif tentative_g_score >= g_score[neighbor]:
+                continue
+            g_score[neighbor] = tentative_g_score
+            came_from[neighbor] = current
+            ny, nx = divmod(neighbor, w)
+            push(openq, (tentative_g_score + abs(nx - gx) + abs(ny - gy), neighbor))
 
     # 7. No path found
-    return None, visited_nodes_set
+    return None, _visited_result(touched, visited_count, w)
 
 # UCS (Uniform Cost Search) - Functionally identical to Dijkstra on a grid with uniform costs.
-def ucs(grid, start, goal):
+def ucs(grid, start, goal, want_visited=True):
     """Computes the shortest path from start to goal using Uniform Cost Search."""
-    if not is_walkable(grid, *goal):
+    return run_steps(ucs_steps(grid, start, goal, want_visited))
+
+def ucs_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """UCS in steps form: yields every slice_size expansions."""
+    if not grid.is_walkable(*goal):
         return None, 0
-    openq = [(0, start)]
-    came_from = {}
-    g_score = {start: 0}
-    visited_nodes_set = {start}
+    w, cells, costs = grid.w, grid.cells, grid.costs
+    size = len(cells)
+    buf = buffers(size)
+    gen = buf.begin()
+    g_score, came_from, stamp = buf.cost, buf.parent, buf.stamp
+    start_id = start[1] * w + start[0]
+    goal_id = goal[1] * w + goal[0]
+    stamp[start_id] = gen
+    g_score[start_id] = 0
+    touched = [start_id] if want_visited else None
+    visited_count = 1
+    push, pop, counters = _queue_ops(heappush, heappop)
+    openq = []
+    push(openq, (0, start_id))
+    left = slice_size
     while openq:
-        current_cost, current_node = heappop(openq)
-        if current_node == goal:
-            path = []
-            c = goal
-            while c in came_from:
-                path.append(c)
-                c = came_from[c]
-            path.append(start)
-            path.reverse()
-            return path, visited_nodes_set
-        if current_cost > g_score.get(current_node, float('inf')):
+        left -= 1
+        if not left: # end of a slice (never reached when slice_size is 0)
+            yield
+            left = slice_size
+        current_cost, current_node = pop(openq)
+        if current_node == goal_id:
+            return _id_path(came_from, start_id, goal_id, w), _visited_result(touched, visited_count, w)
+        if current_cost > g_score[current_node]:
+            if counters is not None:
+                counters.stale += 1
             continue
 
-        for neighbor in get_neighbors4(*current_node):
-            if not is_walkable(grid, *neighbor):
+        for neighbor in _neighbor_ids(cells, w, size, current_node):
+            new_cost = current_cost + costs[neighbor]
+            if stamp[neighbor] != gen:
+                stamp[neighbor] = gen
+                visited_count += 1
+                if touched is not None:
+                    touched.append(neighbor)
+            elif new_cost >= g_score[neighbor]:
+                continue
+            g_score[neighbor] = new_cost
+            came_from[neighbor] = current_node
+            push(openq, (new_cost, neighbor))
+    return None, _visited_result(touched, visited_count, w)
+
+# Dial's algorithm (bucket-queue Dijkstra)
+def dial(grid, start, goal, want_visited=True):
+    """Dijkstra with a bucket queue instead of a heap; see dial_steps."""
+    return run_steps(dial_steps(grid, start, goal, want_visited))
+
+def dial_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """
+    Dijkstra for small integer cell costs using a ring of max_cost + 1 buckets instead of a heap.
+    Tentative distances never run more than max_cost past the current one, so the ring
+    covers every pending entry and each push/pop is O(1): O(V + C) bookkeeping in total.
+    """
+    if not grid.is_walkable(*goal):
+        return None, 0
+    w, cells, costs = grid.w, grid.cells, grid.costs
+    size = len(cells)
+    buf = buffers(size)
+    gen = buf.begin()
+    dist, came_from, stamp = buf.cost, buf.parent, buf.stamp
+    start_id = start[1] * w + start[0]
+    goal_id = goal[1] * w + goal[0]
+    stamp[start_id] = gen
+    dist[start_id] = 0
+    touched = [start_id] if want_visited else None
+    visited_count = 1
+    ring = max(costs) + 1
+    buckets = [[] for _ in range(ring)]
+    push, pop, counters = _queue_ops(list.append, list.pop)
+    push(buckets[0], start_id)
+    pending = 1
+    d = 0
+    left = slice_size
+    while pending:
+        left -= 1
+        if not left: # end of a slice (never reached when slice_size is 0)
+            yield
+            left = slice_size
+        bucket = buckets[d % ring]
+        while not bucket:
+            d += 1
+            bucket = buckets[d % ring]
+        current = pop(bucket)
+        pending -= 1
+        if dist[current] != d:
+            if counters is not None:
+                counters.stale += 1
+            continue # stale entry, a cheaper one was already settled
+        if current == goal_id:
+            return _id_path(came_from, start_id, goal_id, w), _visited_result(touched, visited_count, w)
+
+        for neighbor in _neighbor_ids(cells, w, size, current):
+            new_cost = d + costs[neighbor]
+            if stamp[neighbor] != gen:
+                stamp[neighbor] = gen
+                visited_count += 1
+                if touched is not None:
+                    touched.append(neighbor)
+            elif new_cost >= dist[neighbor]:
                 continue
-            new_cost = g_score.get(current_node, float('inf')) + get_cost(grid, *neighbor)
-            if new_cost < g_score.get(neighbor, float('inf')):
-                g_score[neighbor] = new_cost
-                came_from[neighbor] = current_node
-                visited_nodes_set.add(neighbor)
-                heappush(openq, (new_cost, neighbor))
-    return None, visited_nodes_set
+            dist[neighbor] = new_cost
+            came_from[neighbor] = current
+            push(buckets[new_cost % ring], neighbor)
+            pending += 1
+    return None, _visited_result(touched, visited_count, w)
 
 # greedy BFS
-def greedy_bfs(grid, start, goal):
+def greedy_bfs(grid, start, goal, want_visited=True):
     """Greedy Best-First Search. Chooses path based only on closeness to goal."""
-    if not is_walkable(grid, *goal):
+    return run_steps(greedy_bfs_steps(grid, start, goal, want_visited))
+
+def greedy_bfs_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """Greedy best-first in steps form: yields every slice_size expansions."""
+    if not grid.is_walkable(*goal):
         return None, 0
+    w, cells = grid.w, grid.cells
+    size = len(cells)
+    buf = buffers(size)
+    gen = buf.begin()
+    came_from, stamp = buf.parent, buf.stamp
+    start_id = start[1] * w + start[0]
+    goal_id = goal[1] * w + goal[0]
+    gx, gy = goal
+    stamp[start_id] = gen
+    touched = [start_id] if want_visited else None
+    visited_count = 1
+    push, pop, _ = _queue_ops(heappush, heappop)
     openq = []
-    heappush(openq, (heuristic(start, goal), start))
-    came_from = {}
-    visited = {start}
+    push(openq, (heuristic(start, goal), start_id))
+    left = slice_size
     while openq:
-        _, current = heappop(openq)
-        if current == goal:
-            path = []
-            c = goal
-            while c in came_from:
-                path.append(c)
-                c = came_from[c]
-            path.append(start)
-            path.reverse()
-            return path, visited
-
-        for neighbor in get_neighbors4(*current):
-            if is_walkable(grid, *neighbor) and neighbor not in visited:
-                visited.add(neighbor)
+        left -= 1
+        if not left: # end of a slice (never reached when slice_size is 0)
+            yield
+            left = slice_size
+        _, current = pop(openq)
+        if current == goal_id:
+            return _id_path(came_from, start_id, goal_id, w), _visited_result(touched, visited_count, w)
+
+        for neighbor in _neighbor_ids(cells, w, size, current):
+            if stamp[neighbor] != gen:
+                stamp[neighbor] = gen
+                visited_count += 1
+                if touched is not None:
+                    touched.append(neighbor)
                 came_from[neighbor] = current
-                heappush(openq, (heuristic(neighbor, goal), neighbor))
-    return None, visited
+                push(openq, (abs(neighbor % w - gx) + abs(neighbor // w - gy), neighbor))
+    return None, _visited_result(touched, visited_count, w)
 
 # DFS
-def dfs(grid, start, goal):
+def dfs(grid, start, goal, want_visited=True):
     """Depth-First Search. Finds a path, but it will be long and inefficient."""
-    if not is_walkable(grid, *goal):
+    return run_steps(dfs_steps(grid, start, goal, want_visited))
+
+def dfs_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """DFS in steps form: yields every slice_size expansions."""
+    if not grid.is_walkable(*goal):
         return None, 0
-    stack = [(start, [start])]
-    visited = {start}
+    w, cells = grid.w, grid.cells
+    size = len(cells)
+    buf = buffers(size)
+    gen = buf.begin()
+    came_from, stamp = buf.parent, buf.stamp
+    start_id = start[1] * w + start[0]
+    goal_id = goal[1] * w + goal[0]
+    stamp[start_id] = gen
+    touched = [start_id] if want_visited else None
+    visited_count = 1
+    # Parent links instead of a path copy per push: the path is rebuilt once, at the goal
+    push, pop, _ = _queue_ops(list.append, list.pop)
+    stack = []
+    push(stack, start_id)
+    left = slice_size
     while stack:
-        current, path = stack.pop()
-        if current == goal:
-            return path, visited
-
-        for neighbor in get_neighbors4(*current):
-            if is_walkable(grid, *neighbor) and neighbor not in visited:
-                visited.add(neighbor)
-                new_path = list(path)
-                new_path.append(neighbor)
-                stack.append((neighbor, new_path))
-    return None, visited
+        left -= 1
+        if not left: # end of a slice (never reached when slice_size is 0)
+            yield
+            left = slice_size
+        current = pop(stack)
+        if current == goal_id:
+            return _id_path(came_from, start_id, goal_id, w), _visited_result(touched, visited_count, w)
+
+        for neighbor in _neighbor_ids(cells, w, size, current):
+            if stamp[neighbor] != gen:
+                stamp[neighbor] = gen
+                visited_count += 1
+                if touched is not None:
+                    touched.append(neighbor)
+                came_from[neighbor] = current
+                push(stack, neighbor)
+    return None, _visited_result(touched, visited_count, w)
+
+# Bidirectional A*
+def bidirectional_astar(grid, start, goal, want_visited=True):
+    """A* from start and from goal at once; stops once neither frontier can beat the best meeting."""
+    return run_steps(bidirectional_astar_steps(grid, start, goal, want_visited))
+
+def bidirectional_astar_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """Bidirectional A* in steps form: yields every slice_size expansions, counting both frontiers."""
+    if not grid.is_walkable(*goal):
+        return None, 0
+    if start == goal:
+        return [start], ({start} if want_visited else 1)
+    w, cells, costs = grid.w, grid.cells, grid.costs
+    size = len(cells)
+    buf_f = buffers(size, 0)
+    buf_b = buffers(size, 1)
+    gen_f = buf_f.begin()
+    gen_b = buf_b.begin()
+    g_f, came_from_f, stamp_f = buf_f.cost, buf_f.parent, buf_f.stamp # came_from_f: previous node toward start
+    g_b, came_from_b, stamp_b = buf_b.cost, buf_b.parent, buf_b.stamp # came_from_b: next node toward goal
+    start_id = start[1] * w + start[0]
+    goal_id = goal[1] * w + goal[0]
+    sx, sy = start
+    gx, gy = goal
+    stamp_f[start_id] = gen_f
+    g_f[start_id] = 0
+    stamp_b[goal_id] = gen_b
+    g_b[goal_id] = 0
+    # One set of ops for both heaps, so peak_open is the two frontiers together
+    push, pop, counters = _queue_ops(heappush, heappop)
+    open_f = []
+    open_b = []
+    push(open_f, (heuristic(start, goal), start_id))
+    push(open_b, (heuristic(goal, start), goal_id))
+    touched = [start_id, goal_id] if want_visited else None
+    visited_count = 2
+    best_cost = float('inf')
+    meeting = -1
+
+    left = slice_size
+    while open_f and open_b:
+        left -= 1
+        if not left: # end of a slice (never reached when slice_size is 0)
+            yield
+            left = slice_size
+        # Each frontier's smallest f is a lower bound on any path not found yet
+        if open_f[0][0] >= best_cost or open_b[0][0] >= best_cost:
+            break
+        # Grow whichever frontier is smaller
+        if len(open_f) <= len(open_b):
+            f, current = pop(open_f)
+            g = g_f[current]
+            if f > g + abs(current % w - gx) + abs(current // w - gy):
+                if counters is not None:
+                    counters.stale += 1
+                continue # stale entry
+            for neighbor in _neighbor_ids(cells, w, size, current):
+                tentative_g_score = g + costs[neighbor]
+                if stamp_f[neighbor] != gen_f:
+                    stamp_f[neighbor] = gen_f
+                    if stamp_b[neighbor] != gen_b:
+                        visited_count += 1
+                        if touched is not None:
+                            touched.append(neighbor)
+                elif tentative_g_score >= g_f[neighbor]:
+                    continue
+                g_f[neighbor] = tentative_g_score
+                came_from_f[neighbor] = current
+                push(open_f, (tentative_g_score + abs(neighbor % w - gx) + abs(neighbor // w - gy), neighbor))
+                if stamp_b[neighbor] == gen_b and tentative_g_score + g_b[neighbor] < best_cost:
+                    best_cost = tentative_g_score + g_b[neighbor]
+                    meeting = neighbor
+        else:
+            f, current = pop(open_b)
+            cy, cx = divmod(current, w)
+            if f > g_b[current] + abs(cx - sx) + abs(cy - sy):
+                if counters is not None:
+                    counters.stale += 1
+                continue # stale entry
+            # Walking neighbor -> current costs whatever current costs to enter
+            tentative_g_score = g_b[current] + costs[current]
+            for neighbor in _neighbor_ids(cells, w, size, current):
+                if stamp_b[neighbor] != gen_b:
+                    stamp_b[neighbor] = gen_b
+                    if stamp_f[neighbor] != gen_f:
+                        visited_count += 1
+                        if touched is not None:
+                            touched.append(neighbor)
+                elif tentative_g_score >= g_b[neighbor]:
+                    continue
+                g_b[neighbor] = tentative_g_score
+                came_from_b[neighbor] = current
+                push(open_b, (tentative_g_score + abs(neighbor % w - sx) + abs(neighbor // w - sy), neighbor))
+                if stamp_f[neighbor] == gen_f and g_f[neighbor] + tentative_g_score < best_cost:
+                    best_cost = g_f[neighbor] + tentative_g_score
+                    meeting = neighbor
+
+    visited = _visited_result(touched, visited_count, w)
+    if meeting < 0:
+        return None, visited
+    return _join_bidirectional(meeting, came_from_f, start_id, came_from_b, goal_id, w), visited
+
+# Bidirectional BFS
+def bidirectional_bfs(grid, start, goal, want_visited=True):
+    """Breadth-first search from both ends, one whole layer at a time, until the layers touch. Counts steps, not terrain cost."""
+    return run_steps(bidirectional_bfs_steps(grid, start, goal, want_visited))
+
+def bidirectional_bfs_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """Bidirectional BFS in steps form: yields every slice_size expanded cells, even partway through a layer."""
+    if not grid.is_walkable(*goal):
+        return None, 0
+    if start == goal:
+        return [start], ({start} if want_visited else 1)
+    w, cells = grid.w, grid.cells
+    size = len(cells)
+    buf_f = buffers(size, 0)
+    buf_b = buffers(size, 1)
+    gen_f = buf_f.begin()
+    gen_b = buf_b.begin()
+    start_id = start[1] * w + start[0]
+    goal_id = goal[1] * w + goal[0]
+    buf_f.stamp[start_id] = gen_f
+    buf_f.cost[start_id] = 0
+    buf_b.stamp[goal_id] = gen_b
+    buf_b.cost[goal_id] = 0
+    touched = [start_id, goal_id] if want_visited else None
+    visited_count = 2
+    frontier_f = [start_id]
+    frontier_b = [goal_id]
+    counters = getattr(_instrument, "counters", None)
+    if counters is not None:
+        # Layers aren't popped one by one, so they are counted a whole layer at a time
+        counters.pushes += 2
+        counters.peak_open = max(counters.peak_open, 2)
+    left = slice_size
+    while frontier_f and frontier_b:
+        # Expand the smaller layer; finish it so the best meeting in it is picked, not just the first
+        forward = len(frontier_f) <= len(frontier_b)
+        frontier, buf, gen, other, other_gen = (
+            (frontier_f, buf_f, gen_f, buf_b, gen_b) if forward else (frontier_b, buf_b, gen_b, buf_f, gen_f))
+        dist, came_from, stamp = buf.cost, buf.parent, buf.stamp
+        other_dist, other_stamp = other.cost, other.stamp
+        next_layer = []
+        meeting = -1
+        best_length = float('inf')
+        for current in frontier:
+            left -= 1
+            if not left: # end of a slice (never reached when slice_size is 0)
+                yield
+                left = slice_size
+            d = dist[current] + 1
+            for neighbor in _neighbor_ids(cells, w, size, current):
+                if stamp[neighbor] == gen:
+                    continue
+                stamp[neighbor] = gen
+                dist[neighbor] = d
+                came_from[neighbor] = current
+                next_layer.append(neighbor)
+                if other_stamp[neighbor] == other_gen:
+                    if d + other_dist[neighbor] < best_length:
+                        best_length = d + other_dist[neighbor]
+                        meeting = neighbor
+                else:
+                    visited_count += 1
+                    if touched is not None:
+                        touched.append(neighbor)
+        if counters is not None:
+            counters.pops += len(frontier)
+            counters.pushes += len(next_layer)
+            other_layer = frontier_b if forward else frontier_f
+            counters.peak_open = max(counters.peak_open, len(next_layer) + len(other_layer))
+        if meeting >= 0:
+            path = _join_bidirectional(meeting, buf_f.parent, start_id, buf_b.parent, goal_id, w)
+            return path, _visited_result(touched, visited_count, w)
+        if forward:
+            frontier_f = next_layer
+        else:
+            frontier_b = next_layer
+    return None, _visited_result(touched, visited_count, w)
+
+def _join_bidirectional(meeting, came_from_f, start_id, came_from_b, goal_id, w):
+    """Stitches the start→meeting and meeting→goal halves of a bidirectional search."""
+    path = _id_path(came_from_f, start_id, meeting, w)
+    i = meeting
+    while i != goal_id:
+        i = came_from_b[i]
+        path.append((i % w, i // w))
+    return path
+
+# Jump Point Search
+def jps(grid, start, goal, want_visited=True):
+    """Jump Point Search for 4-connected uniform-cost grids; see jps_steps."""
+    return run_steps(jps_steps(grid, start, goal, want_visited))
+
+def jps_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """
+    Jump Point Search for 4-connected uniform-cost grids. Horizontal runs scan up and down
+    at every cell and vertical runs stop at forced neighbors, so only jump points enter the
+    open list. Returns the full cell path with the straight runs between jump points filled in.
+    Jumping assumes every step costs the same, so weighted terrain falls back to A*.
+    """
+    if not grid.is_walkable(*goal):
+        return None, 0
+    if grid.weighted:
+        return (yield from astar_steps(grid, start, goal, want_visited, slice_size, buffers))
+    w, cells = grid.w, grid.cells
+    size = len(cells)
+    buf = buffers(size)
+    gen = buf.begin()
+    g_score, came_from, stamp = buf.cost, buf.parent, buf.stamp
+    start_id = start[1] * w + start[0]
+    goal_id = goal[1] * w + goal[0]
+    gx, gy = goal
+    stamp[start_id] = gen
+    g_score[start_id] = 0
+    came_from[start_id] = -1
+    touched = [start_id] if want_visited else None
+    visited_count = 1
+    push, pop, _ = _queue_ops(heappush, heappop)
+    openq = []
+    push(openq, (heuristic(start, goal), start_id))
+    left = slice_size
+    while openq:
+        left -= 1
+        if not left: # end of a slice (never reached when slice_size is 0)
+            yield
+            left = slice_size
+        _, current = pop(openq)
+        if current == goal_id:
+            # Expand each straight run between consecutive jump points
+            jump_points = _id_path(came_from, start_id, goal_id, w)
+            path = [start]
+            for (x0, y0), (x1, y1) in zip(jump_points, jump_points[1:]):
+                dx = (x1 > x0) - (x1 < x0)
+                dy = (y1 > y0) - (y1 < y0)
+                x, y = x0, y0
+                while (x, y) != (x1, y1):
+                    x += dx
+                    y += dy
+                    path.append((x, y))
+            return path, _visited_result(touched, visited_count, w)
+
+        for step in _jps_directions(cells, w, current, came_from[current]):
+            jump_point = _jump(cells, w, size, current, step, goal_id)
+            if jump_point < 0:
+                continue
+            distance = abs(jump_point - current)
+            tentative_g_score = g_score[current] + (distance if step in (1, -1) else distance // w)
+            if stamp[jump_point] != gen:
+                stamp[jump_point] = gen
+                visited_count += 1
+                if touched is not None:
+                    touched.append(jump_point)
+            elif tentative_g_score >= g_score[jump_point]:
+                continue
+            g_score[jump_point] = tentative_g_score
+            came_from[jump_point] = current
+            push(openq, (tentative_g_score + abs(jump_point % w - gx) + abs(jump_point // w - gy), jump_point))
+    return None, _visited_result(touched, visited_count, w)
+
+def _jps_directions(cells, w, node, parent):
+    """Pruned successor steps (flat id offsets) for a jump point given the jump point it was reached from."""
+    if parent < 0:
+        return [1, -1, w, -w]
+    if node // w == parent // w:
+        # Reached horizontally: keep going, or turn up/down
+        return [1 if node > parent else -1, w, -w]
+    # Reached vertically: keep going, plus any side opening that was walled off one step back
+    dy = w if node > parent else -w
+    back = node - dy
+    x = node % w
+    directions = [dy]
+    if x + 1 < w and cells[node + 1] == EMPTY and cells[back + 1] != EMPTY:
+        directions.append(1)
+    if x > 0 and cells[node - 1] == EMPTY and cells[back - 1] != EMPTY:
+        directions.append(-1)
+    return directions
+
+def _jump(cells, w, size, node, step, goal_id):
+    """Scans from node by `step` (±1 or ±w) and returns the next jump point id, or -1 at a wall."""
+    horizontal = step in (1, -1)
+    x = node % w
+    i = node
+    while True:
+        if horizontal:
+            x += step
+            if not 0 <= x < w:
+                return -1
+        i += step
+        if not 0 <= i < size or cells[i] != EMPTY:
+            return -1
+        if i == goal_id:
+            return i
+        if horizontal:
+            # A horizontal cell is a jump point if a vertical scan from it finds one
+            if _jump(cells, w, size, i, w, goal_id) >= 0 or _jump(cells, w, size, i, -w, goal_id) >= 0:
+                return i
+        else:
+            # The cell we came from is on the grid, so its side neighbors are too whenever ours are
+            back = i - step
+            if ((x + 1 < w and cells[i + 1] == EMPTY and cells[back + 1] != EMPTY) or
+                    (x > 0 and cells[i - 1] == EMPTY and cells[back - 1] != EMPTY)):
+                return i
+
+# Flow field
+def flow_field(grid, goal):
+    """Reverse Dijkstra from goal. Returns (dist, next_step) tables covering every reachable cell."""
+    return run_steps(flow_field_steps(grid, goal))
+
+def flow_field_steps(grid, goal, slice_size=0):
+    """flow_field in steps form: yields every slice_size expansions."""
+    if not grid.is_walkable(*goal):
+        return {}, {}
+    dist = {goal: 0}
+    next_step = {}
+    push, pop, counters = _queue_ops(heappush, heappop)
+    openq = []
+    push(openq, (0, goal))
+    left = slice_size
+    while openq:
+        left -= 1
+        if not left: # end of a slice (never reached when slice_size is 0)
+            yield
+            left = slice_size
+        current_cost, current = pop(openq)
+        if current_cost > dist[current]:
+            if counters is not None:
+                counters.stale += 1
+            continue
+        # Stepping from a neighbor into `current` costs whatever `current` costs to enter
+        step_cost = current_cost + get_cost(grid, *current)
+        for neighbor in grid.neighbors(*current):
+            if step_cost < dist.get(neighbor, float('inf')):
+                dist[neighbor] = step_cost
+                next_step[neighbor] = current
+                push(openq, (step_cost, neighbor))
+    return dist, next_step
+
+def flow_field_path(field, start):
+    """Follows next_step pointers from start to the field's goal. Returns the cell path or None."""
+    dist, next_step = field
+    path = [start]
+    current = start
+    if current not in dist:
+        # Start is off the field (e.g. an enemy standing on a freshly placed piece): step onto the best neighbor
+        options = [n for n in get_neighbors4(*current) if n in dist]
+        if not options:
+            return None
+        current = min(options, key=dist.get)
+        path.append(current)
+    while current in next_step:
+        current = next_step[current]
+        path.append(current)
+    return path
+
+# Incremental replanning
+class LPAStar:
+    """
+    Goal-rooted Lifelong Planning A* that keeps its g/rhs tables between grid changes.
+    The heuristic is zero and every search runs to convergence, so the tables hold the
+    exact distance to goal for the whole grid and any enemy can read its route from them.
+    After set_cells, pass the changed cells to update_cells() and only the part of the
+    search tree whose distances actually changed gets re-expanded.
+    """
+    def __init__(self, grid, goal):
+        self.grid = grid
+        self.goal = goal
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.openq = [(0, goal)]
+        self.open_keys = {goal: 0} # node -> key currently valid in openq (older heap entries are stale)
+        self.expanded = set()      # nodes expanded by the last compute() call
+        self.time_ms = 0.0
+        self.instrument = False    # collect SearchCounters stats for each compute() into self.counters
+        self.counters = None
+        self._push = heappush
+
+    def _update_vertex(self, node):
+        """Recomputes rhs for node and (re)queues it if it became locally inconsistent."""
+        if node != self.goal:
+            best = float('inf')
+            if self.grid.is_walkable(*node):
+                for neighbor in self.grid.neighbors(*node):
+                    best = min(best, self.g.get(neighbor, float('inf')) + get_cost(self.grid, *neighbor))
+            self.rhs[node] = best
+        g = self.g.get(node, float('inf'))
+        rhs = self.rhs.get(node, float('inf'))
+        if g != rhs:
+            key = min(g, rhs)
+            self.open_keys[node] = key
+            self._push(self.openq, (key, node))
+        else:
+            self.open_keys.pop(node, None)
+
+    def compute(self):
+        """Expands inconsistent nodes until the whole table is consistent again."""
+        start_time = time.perf_counter()
+        counters = start_counters() if self.instrument else None
+        run_steps(self.compute_steps())
+        if counters is not None:
+            self.counters = stop_counters(counters)
+        self.time_ms = (time.perf_counter() - start_time) * 1000
+
+    def compute_steps(self, slice_size=0):
+        """compute() in steps form: yields every slice_size expansions. The grid must not change until it finishes."""
+        # The open list persists between calls, so the entries already in it count toward peak_open
+        self._push, pop, active = _queue_ops(heappush, heappop, initial=len(self.openq))
+        self.expanded = set()
+        left = slice_size
+        while self.openq:
+            left -= 1
+            if not left: # end of a slice (never reached when slice_size is 0)
+                yield
+                left = slice_size
+            key, node = pop(self.openq)
+            if self.open_keys.get(node) != key:
+                if active is not None:
+                    active.stale += 1
+                continue # stale entry
+            del self.open_keys[node]
+            self.expanded.add(node)
+            g = self.g.get(node, float('inf'))
+            rhs = self.rhs.get(node, float('inf'))
+            if g > rhs:
+                # Overconsistent: distance improved, settle it
+                self.g[node] = rhs
+            else:
+                # Underconsistent: distance got worse, invalidate and requeue
+                self.g[node] = float('inf')
+                self._update_vertex(node)
+            for neighbor in self.grid.neighbors(*node):
+                self._update_vertex(neighbor)
+        self._push = heappush
+
+    def update_cells(self, cells):
+        """Repairs the tables after the given cells changed walkability or cost."""
+        for cell in cells:
+            self._update_vertex(cell)
+            # Neighbors route through `cell`, so their rhs depends on it too
+            for neighbor in self.grid.neighbors(*cell):
+                self._update_vertex(neighbor)
+        self.compute()
+
+    def path(self, start):
+        """Descends the g table from start to goal. Returns the cell path or None."""
+        g = self.g
+        path = [start]
+        current = start
+        if g.get(current, float('inf')) == float('inf'):
+            # Start is off the table (e.g. an enemy standing on a freshly placed piece): step onto the best neighbor
+            options = [n for n in get_neighbors4(*current) if g.get(n, float('inf')) < float('inf')]
+            if not options:
+                return None
+            current = min(options, key=g.get)
+            path.append(current)
+        while current != self.goal:
+            current = min(self.grid.neighbors(*current), key=lambda n: g.get(n, float('inf')) + get_cost(self.grid, *n))
+            path.append(current)
+        return path
+
+def lpa_star(grid, start, goal, want_visited=True):
+    """Runs a fresh LPAStar to convergence. The scene keeps its own instance to repair incrementally."""
+    return run_steps(lpa_star_steps(grid, start, goal, want_visited))
+
+def lpa_star_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=None):
+    """lpa_star in steps form: yields every slice_size expansions. Its tables are dicts, so buffers goes unused."""
+    if not grid.is_walkable(*goal):
+        return None, 0
+    planner = LPAStar(grid, goal)
+    yield from planner.compute_steps(slice_size)
+    return planner.path(start), (planner.expanded if want_visited else len(planner.expanded))
+
+# Multi-source search
+def multi_target_search(grid, starts, goals, want_visited=True):
+    """
+    One reverse Dijkstra seeded with every goal at once. Returns ({start: path to its nearest goal or None}, visited).
+    It replaces one find_path per (start, goal) pair and stops as soon as every start is settled.
+    A covered start is routed through its cheapest open neighbor, the way find_path treats a covered source.
+    """
+    w, cells, costs = grid.w, grid.cells, grid.costs
+    size = len(cells)
+    buf = get_search_buffers(size)
+    gen = buf.begin()
+    dist, toward, stamp = buf.cost, buf.parent, buf.stamp # toward: next cell on the way to the nearest goal
+    touched = [] if want_visited else None
+    visited_count = 0
+    push, pop, counters = _queue_ops(heappush, heappop)
+    openq = []
+    for gx, gy in goals:
+        i = gy * w + gx
+        if grid.is_walkable(gx, gy) and stamp[i] != gen:
+            stamp[i] = gen
+            dist[i] = 0
+            toward[i] = -1
+            push(openq, (0, i))
+            visited_count += 1
+            if touched is not None:
+                touched.append(i)
+    # Cells that still have to settle: each open start, or every open neighbor of a covered one
+    pending = set()
+    for x, y in starts:
+        i = y * w + x
+        if cells[i] == EMPTY:
+            pending.add(i)
+        else:
+            pending.update(_neighbor_ids(cells, w, size, i))
+
+    while openq and pending:
+        d, current = pop(openq)
+        if d > dist[current]:
+            if counters is not None:
+                counters.stale += 1
+            continue # stale entry
+        pending.discard(current)
+        # Stepping from a neighbor into `current` costs whatever `current` costs to enter
+        new_cost = d + costs[current]
+        for neighbor in _neighbor_ids(cells, w, size, current):
+            if stamp[neighbor] != gen:
+                stamp[neighbor] = gen
+                visited_count += 1
+                if touched is not None:
+                    touched.append(neighbor)
+            elif new_cost >= dist[neighbor]:
+                continue
+            dist[neighbor] = new_cost
+            toward[neighbor] = current
+            push(openq, (new_cost, neighbor))
+
+    routes = {}
+    for start in starts:
+        i = start[1] * w + start[0]
+        path = [start]
+        if cells[i] != EMPTY:
+            options = [n for n in _neighbor_ids(cells, w, size, i) if stamp[n] == gen]
+            if not options:
+                routes[start] = None
+                continue
+            i = min(options, key=lambda n: costs[n] + dist[n])
+            path.append((i % w, i // w))
+        elif stamp[i] != gen:
+            routes[start] = None
+            continue
+        while toward[i] != -1:
+            i = toward[i]
+            path.append((i % w, i // w))
+        routes[start] = path
+    return routes, _visited_result(touched, visited_count, w)
+
+# Hierarchical pathfinding (HPA*)
+HPA_CLUSTER_SIZE = 16
+HPA_WIDE_ENTRANCE = 6 # entrances at least this wide get a transition at each end instead of one in the middle
+
+class HPAStar:
+    """
+    Hierarchical A* over square clusters. Walkable openings in the border between two
+    neighboring clusters become entrance pairs; together with entrance-to-entrance costs
+    inside each cluster they form a small abstract graph. A query searches that graph and
+    splices the stored in-cluster paths back together. Routes are near-optimal, not exact.
+    In-cluster costs are computed the first time a query reaches a cluster, and a grid change
+    only rebuilds the borders and tables of the clusters it touched (repaired() does that on a
+    copy, so a search on another thread can keep reading this one). Give it a grid that won't
+    change under it, e.g. a copy of the live grid.
+    """
+    def __init__(self, grid, cluster_size=HPA_CLUSTER_SIZE):
+        self.grid = grid
+        self.size = cluster_size
+        self.cols = -(-grid.w // cluster_size)
+        self.rows = -(-grid.h // cluster_size)
+        self.transitions = {} # (cx, cy, axis) -> [(a, b)] cell ids facing each other across that border
+        self.inter = {}       # entrance id -> {entrance id across a border: cost of stepping onto it}
+        self.intra = {}       # (cx, cy) -> {a: {b: (cost, ids after a up to b)}}, filled lazily
+        for cy in range(self.rows):
+            for cx in range(self.cols):
+                self._build_border((cx, cy, 0))
+                self._build_border((cx, cy, 1))
+        self.version = grid.version
+
+    def _build_border(self, key):
+        """(Re)scans one border for entrances. axis 0 is the border to the right of (cx, cy), axis 1 the one below it."""
+        cx, cy, axis = key
+        grid, s = self.grid, self.size
+        w, cells, costs = grid.w, grid.cells, grid.costs
+        for a, b in self.transitions.pop(key, ()):
+            self._unlink(a, b)
+            self._unlink(b, a)
+        if cx < 0 or cy < 0 or (axis == 0 and cx + 1 >= self.cols) or (axis == 1 and cy + 1 >= self.rows):
+            return
+        if axis == 0:
+            x = (cx + 1) * s - 1
+            pairs = [(y * w + x, y * w + x + 1) for y in range(cy * s, min((cy + 1) * s, grid.h))]
+        else:
+            y = (cy + 1) * s - 1
+            pairs = [(y * w + x, (y + 1) * w + x) for x in range(cx * s, min((cx + 1) * s, w))]
+        transitions = []
+        run = []
+        for a, b in pairs + [(-1, -1)]: # the sentinel closes the last run
+            if a >= 0 and cells[a] == EMPTY and cells[b] == EMPTY:
+                run.append((a, b))
+                continue
+            if len(run) >= HPA_WIDE_ENTRANCE:
+                transitions.extend((run[0], run[-1]))
+            elif run:
+                transitions.append(run[len(run) // 2])
+            run = []
+        for a, b in transitions:
+            self.inter.setdefault(a, {})[b] = costs[b]
+            self.inter.setdefault(b, {})[a] = costs[a]
+        self.transitions[key] = transitions
+
+    def _unlink(self, a, b):
+        """Removes the a -> b border edge."""
+        links = self.inter.get(a)
+        if links is not None:
+            links.pop(b, None)
+            if not links:
+                del self.inter[a]
+
+    def _cluster_of(self, i):
+        """Cluster coordinates of flat id i."""
+        w = self.grid.w
+        return (i % w) // self.size, (i // w) // self.size
+
+    def _cluster_nodes(self, cx, cy):
+        """Entrance ids on this cluster's side of its four borders."""
+        nodes = set()
+        for key, side in (((cx, cy, 0), 0), ((cx - 1, cy, 0), 1), ((cx, cy, 1), 0), ((cx, cy - 1, 1), 1)):
+            for pair in self.transitions.get(key, ()):
+                nodes.add(pair[side])
+        return nodes
+
+    def _local_search(self, source, cluster, reverse=False, targets=None):
+        """
+        Dijkstra from source that never leaves `cluster`. Returns (dist, parent) dicts.
+        With reverse=True costs are measured *to* source, so parent points one step closer to it.
+        Stops early once every id in `targets` is settled.
+        """
+        grid, s = self.grid, self.size
+        w, cells, costs = grid.w, grid.cells, grid.costs
+        cx, cy = cluster
+        x0, y0 = cx * s, cy * s
+        x1, y1 = min(x0 + s, w) - 1, min(y0 + s, grid.h) - 1 # inclusive
+        dist = {source: 0}
+        parent = {source: -1}
+        remaining = len(targets) if targets is not None else -1
+        push, pop, counters = _queue_ops(heappush, heappop)
+        openq = []
+        push(openq, (0, source))
+        while openq:
+            d, current = pop(openq)
+            if d > dist[current]:
+                if counters is not None:
+                    counters.stale += 1
+                continue
+            if targets is not None and current in targets:
+                remaining -= 1
+                if not remaining:
+                    break
+            y, x = divmod(current, w)
+            step = costs[current] if reverse else 0
+            neighbors = []
+            if x < x1 and cells[current + 1] == EMPTY:
+                neighbors.append(current + 1)
+            if x > x0 and cells[current - 1] == EMPTY:
+                neighbors.append(current - 1)
+            if y < y1 and cells[current + w] == EMPTY:
+                neighbors.append(current + w)
+            if y > y0 and cells[current - w] == EMPTY:
+                neighbors.append(current - w)
+            for neighbor in neighbors:
+                new_cost = d + (step or costs[neighbor])
+                if new_cost < dist.get(neighbor, float('inf')):
+                    dist[neighbor] = new_cost
+                    parent[neighbor] = current
+                    push(openq, (new_cost, neighbor))
+        return dist, parent
+
+    def _chain(self, parent, end):
+        """Ids from just after the search source up to `end`, following a forward search's parent links."""
+        ids = []
+        while parent[end] != -1:
+            ids.append(end)
+            end = parent[end]
+        ids.reverse()
+        return ids
+
+    def _intra(self, cluster):
+        """Entrance-to-entrance costs and paths inside one cluster, searched on first use."""
+        table = self.intra.get(cluster)
+        if table is None:
+            table = {}
+            nodes = self._cluster_nodes(*cluster)
+            for a in nodes:
+                dist, parent = self._local_search(a, cluster, targets=nodes)
+                table[a] = {b: (dist[b], self._chain(parent, b)) for b in nodes if b != a and b in dist}
+            self.intra[cluster] = table
+        return table
+
+    def repaired(self, grid, cells):
+        """A new planner for grid after `cells` changed, sharing this one's untouched in-cluster tables."""
+        planner = HPAStar.__new__(HPAStar)
+        planner.grid = grid.copy()
+        planner.size, planner.cols, planner.rows = self.size, self.cols, self.rows
+        planner.transitions = dict(self.transitions)
+        planner.inter = {a: dict(links) for a, links in self.inter.items()}
+        planner.intra = dict(self.intra)
+        planner.update_cells(cells)
+        return planner
+
+    def differs_only_at(self, grid, cells):
+        """True if grid is this planner's grid with at most `cells` changed (so repaired() can catch it up)."""
+        if grid.w != self.grid.w or grid.h != self.grid.h or grid.costs != self.grid.costs:
+            return False
+        patched = bytearray(self.grid.cells)
+        w = grid.w
+        for x, y in cells:
+            if 0 <= x < w and 0 <= y < grid.h:
+                patched[y * w + x] = grid.cells[y * w + x]
+        return patched == grid.cells
+
+    def update_cells(self, cells):
+        """Rebuilds the borders the changed cells sit on and forgets the in-cluster tables those borders feed."""
+        grid, s = self.grid, self.size
+        borders = set()
+        clusters = set()
+        for x, y in cells:
+            if not (0 <= x < grid.w and 0 <= y < grid.h):
+                continue
+            cx, cy = x // s, y // s
+            clusters.add((cx, cy))
+            if x % s == s - 1:
+                borders.add((cx, cy, 0))
+            if x % s == 0:
+                borders.add((cx - 1, cy, 0))
+            if y % s == s - 1:
+                borders.add((cx, cy, 1))
+            if y % s == 0:
+                borders.add((cx, cy - 1, 1))
+        for key in borders:
+            self._build_border(key)
+            cx, cy, axis = key
+            clusters.add((cx, cy))
+            clusters.add((cx + 1, cy) if axis == 0 else (cx, cy + 1))
+        for cluster in clusters:
+            self.intra.pop(cluster, None)
+        self.version = grid.version
+
+    def find(self, start, goal):
+        """Returns (path, expanded entrance ids). The path is None if goal can't be reached."""
+        w = self.grid.w
+        start_id = start[1] * w + start[0]
+        goal_id = goal[1] * w + goal[0]
+        gx, gy = goal
+        goal_cluster = self._cluster_of(goal_id)
+
+        # 1. Hook start and goal up to the entrances of their own clusters. A covered start can't
+        #    be searched through, so its open neighbors (possibly in other clusters) act as sources
+        cells, costs = self.grid.cells, self.grid.costs
+        if cells[start_id] == EMPTY:
+            sources = [(start_id, 0)]
+        else:
+            sources = [(n, costs[n]) for n in _neighbor_ids(cells, w, len(cells), start_id)]
+        goal_dist, goal_parent = self._local_search(goal_id, goal_cluster, reverse=True)
+        exits = {n: goal_dist[n] for n in self._cluster_nodes(*goal_cluster) if n in goal_dist}
+        best_cost = float('inf')
+        best_node = -1
+
+        # 2. A* over the abstract graph, seeded with every entrance the sources can reach.
+        #    came_from is -1 - k for an entrance reached straight from source k
+        g_score = {}
+        came_from = {}
+        push, pop, counters = _queue_ops(heappush, heappop)
+        openq = []
+        source_parents = []
+        for k, (source, source_cost) in enumerate(sources):
+            cluster = self._cluster_of(source)
+            dist, parent = self._local_search(source, cluster)
+            source_parents.append(parent)
+            if goal_id in dist and source_cost + dist[goal_id] < best_cost:
+                best_cost = source_cost + dist[goal_id] # a route that never leaves the cluster
+                best_node = -1 - k
+            for n in self._cluster_nodes(*cluster):
+                if n in dist and source_cost + dist[n] < g_score.get(n, float('inf')):
+                    g_score[n] = source_cost + dist[n]
+                    came_from[n] = -1 - k
+                    push(openq, (g_score[n] + abs(n % w - gx) + abs(n // w - gy), -g_score[n], n))
+        expanded = set()
+        while openq:
+            # Ties on f go to the deeper entry: on open ground many entrances share an f, and
+            # reaching the goal early lets the f >= best_cost cut skip the rest of them
+            f, _, current = pop(openq)
+            if f >= best_cost:
+                break
+            g = g_score[current]
+            if f > g + abs(current % w - gx) + abs(current // w - gy):
+                if counters is not None:
+                    counters.stale += 1
+                continue # stale entry
+            expanded.add(current)
+            if current in exits and g + exits[current] < best_cost:
+                best_cost = g + exits[current]
+                best_node = current
+            edges = [(b, cost) for b, (cost, _) in self._intra(self._cluster_of(current)).get(current, {}).items()]
+            edges.extend(self.inter.get(current, {}).items())
+            for neighbor, cost in edges:
+                tentative_g_score = g + cost
+                if tentative_g_score < g_score.get(neighbor, float('inf')):
+                    g_score[neighbor] = tentative_g_score
+                    came_from[neighbor] = current
+                    push(openq, (tentative_g_score + abs(neighbor % w - gx) + abs(neighbor // w - gy),
+                                 -tentative_g_score, neighbor))
+
+        if best_cost == float('inf'):
+            return None, expanded
+
+        # 3. Refine: splice the local and in-cluster paths along the abstract route
+        route = []
+        k = best_node
+        while k >= 0:
+            route.append(k)
+            k = came_from[k]
+        route.reverse()
+        k = -1 - k
+        source = sources[k][0]
+        ids = [start_id] if source == start_id else [start_id, source]
+        ids.extend(self._chain(source_parents[k], route[0] if route else goal_id))
+        for a, b in zip(route, route[1:]):
+            cluster = self._cluster_of(a)
+            if cluster == self._cluster_of(b):
+                ids.extend(self.intra[cluster][a][b][1])
+            else:
+                ids.append(b) # one step across the border
+        if route:
+            i = best_node
+            while goal_parent[i] != -1:
+                i = goal_parent[i]
+                ids.append(i)
+        return [(i % w, i // w) for i in ids], expanded
+
+# Recently used HPAStar planners, newest first, found by grid version like the Landmarks sets below:
+# the path service's snapshot of a version gets the planner hpa_update_cells repaired for the live grid
+HPA_CACHED_PLANNERS = 4
+_hpa_planners = []
+_hpa_lock = threading.Lock() # the path service searches on a background thread
+
+def get_hpa_planner(grid):
+    """The HPAStar for grid's version: a cached one, else a new one built on a copy of grid."""
+    with _hpa_lock:
+        found = next((p for p in _hpa_planners if p.version == grid.version), None)
+        if found is not None:
+            _hpa_planners.remove(found)
+            _hpa_planners.insert(0, found)
+            return found
+    planner = HPAStar(grid.copy())
+    _remember_hpa_planner(planner)
+    return planner
+
+def _remember_hpa_planner(planner):
+    """Puts a planner at the front of the recent list, dropping the oldest one past HPA_CACHED_PLANNERS."""
+    with _hpa_lock:
+        _hpa_planners.insert(0, planner)
+        del _hpa_planners[HPA_CACHED_PLANNERS:]
+
+def hpa_star(grid, start, goal, want_visited=True):
+    """find_path adapter: answers from get_hpa_planner(grid), which builds one if no repaired planner fits the grid."""
+    if not grid.is_walkable(*goal):
+        return None, 0
+    path, expanded = get_hpa_planner(grid).find(start, goal)
+    w = grid.w
+    return path, ({(i % w, i // w) for i in expanded} if want_visited else len(expanded))
+
+def hpa_update_cells(grid, cells):
+    """Repairs the HPAStar of grid's previous state (if one was built) into a new one for grid after set_cells changed `cells`."""
+    with _hpa_lock:
+        if any(p.version == grid.version for p in _hpa_planners):
+            return
+        previous = next((p for p in _hpa_planners if p.differs_only_at(grid, cells)), None)
+    if previous is not None:
+        _remember_hpa_planner(previous.repaired(grid, cells))
+
+# Wavefront distance transform (NumPy)
+WAVEFRONT_THIN_RING = 48 # rings with fewer cells are grown in plain Python: NumPy's per-call overhead outweighs their work
+
+def distance_field(grid, goal):
+    """
+    Travel cost from every cell to goal as an (h, w) int32 array, -1 where unreachable.
+    Each wavefront is grown with array ops over a padded walkability mask instead of
+    per-node heap work, so wide-open maps cost a handful of NumPy calls per distance ring.
+    Thin rings (the long corridors of a maze) are grown cell by cell instead, since there the
+    ring count approaches the cell count and fixed per-ring NumPy costs would dominate.
+    On weighted terrain the rings are bucketed by cost, Dial-style, instead of being plain BFS
+    layers; that path has no thin-ring shortcut, so weighted mazes still pay per distance value.
+    """
+    return run_steps(distance_field_steps(grid, goal))
+
+def distance_field_steps(grid, goal, slice_size=0):
+    """distance_field in steps form: yields between rings once they've settled slice_size cells since the last yield."""
+    w, h = grid.w, grid.h
+    pw = w + 2 # one blocked cell of padding on every side keeps neighbor indices in range
+    walkable = np.zeros((h + 2, pw), dtype=bool)
+    walkable[1:-1, 1:-1] = np.frombuffer(grid.cells, dtype=np.uint8).reshape(h, w) == EMPTY
+    walkable = walkable.ravel()
+    dist = np.full(walkable.size, -1, dtype=np.int32)
+    # Rings are settled whole, so instrumentation counts a ring at a time: its cells are the pops,
+    # the new cells it reaches are the pushes and the largest pending set is the peak frontier
+    counters = getattr(_instrument, "counters", None)
+    if grid.is_walkable(*goal):
+        gx, gy = goal
+        frontier = np.array([(gy + 1) * pw + gx + 1])
+        offsets = np.array([1, -1, pw, -pw])
+        if counters is not None:
+            counters.pushes += 1
+        left = slice_size
+        if not grid.weighted:
+            dist[frontier] = 0
+            d = 0
+            # Cells not reached yet, as a bytearray so thin rings can test them one by one cheaply;
+            # open_view is the same memory for the array ops of wide rings
+            unreached = bytearray(walkable.tobytes())
+            open_view = np.frombuffer(unreached, dtype=np.uint8)
+            open_view[frontier] = 0
+            thin_ids, thin_dist = [], [] # cells settled by thin rings, written into dist at the end
+            while len(frontier):
+                left -= len(frontier)
+                if slice_size and left <= 0:
+                    yield
+                    left = slice_size
+                d += 1
+                if len(frontier) < WAVEFRONT_THIN_RING:
+                    # A corridor's ring: a few cells, cheaper to grow one at a time than with NumPy calls
+                    candidates = []
+                    for i in (frontier.tolist() if isinstance(frontier, np.ndarray) else frontier):
+                        for j in (i + 1, i - 1, i + pw, i - pw):
+                            if unreached[j]:
+                                unreached[j] = 0
+                                candidates.append(j)
+                    thin_ids.extend(candidates)
+                    thin_dist.extend([d] * len(candidates))
+                else:
+                    ring = np.asarray(frontier) # a list if the ring before was thin
+                    candidates = (ring[:, None] + offsets).ravel()
+                    candidates = np.unique(candidates[open_view[candidates] != 0])
+                    open_view[candidates] = 0
+                    dist[candidates] = d
+                if counters is not None:
+                    counters.pops += len(frontier)
+                    counters.pushes += len(candidates)
+                    counters.peak_open = max(counters.peak_open, len(frontier))
+                frontier = candidates
+            if thin_ids:
+                dist[thin_ids] = thin_dist
+        else:
+            costs = np.zeros((h + 2, pw), dtype=np.int32)
+            costs[1:-1, 1:-1] = np.frombuffer(grid.costs, dtype=np.uint8).reshape(h, w)
+            costs = costs.ravel()
+            # distance -> arrays of cells first reached at that distance; the smallest one settles next
+            buckets = {0: [frontier]}
+            while buckets:
+                d = min(buckets)
+                if counters is not None:
+                    counters.peak_open = max(counters.peak_open, sum(a.size for arrays in buckets.values() for a in arrays))
+                frontier = np.concatenate(buckets.pop(d))
+                popped = frontier.size
+                frontier = np.unique(frontier[dist[frontier] < 0])
+                if counters is not None:
+                    counters.pops += popped
+                    counters.stale += popped - frontier.size # duplicates, or cells already settled cheaper
+                if not frontier.size:
+                    continue
+                dist[frontier] = d
+                left -= frontier.size
+                if slice_size and left <= 0:
+                    yield
+                    left = slice_size
+                # Stepping from a neighbor into a frontier cell costs whatever that cell costs to enter
+                candidates = (frontier[:, None] + offsets).ravel()
+                reached = np.repeat(d + costs[frontier], 4)
+                keep = walkable[candidates] & (dist[candidates] < 0)
+                candidates, reached = candidates[keep], reached[keep]
+                if counters is not None:
+                    counters.pushes += candidates.size
+                for value in np.unique(reached).tolist():
+                    buckets.setdefault(value, []).append(candidates[reached == value])
+    return dist.reshape(h + 2, pw)[1:-1, 1:-1]
+
+def distance_field_path(dist, start, costs=None):
+    """
+    Walks downhill on a distance_field from start to its goal. Returns the cell path or None.
+    Pass the grid's costs when the field was built on weighted terrain.
+    """
+    h, w = dist.shape
+    x, y = start
+    path = [start]
+    step_cost = (lambda nx, ny: costs[ny * w + nx]) if costs is not None else (lambda nx, ny: 1)
+    if dist[y, x] < 0:
+        # Start is off the field (e.g. an enemy standing on a freshly placed piece): step onto the best neighbor
+        options = [(nx, ny) for nx, ny in get_neighbors4(x, y) if 0 <= nx < w and 0 <= ny < h and dist[ny, nx] >= 0]
+        if not options:
+            return None
+        x, y = min(options, key=lambda c: dist[c[1], c[0]] + step_cost(*c))
+        path.append((x, y))
+    d = dist[y, x]
+    while d > 0:
+        for nx, ny in get_neighbors4(x, y):
+            # Blocked cells hold -1, which a cost-weighted step could otherwise match
+            if 0 <= nx < w and 0 <= ny < h and dist[ny, nx] >= 0 and dist[ny, nx] == d - step_cost(nx, ny):
+                x, y = nx, ny
+                break
+        else:
+            return None # field doesn't match the grid (stale or built for other costs)
+        path.append((x, y))
+        d = dist[y, x]
+    return path
+
+# Landmark (ALT) heuristic
+ALT_REUSE_CELLS = 16 # a Landmarks set is reused for grids with at most this many extra blocked cells
+ALT_CACHED_SETS = 4  # Landmarks sets kept: the live grid's, plus older ones snapshots may still be searching
+
+class Landmarks:
+    """
+    Travel-cost tables to a few landmarks (the open cells nearest each corner, plus the start and
+    goal of the query that built them) for the ALT heuristic. A table T holds every cell's cost to
+    reach its landmark, and by the triangle inequality each one bounds the rest of a route from below:
+    d(n, goal) >= T[n] - T[goal], and, since a cell's cost is paid on entering it,
+    d(n, goal) >= T[goal] - T[n] + cost(goal) - cost(n).
+    Filling cells only makes routes longer, so the tables stay admissible (and consistent) on any
+    grid that only gained obstacles since they were built. A set is never changed once built:
+    repaired() returns a new one, so a search on another thread can keep reading the old set.
+    """
+    def __init__(self, grid, landmarks, tables, anchors=()):
+        self.w = grid.w
+        self.h = grid.h
+        self.version = grid.version
+        self.open_mask = _open_mask(grid) # walkable cells the tables were built for
+        self.costs = bytes(grid.costs)
+        self.landmarks = landmarks        # flat ids
+        self.tables = tables              # one list per landmark: cost to reach it, -1 where it can't be reached
+        self.anchors = tuple(anchors)
+
+    def fits(self, grid):
+        """True if the tables still bound grid's costs: nothing opened up, no cost changed and only a few cells were filled."""
+        if grid.version == self.version:
+            return True
+        if grid.w != self.w or grid.h != self.h or grid.costs != self.costs:
+            return False
+        open_now = _open_mask(grid)
+        if np.any(open_now & ~self.open_mask):
+            return False
+        return np.count_nonzero(self.open_mask & ~open_now) <= ALT_REUSE_CELLS
+
+    def repaired(self, grid, cells):
+        """A new set for grid after `cells` were filled; only the distances those cells actually lengthened are redone."""
+        w = grid.w
+        blocked = [y * w + x for x, y in cells if 0 <= x < w and 0 <= y < grid.h and grid.cells[y * w + x] != EMPTY]
+        if any(i in self.landmarks for i in blocked):
+            return build_landmarks(grid, self.anchors) # a landmark itself got covered: pick the set again
+        tables = [_repair_table(table, grid, blocked, target) for table, target in zip(self.tables, self.landmarks)]
+        return Landmarks(grid, self.landmarks, tables, self.anchors)
+
+    def heuristic_to(self, grid, goal_id):
+        """Returns h(n) for flat ids n toward goal_id: the best of Manhattan distance and every landmark's bound."""
+        w, costs = grid.w, grid.costs
+        gx, gy = goal_id % w, goal_id // w
+        goal_cost = costs[goal_id]
+        terms = [(table, table[goal_id]) for table in self.tables if table[goal_id] >= 0]
+
+        def h(n):
+            best = abs(n % w - gx) + abs(n // w - gy)
+            entry = goal_cost - costs[n]
+            for table, to_goal in terms:
+                t = table[n]
+                if t >= 0:
+                    if t - to_goal > best:
+                        best = t - to_goal
+                    if to_goal - t + entry > best:
+                        best = to_goal - t + entry
+            return best
+        return h
+
+def _open_mask(grid):
+    """Flat boolean array of grid's walkable cells."""
+    return np.frombuffer(grid.cells, dtype=np.uint8) == EMPTY
+
+def build_landmarks(grid, anchors=()):
+    """Picks the open cells nearest each corner plus the walkable anchors, and builds a distance_field for each."""
+    w, h = grid.w, grid.h
+    ys, xs = np.nonzero(_open_mask(grid).reshape(h, w))
+    picked = []
+    if xs.size:
+        for cx, cy in ((0, 0), (w - 1, 0), (0, h - 1), (w - 1, h - 1)):
+            i = int(np.argmin(np.abs(xs - cx) + np.abs(ys - cy)))
+            picked.append(int(ys[i]) * w + int(xs[i]))
+    picked += [y * w + x for x, y in anchors if grid.is_walkable(x, y)]
+    landmarks = list(dict.fromkeys(picked))
+    tables = [distance_field(grid, (i % w, i // w)).ravel().tolist() for i in landmarks]
+    return Landmarks(grid, landmarks, tables, anchors)
+
+def _repair_table(table, grid, blocked, target):
+    """
+    Copy of one landmark table after the `blocked` ids were filled. Only cells whose every cheapest
+    step toward the landmark ran through the filled cells are re-settled, by a Dijkstra seeded from
+    the cells around them that kept their distance.
+    """
+    w, cells, costs = grid.w, grid.cells, grid.costs
+    size = len(cells)
+    table = list(table)
+    for b in blocked:
+        table[b] = -1
+    # 1. Collect the cells left without a neighbor that still offers their old distance
+    lost = set()
+    stack = [n for b in blocked for n in _neighbor_ids(cells, w, size, b)]
+    while stack:
+        x = stack.pop()
+        d = table[x]
+        if x == target or d < 0 or x in lost:
+            continue
+        if any(n not in lost and table[n] >= 0 and table[n] + costs[n] == d for n in _neighbor_ids(cells, w, size, x)):
+            continue
+        lost.add(x)
+        # Whoever stepped through x to reach the landmark has to be checked again
+        stack.extend(n for n in _neighbor_ids(cells, w, size, x) if table[n] == d + costs[x])
+    # 2. Seed every lost cell from its neighbors that kept their distance, then settle them in order
+    for x in lost:
+        table[x] = -1
+    openq = []
+    for x in lost:
+        seeds = [table[n] + costs[n] for n in _neighbor_ids(cells, w, size, x) if n not in lost and table[n] >= 0]
+        if seeds:
+            table[x] = min(seeds)
+            heappush(openq, (table[x], x))
+    while openq:
+        d, x = heappop(openq)
+        if d != table[x]:
+            continue # stale entry
+        # Stepping from a neighbor into x costs whatever x costs to enter
+        step = d + costs[x]
+        for n in _neighbor_ids(cells, w, size, x):
+            if n in lost and (table[n] < 0 or step < table[n]):
+                table[n] = step
+                heappush(openq, (step, n))
+    return table
+
+# Recently used Landmarks sets, newest first. Searches on snapshots and placement copies of the
+# live grid find the live grid's set here instead of building their own.
+_landmark_sets = []
+_landmark_lock = threading.Lock() # the path service searches on a background thread
+
+def get_landmarks(grid, anchors=()):
+    """A Landmarks set that fits grid: an exact one, else a recent one that still bounds it, else a new one around anchors."""
+    with _landmark_lock:
+        found = next((lm for lm in _landmark_sets if lm.version == grid.version), None)
+        if found is None:
+            found = next((lm for lm in _landmark_sets if lm.fits(grid)), None)
+        if found is not None:
+            _landmark_sets.remove(found)
+            _landmark_sets.insert(0, found)
+            return found
+    landmarks = build_landmarks(grid, anchors)
+    _remember_landmarks(landmarks)
+    return landmarks
+
+def _remember_landmarks(landmarks):
+    """Puts a set at the front of the recent list, dropping the oldest one past ALT_CACHED_SETS."""
+    with _landmark_lock:
+        _landmark_sets.insert(0, landmarks)
+        del _landmark_sets[ALT_CACHED_SETS:]
+
+def alt_update_cells(grid, cells):
+    """Repairs the Landmarks set of grid's previous state (if one was built) after set_cells filled `cells`."""
+    with _landmark_lock:
+        previous = next((lm for lm in _landmark_sets if lm.version != grid.version and lm.fits(grid)), None)
+    if previous is not None:
+        _remember_landmarks(previous.repaired(grid, cells))
+
+# ALT: A* with landmark bounds
+def alt(grid, start, goal, want_visited=True):
+    """A* guided by the best of Manhattan distance and the landmark bounds of get_landmarks(grid)."""
+    return run_steps(alt_steps(grid, start, goal, want_visited))
+
+def alt_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=get_search_buffers):
+    """ALT in steps form: yields every slice_size expansions. A grid without a fitting Landmarks set builds one first."""
+    if not grid.is_walkable(*goal):
+        return None, 0
+    w, cells, costs = grid.w, grid.cells, grid.costs
+    size = len(cells)
+    start_id = start[1] * w + start[0]
+    goal_id = goal[1] * w + goal[0]
+    h = get_landmarks(grid, (start, goal)).heuristic_to(grid, goal_id)
+    buf = buffers(size)
+    gen = buf.begin()
+    g_score, came_from, stamp = buf.cost, buf.parent, buf.stamp
+    stamp[start_id] = gen
+    g_score[start_id] = 0
+    touched = [start_id] if want_visited else None
+    visited_count = 1
+    push, pop, _ = _queue_ops(heappush, heappop)
+    openq = []
+    push(openq, (h(start_id), start_id))
+    left = slice_size
+    while openq:
+        left -= 1
+        if not left: # end of a slice (never reached when slice_size is 0)
+            yield
+            left = slice_size
+        _, current = pop(openq)
+        if current == goal_id:
+            return _id_path(came_from, start_id, goal_id, w), _visited_result(touched, visited_count, w)
+        g = g_score[current]
+        for neighbor in _neighbor_ids(cells, w, size, current):
+            tentative_g_score = g + costs[neighbor]
+            if stamp[neighbor] != gen:
+                stamp[neighbor] = gen
+                visited_count += 1
+                if touched is not None:
+                    touched.append(neighbor)
+            elif tentative_g_score >= g_score[neighbor]:
+                continue
+            g_score[neighbor] = tentative_g_score
+            came_from[neighbor] = current
+            push(openq, (tentative_g_score + h(neighbor), neighbor))
+    return None, _visited_result(touched, visited_count, w)
 
 def heuristic(a, b):
     """Manhattan distance heuristic for A*."""
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-def find_path(grid, start, goal, algorithm="astar"):
+def flow_field_search(grid, start, goal, want_visited=True):
+    """find_path adapter: builds a flow field and reads the route for start from it."""
+    return run_steps(flow_field_search_steps(grid, start, goal, want_visited))
+
+def flow_field_search_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=None):
+    """flow_field_search in steps form."""
+    field = yield from flow_field_steps(grid, goal, slice_size)
+    return flow_field_path(field, start), (set(field[0]) if want_visited else len(field[0]))
+
+def wavefront_search(grid, start, goal, want_visited=True):
+    """find_path adapter: builds a distance_field and walks down it from start."""
+    return run_steps(wavefront_search_steps(grid, start, goal, want_visited))
+
+def wavefront_search_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=None):
+    """wavefront_search in steps form."""
+    dist = yield from distance_field_steps(grid, goal, slice_size)
+    if not want_visited:
+        return distance_field_path(dist, start, grid.costs), int(np.count_nonzero(dist >= 0))
+    ys, xs = np.nonzero(dist >= 0)
+    return distance_field_path(dist, start, grid.costs), set(zip(xs.tolist(), ys.tolist()))
+
+# Every search find_path can dispatch to: name -> fn(grid, start, goal, want_visited) returning
+# (path, visited) where visited is the set of touched cells, or only their count when want_visited is False
+ALGORITHMS = {
+    "astar": astar,
+    "alt": alt,
+    "ucs": ucs,
+    "dial": dial,
+    "greedy_bfs": greedy_bfs,
+    "dfs": dfs,
+    "jps": jps,
+    "bi_astar": bidirectional_astar,
+    "bi_bfs": bidirectional_bfs,
+    "flow_field": flow_field_search,
+    "wavefront": wavefront_search,
+    "lpa_star": lpa_star,
+    "hpa_star": hpa_star,
+}
+
+# Algorithms that assume every step costs the same: on weighted terrain jps just runs A* and
+# bi_bfs returns the fewest steps, not the cheapest route, so pickers leave them out there
+UNIFORM_COST_ONLY = {"jps", "bi_bfs"}
+
+def hpa_star_steps(grid, start, goal, want_visited=True, slice_size=0, buffers=None):
+    """
+    hpa_star in steps form, run as a single slice: the planner for the grid's version is shared
+    through get_hpa_planner, so a search over it is never left half-done across grid changes.
+    """
+    return hpa_star(grid, start, goal, want_visited)
+    yield # never reached; makes this a generator like the other steps forms
+
+# The steps form of every ALGORITHMS entry: name -> fn(grid, start, goal, want_visited, slice_size, buffers)
+SEARCH_STEPS = {
+    "astar": astar_steps,
+    "alt": alt_steps,
+    "ucs": ucs_steps,
+    "dial": dial_steps,
+    "greedy_bfs": greedy_bfs_steps,
+    "dfs": dfs_steps,
+    "jps": jps_steps,
+    "bi_astar": bidirectional_astar_steps,
+    "bi_bfs": bidirectional_bfs_steps,
+    "flow_field": flow_field_search_steps,
+    "wavefront": wavefront_search_steps,
+    "lpa_star": lpa_star_steps,
+    "hpa_star": hpa_star_steps,
+}
+
+# Path cache: (grid version, start, goal, algorithm, want_visited, instrument) -> (path, stats, visited), least recently used first
+PATH_CACHE_SIZE = 128
+_path_cache = OrderedDict()
+_cache_counters = {"hits": 0, "misses": 0}
+_cache_lock = threading.Lock() # the path service searches on a background thread
+
+def path_cache_stats():
+    """Returns cumulative find_path cache hit/miss counters."""
+    return dict(_cache_counters)
+
+def _cache_get(key):
+    """The cached (path, stats, visited) for key as a fresh copy, or None; counts the hit or miss."""
+    with _cache_lock:
+        cached = _path_cache.get(key)
+        if cached is not None:
+            _cache_counters["hits"] += 1
+            _path_cache.move_to_end(key)
+        else:
+            _cache_counters["misses"] += 1
+    if cached is None:
+        return None
+    path, stats, visited_nodes_set = cached
+    # Callers (enemies) consume their path list, so hand out a copy
+    return (list(path) if path else path), dict(stats), visited_nodes_set
+
+def _cache_put(key, result):
+    """Stores a copy of a (path, stats, visited) result, evicting the least recently used entry if full."""
+    path, stats, visited_nodes_set = result
+    with _cache_lock:
+        _path_cache[key] = ((list(path) if path else path), dict(stats), visited_nodes_set)
+        if len(_path_cache) > PATH_CACHE_SIZE:
+            _path_cache.popitem(last=False)
+
+def _search_result(path, visited, want_visited, time_ms):
+    """Packs a search's (path, visited) into find_path's (path, stats, visited_nodes_set)."""
+    if isinstance(visited, int):
+        visited_count = visited
+        visited_nodes_set = set() if want_visited else None
+    else:
+        visited_count = len(visited)
+        visited_nodes_set = visited if want_visited else None
+    path_length = len(path) if path else 0
+    stats = {"time_ms": time_ms, "visited": visited_count, "length": path_length}
+    return path, stats, visited_nodes_set
+
+def find_path(grid, start, goal, algorithm="astar", use_cache=True, want_visited=True, instrument=False):
     """
     General function to find a path using a specified algorithm.
     Returns a tuple: (path, stats_dict, visited_nodes_set)
+    Results are cached per grid version; pass use_cache=False for throwaway grids.
+    With want_visited=False the visited set is never built and None is returned in its place.
+    With instrument=True stats also carries the SearchCounters entries (expanded, pushes, pops,
+    stale, peak_open, alloc_kb); alloc_kb is None unless tracemalloc is tracing.
     """
+    if use_cache:
+        key = (grid.version, start, goal, algorithm, want_visited, instrument)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+
     start_time = time.perf_counter()
-    path, visited_nodes_set = None, set()
-
-    if algorithm == "astar":
-        path, visited_nodes_set = astar(grid, start, goal)
-    elif algorithm == "ucs":
-        path, visited_nodes_set = ucs(grid, start, goal)
-    elif algorithm == "greedy_bfs":
-        path, visited_nodes_set = greedy_bfs(grid, start, goal)
-    elif algorithm == "dfs":
-        path, visited_nodes_set = dfs(grid, start, goal)
-    else:
+    search = ALGORITHMS.get(algorithm)
+    if search is None:
         print(f"Warning: Unknown algorithm '{algorithm}', defaulting to A*.")
-        path, visited_nodes_set = astar(grid, start, goal)
+        search = astar
+    counters = start_counters() if instrument else None
+    try:
+        path, visited = search(grid, start, goal, want_visited)
+    finally:
+        counter_stats = stop_counters(counters) if counters is not None else None
 
     end_time = time.perf_counter()
-    visited_count = len(visited_nodes_set) if visited_nodes_set else 0
-    path_length = len(path) if path else 0
-    stats = {"time_ms": (end_time - start_time) * 1000, "visited": visited_count, "length": path_length}
-    return path, stats, visited_nodes_set
\ No newline at end of file
+    result = _search_result(path, visited, want_visited, (end_time - start_time) * 1000)
+    if counter_stats is not None:
+        result[1].update(counter_stats)
+    if use_cache:
+        _cache_put(key, result)
+    return result
+
+# SearchBuffers handed back by finished sliced searches for the next ones to reuse. Sliced
+# searches run on the frame loop and, for placement maps, on the path service's thread too.
+_spare_buffers = []
+_spare_lock = threading.Lock() # a buffer must never be handed to two searches at once
+
+def _take_spare_buffers(size):
+    """A spare SearchBuffers for this grid size, or a new one."""
+    with _spare_lock:
+        for i, buf in enumerate(_spare_buffers):
+            if buf.size == size:
+                return _spare_buffers.pop(i)
+    return SearchBuffers(size)
+
+def find_path_steps(grid, start, goal, algorithm="astar", use_cache=True, want_visited=True, slice_size=SLICE_EXPANSIONS):
+    """
+    find_path as a generator: yields every slice_size expansions and returns find_path's
+    (path, stats, visited_nodes_set). It searches on buffers of its own, so other searches can
+    run between its slices, but `grid` must not change until it finishes: hand it a snapshot.
+    stats["time_ms"] adds up the slices only, and stats["slices"] counts them.
+    """
+    if use_cache:
+        key = (grid.version, start, goal, algorithm, want_visited, False)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+    search = SEARCH_STEPS.get(algorithm)
+    if search is None:
+        print(f"Warning: Unknown algorithm '{algorithm}', defaulting to A*.")
+        search = astar_steps
+    borrowed = {} # slot -> SearchBuffers this search holds until it ends
+
+    def buffers(size, slot=0):
+        buf = borrowed.get(slot)
+        if buf is None:
+            buf = borrowed[slot] = _take_spare_buffers(size)
+        return buf
+
+    steps = search(grid, start, goal, want_visited, slice_size, buffers)
+    time_ms = 0.0
+    slices = 0
+    try:
+        while True:
+            slice_start = time.perf_counter()
+            try:
+                next(steps)
+            except StopIteration as done:
+                path, visited = done.value
+                break
+            finally:
+                time_ms += (time.perf_counter() - slice_start) * 1000
+                slices += 1
+            yield
+    finally:
+        # Also runs when the caller closes a cancelled search early
+        steps.close()
+        with _spare_lock:
+            _spare_buffers.extend(borrowed.values())
+    result = _search_result(path, visited, want_visited, time_ms)
+    result[1]["slices"] = slices
+    if use_cache:
+        _cache_put(key, result)
+    return result
\ No newline at end of file
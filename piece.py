@@ -1,5 +1,5 @@
-from constants import OBSTACLE
-from pathfinding import find_path
+from constants import OBSTACLE, EMPTY
+from pathfinding import find_path_steps, multi_target_search, run_steps
 def get_piece_shapes():
     """Returns dictionary of tetris-shaped pieces (list of relative coords)."""
     return {
@@ -32,30 +32,65 @@ def rotate_piece(cells, rotation):
         out = [(x - minx, y - miny) for x, y in out]
     return out
 
-def can_place_piece(grid, gx, gy, cells, start, goal, algorithm="astar"):
+def can_place_piece(grid, gx, gy, cells, spawns, cores, index=None):
     """Checks if piece fits legally at grid position (inside bounds, no collision)."""
-    h = len(grid); w = len(grid[0])
+    h = grid.h; w = grid.w
     absolute_cells = []
     for x, y in cells:
         ax, ay = gx + x, gy + y
-        if ax < 0 or ay < 0 or ax >= w or ay >= h or grid[ay][ax] != 0:
+        if ax < 0 or ay < 0 or ax >= w or ay >= h or grid.get(ax, ay) != EMPTY:
             return False
         absolute_cells.append((ax, ay))
     
-    if is_path_blocked(grid, absolute_cells, start, goal, algorithm="astar"):
+    # A ConnectivityIndex for the current grid answers without copying it and searching
+    if index is not None:
+        if index.blocks(absolute_cells):
+            return False
+    elif is_path_blocked(grid, absolute_cells, spawns, cores):
         return False
     return True
 
-def is_path_blocked(grid, cells, start, goal, algorithm="astar"):
-    """Check if placing cells on grid would block path from start to goal."""
-    temp_grid = [row[:] for row in grid]
-    for x, y in cells:
-        temp_grid[y][x] = OBSTACLE
-    
-    # A* returns a path of length > 1 if a path is found.
-    # It returns [start] (length 1) or None if no path is found.
-    path, _, _ = find_path(temp_grid, start, goal, algorithm)
-    return path is None
+def is_path_blocked(grid, cells, spawns, cores):
+    """Check if placing cells on grid would cut any spawn off from any core."""
+    if any(core in cells for core in cores):
+        return True
+    temp_grid = grid.copy()
+    temp_grid.set_cells(cells, OBSTACLE)
+
+    # The grid is undirected, so every spawn/core pair is linked exactly when every spawn and
+    # core reaches the first core: one multi-target search answers for all pairs at once
+    routes, _ = multi_target_search(temp_grid, list(spawns) + list(cores[1:]), cores[:1], want_visited=False)
+    return any(path is None for path in routes.values())
+
+def compute_placement_map(grid, cells, start, goal, index, route, route_visited, algorithm="astar"):
+    """
+    Checks every anchor for one rotated piece in a single pass.
+    Returns {(gx, gy): (path, visited_nodes)} for the valid anchors only.
+    Anchors whose cells miss the current route keep that route (it is still open);
+    the rest get a real search on a copy of the grid.
+    """
+    return run_steps(compute_placement_map_steps(grid, cells, start, goal, index, route, route_visited, algorithm))
+
+def compute_placement_map_steps(grid, cells, start, goal, index, route, route_visited, algorithm="astar", slice_size=0):
+    """compute_placement_map in steps form: each anchor's search yields every slice_size expansions."""
+    route_cells = set(route) if route else set()
+    placements = {}
+    for gy in range(grid.h):
+        for gx in range(grid.w):
+            absolute_cells = get_absolute_cells(gx, gy, cells)
+            if not all(grid.is_walkable(x, y) for x, y in absolute_cells):
+                continue
+            if index.blocks(absolute_cells):
+                continue
+            if any(c in route_cells for c in absolute_cells):
+                temp_grid = grid.copy()
+                temp_grid.set_cells(absolute_cells, OBSTACLE)
+                path, _, visited = yield from find_path_steps(temp_grid, start, goal, algorithm,
+                                                              use_cache=False, slice_size=slice_size)
+                placements[(gx, gy)] = (path, visited)
+            else:
+                placements[(gx, gy)] = (route, route_visited)
+    return placements
 
 def get_absolute_cells(gx, gy, cells):
     """Converts relative piece coords into absolute grid coords for placement."""
@@ -1,65 +1,200 @@
-import math
+import heapq, math
+import numpy as np
 
-class Projectile:
+PROJECTILE_SPEED = 8.0 # cell units per second
+PROJECTILE_LIFETIME = 5.0
+
+class ProjectileStore:
     """
-    Projectile tracks a moving projectile from a source (world coords x,y)
-    to a target enemy object. Coordinates are in grid-space (cells),
-    not pixels. FightScene will use camera.cell_size to turn into pixels.
+    Every projectile in flight as one row of NumPy arrays: position, target, speed, damage,
+    splash radius and age, all in grid-space (cells). Each tick update() moves every projectile
+    toward its target, tests the hits and applies their damage in one vectorized step, then
+    drops the finished rows in a single compaction. Targets are enemy uids, looked up through
+    EnemyStore.row_of, so rows the enemy store swaps around never leave a projectile aimed
+    at the wrong enemy. FightScene uses camera.cell_size to turn positions into pixels.
     """
-    def __init__(self, x, y, target, damage, speed=8.0, lifetime=5.0, origin_tower=None):
-        # x,y are floats in grid coordinates (cell units)
-        self.x = float(x)
-        self.y = float(y)
-        self.target = target  # reference to Enemy instance
-        self.damage = damage
-        self.speed = speed  # cell units per second
-        self.dead = False
-        self.lifetime = lifetime
-        self.age = 0.0
-        self.origin_tower = origin_tower
+    FIELDS = ("x", "y", "target", "speed", "damage", "splash", "age", "origin")
+
+    def __init__(self, capacity=64):
+        self.n = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.target = np.zeros(capacity, dtype=np.intp) # enemy uid
+        self.speed = np.zeros(capacity)
+        self.damage = np.zeros(capacity)
+        self.splash = np.zeros(capacity)                # splash radius, 0 for single-target shots
+        self.age = np.zeros(capacity)
+        self.origin = np.empty(capacity, dtype=object)  # tower that fired it, credited with kills
+
+    def __len__(self):
+        return self.n
+
+    def _grow(self):
+        """Doubles every array's capacity."""
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.empty(len(old) * 2, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def fire(self, tower, target):
+        """Launches a projectile from the tower's cell at a target enemy."""
+        i = self.n
+        if i == len(self.x):
+            self._grow()
+        self.x[i] = tower.x
+        self.y[i] = tower.y
+        self.target[i] = target.uid
+        self.speed[i] = PROJECTILE_SPEED
+        self.damage[i] = tower.damage
+        self.splash[i] = tower.splash_radius
+        self.age[i] = 0.0
+        self.origin[i] = tower
+        self.n = i + 1
+
+    def positions(self):
+        """(x, y) of every projectile, for drawing."""
+        n = self.n
+        return list(zip(self.x[:n].tolist(), self.y[:n].tolist()))
 
     def update(self, dt, enemies):
-        """Move toward target. On hit, mark dead and apply damage (caller may apply)."""
-        self.age += dt
-        if self.age >= self.lifetime:
-            self.dead = True
+        """Moves every projectile toward its target, applies the hits to the EnemyStore and drops the finished ones."""
+        n = self.n
+        if not n:
             return
+        x = self.x[:n]
+        y = self.y[:n]
+        age = self.age[:n]
+        age += dt
+        # Step 1: projectiles that aged out, or whose target died or left the store, just vanish
+        rows = enemies.row_of[self.target[:n]]
+        live = rows >= 0
+        rows = np.where(live, rows, 0)
+        live &= enemies.hp[rows] > 0
+        live &= age < PROJECTILE_LIFETIME
+        # Step 2: the rest close in; overshooting the target (or being on top of it) is a hit
+        dx = enemies.x[rows] - x
+        dy = enemies.y[rows] - y
+        dist = np.hypot(dx, dy)
+        travel = self.speed[:n] * dt
+        hit = live & ((dist <= 0.1) | (travel >= dist))
+        move = live & ~hit
+        scale = np.divide(travel, dist, out=np.zeros(n), where=move)
+        x += dx * scale
+        y += dy * scale
+        # Step 3: damage. Single-target hits land together (several on one enemy add up),
+        # splash hits go one at a time since each only hurts enemies still alive when it lands
+        if hit.any():
+            hit_idx = hit.nonzero()[0]
+            hit_rows = rows[hit_idx]
+            splash = self.splash[hit_idx]
+            single = splash <= 0
+            np.subtract.at(enemies.hp, hit_rows[single], self.damage[hit_idx[single]])
+            for i in hit_idx[~single].tolist():
+                row = rows[i]
+                for enemy in enemies.within(enemies.x[row], enemies.y[row], self.splash[i]):
+                    enemy.hp -= self.damage[i]
+            # The first projectile that hit an enemy now dead gets the kill
+            killed = enemies.hp[hit_rows] <= 0
+            _, first = np.unique(hit_rows[killed], return_index=True)
+            for tower in self.origin[hit_idx[killed][first]].tolist():
+                tower.kills += 1
+        # Step 4: keep only the projectiles still flying
+        keep = move.nonzero()[0]
+        if len(keep) < n:
+            k = len(keep)
+            for name in self.FIELDS:
+                a = getattr(self, name)
+                a[:k] = a[keep]
+            self.origin[k:n] = None # don't keep sold towers alive
+            self.n = k
 
-        if not self.target or self.target.is_dead():
-            self.dead = True
-            return
+def intercept(ox, oy, speed, pieces, max_time):
+    """
+    Earliest time a shot from (ox, oy) flying straight at `speed` meets a target walking `pieces`
+    (from EnemyStore.route_ahead). Returns (time, x, y) of the meeting, or None if it can't
+    happen within max_time.
+    """
+    start = 0.0
+    for x, y, vx, vy, duration in pieces:
+        # Solve |(x, y) + (vx, vy) s - (ox, oy)| = speed * (start + s) for s within this piece
+        px, py = x - ox, y - oy
+        c = px * px + py * py - (speed * start) ** 2
+        if c <= 0:
+            return start, x, y
+        a = vx * vx + vy * vy - speed * speed
+        if a < 0:
+            # A target slower than the shot: exactly one root is positive
+            b = 2 * (px * vx + py * vy - speed * speed * start)
+            s = (-b - math.sqrt(b * b - 4 * a * c)) / (2 * a)
+            if s <= duration and start + s <= max_time:
+                return start + s, x + vx * s, y + vy * s
+        start += duration
+        if start > max_time:
+            break
+    return None
 
-        tx, ty = self.target.pos
-        dx = tx - self.x
-        dy = ty - self.y
-        dist = math.hypot(dx, dy)
-        if dist <= 0.1:
-            self._on_hit(enemies)
-            return
+class InterceptProjectileStore:
+    """
+    Projectiles that never home. At fire time intercept() works out where and when the shot
+    meets its target from the target's speed along its current path, and the impact goes on a
+    heap keyed by game time. update() only pops the impacts that are due, so a projectile costs
+    O(log n) when fired and when it lands instead of work every tick; positions() interpolates
+    the straight flight only when something draws it. Made for headless fast-forward.
+    An impact lands on the target wherever it really is by then (a re-routed enemy is still hit),
+    and is lost like a homing shot if the target already died or left.
+    """
+    def __init__(self):
+        self.time = 0.0  # game seconds advanced through update()
+        self.heap = []   # (impact time, sequence, (fired at, x0, y0, x1, y1, target uid, damage, splash, tower))
+        self.fired = 0   # sequence numbers keep impacts at the same time in firing order
 
-        nx = dx / dist
-        ny = dy / dist
-        travel = self.speed * dt
-        # if travel overshoots, snap and apply damage
-        if travel >= dist:
-            self._on_hit(enemies)
+    def __len__(self):
+        return len(self.heap)
+
+    def fire(self, tower, target):
+        """Schedules the impact of a shot from the tower's cell at a target enemy."""
+        x0, y0 = tower.x, tower.y
+        hit = intercept(x0, y0, PROJECTILE_SPEED, target.store.route_ahead(target, PROJECTILE_LIFETIME), PROJECTILE_LIFETIME)
+        if hit is None:
+            # Can't catch it in time: fly at where it stands and fizzle out at the end of the lifetime
+            x1, y1 = target.pos
+            impact, uid = PROJECTILE_LIFETIME, -1
         else:
-            self.x += nx * travel
-            self.y += ny * travel
+            impact, x1, y1 = hit
+            uid = target.uid
+        heapq.heappush(self.heap, (self.time + impact, self.fired,
+                                   (self.time, x0, y0, x1, y1, uid, tower.damage, tower.splash_radius, tower)))
+        self.fired += 1
 
-    def _on_hit(self, enemies):
-        """Apply damage to target and any enemies within splash radius."""
-        self.dead = True
-        impact_pos = self.target.pos
+    def positions(self):
+        """(x, y) of every projectile, interpolated along its flight for drawing."""
+        now = self.time
+        out = []
+        for impact, _, (fired, x0, y0, x1, y1, *_rest) in self.heap:
+            f = (now - fired) / (impact - fired) if impact > fired else 1.0
+            out.append((x0 + (x1 - x0) * f, y0 + (y1 - y0) * f))
+        return out
 
-        # Apply splash damage if the attribute exists
-        if hasattr(self, "splash_radius") and self.splash_radius > 0:
-            for enemy in enemies:
-                if not enemy.is_dead():
-                    ex, ey = enemy.pos
-                    dist_to_impact = math.hypot(ex - impact_pos[0], ey - impact_pos[1])
-                    if dist_to_impact <= self.splash_radius:
-                        enemy.hp -= self.damage
-        else:
-            # single target damage
-            self.target.hp -= self.damage
\ No newline at end of file
+    def update(self, dt, enemies):
+        """Advances the clock and lands the impacts that came due on the EnemyStore."""
+        self.time += dt
+        heap = self.heap
+        while heap and heap[0][0] <= self.time:
+            _, _, (_, _, _, _, _, uid, damage, splash, tower) = heapq.heappop(heap)
+            # A shot whose target died or left the store is simply lost
+            row = enemies.row_of[uid] if uid >= 0 else -1
+            if row < 0 or enemies.hp[row] <= 0:
+                continue
+            if splash > 0:
+                for enemy in enemies.within(enemies.x[row], enemies.y[row], splash):
+                    enemy.hp -= damage
+            else:
+                enemies.hp[row] -= damage
+            if enemies.hp[row] <= 0:
+                tower.kills += 1
+
+PROJECTILE_MODES = {
+    "homing": ProjectileStore,
+    "intercept": InterceptProjectileStore
+}
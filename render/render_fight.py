@@ -1,8 +1,9 @@
 import pygame
+import numpy as np
 from constants import *
 from tower import tower_data
 from piece import PIECE_COLORS
-from grid import EMPTY, FIXED_OBSTACLE, cell_center
+from grid import EMPTY, FIXED_OBSTACLE, PIECE, cell_center
 from assets import get_assets
 
 # -----------------------------
@@ -13,23 +14,27 @@ def cell_rect(x, y, cell_size):
     return (x * cell_size, y * cell_size, cell_size, cell_size)
 
 def draw_grid(surf, grid, cell_size, pieces):
-    """Draws the grid cells (empty, obstacle, tower) on the surface using given cell_size."""
+    """Draws the grid cells (empty, swamp, obstacle, tower) on the surface using given cell_size."""
     colors = {
         EMPTY: (50, 50, 50),
         FIXED_OBSTACLE: (80, 80, 80)
     }
-    for y, row in enumerate(grid):
-        for x, val in enumerate(row):
-            if isinstance(val, str): # It's a piece key
-                pygame.draw.rect(surf, PIECE_COLORS.get(val, (100,100,200)), cell_rect(x, y, cell_size))
+    for y in range(grid.h):
+        for x in range(grid.w):
+            val = grid.get(x, y)
+            if val == PIECE:
+                pygame.draw.rect(surf, PIECE_COLORS.get(grid.piece_at(x, y), (100,100,200)), cell_rect(x, y, cell_size))
+            elif val == EMPTY and grid.cost(x, y) > GROUND:
+                pygame.draw.rect(surf, (55, 75, 45), cell_rect(x, y, cell_size)) # slow terrain (swamp)
             else:
                 pygame.draw.rect(surf, colors.get(val, (60,60,60)), cell_rect(x, y, cell_size))
             pygame.draw.rect(surf, (80, 80, 80), cell_rect(x, y, cell_size), 1)
 
-def draw_zoomed_map(surf, grid, camera, enemies=None, towers=None, projectiles=None, draw_path=None, is_path_valid=True, visited_nodes=None):
-    """Draw the fight grid, enemies, towers, projectiles at zoomed scale with camera offset."""
+def draw_zoomed_map(surf, grid, camera, enemies=None, towers=None, projectiles=None, draw_path=None, is_path_valid=True, visited_nodes=None, routes=None):
+    """Draw the fight grid, enemies, towers, projectiles at zoomed scale with camera offset.
+    `routes` are extra spawn->core routes drawn as thin solid lines under the dashed preview path."""
     cs = int(camera.cell_size * camera.zoom)
-    gw, gh = len(grid[0]), len(grid)
+    gw, gh = grid.w, grid.h
 
     assets = get_assets()
     bg_image = assets["background"]
@@ -54,6 +59,11 @@ def draw_zoomed_map(surf, grid, camera, enemies=None, towers=None, projectiles=N
             rx, ry, _, _ = cell_rect(x, y, cs)
             temp.blit(visited_surf, (rx, ry), special_flags=pygame.BLEND_RGBA_ADD)
 
+    # other spawns' routes
+    for route in routes or []:
+        if route and len(route) > 1:
+            pygame.draw.lines(temp, (200, 170, 60), False, [cell_center(x, y, cs) for x, y in route], 1)
+
     # path
     if draw_path and len(draw_path) > 1:
         pts = [cell_center(x, y, cs) for x, y in draw_path]
@@ -94,9 +104,10 @@ def draw_zoomed_map(surf, grid, camera, enemies=None, towers=None, projectiles=N
             px, py = cell_center(e.pos[0], e.pos[1], cs)
             r = max(4, cs // 3)
 
-            if hasattr(e, "image") and e.image:
+            image = assets["enemies"].get(e.etype)
+            if image:
                 # Scale image to match cell size (optional)
-                img = pygame.transform.scale(e.image, (cs, cs))
+                img = pygame.transform.scale(image, (cs, cs))
                 rect = img.get_rect(center=(px, py))
                 temp.blit(img, rect)
             else:
@@ -116,9 +127,9 @@ def draw_zoomed_map(surf, grid, camera, enemies=None, towers=None, projectiles=N
 
     # projectiles
     if projectiles:
-        for p in projectiles:
-            px = p.x * cs + cs // 2
-            py = p.y * cs + cs // 2
+        for x, y in projectiles.positions():
+            px = x * cs + cs // 2
+            py = y * cs + cs // 2
             pygame.draw.circle(temp, (255, 255, 255), (int(px), int(py)), max(2, cs // 8))
 
     # blit with camera offset
@@ -154,6 +165,33 @@ def draw_piece_preview(surf, gx, gy, rotated_cells, cell_size, valid, camera):
         ry = (gy + y) * cs + camera.offset_y
         pygame.draw.rect(surf, color, (rx, ry, cs, cs), 2)
 
+def draw_valid_spots(surf, placement_map, current_length, cell_size, camera):
+    """Marks every anchor where the current piece fits; brighter marks lengthen the path more."""
+    cs = int(cell_size * camera.zoom)
+    r = max(2, cs // 8)
+    for (gx, gy), (path, _) in placement_map.items():
+        gain = (len(path) - current_length) if path else 0
+        shade = min(255, 90 + max(0, gain) * 20)
+        cx = gx * cs + cs // 2 + camera.offset_x
+        cy = gy * cs + cs // 2 + camera.offset_y
+        pygame.draw.circle(surf, (0, shade, 0), (cx, cy), r)
+
+def draw_distance_heatmap(surf, dist, cell_size, camera):
+    """Tints every reachable cell by its distance to the core (blue near, red far)."""
+    cs = int(cell_size * camera.zoom)
+    h, w = dist.shape
+    reachable = dist >= 0
+    scale = max(1, int(dist.max()))
+    t = np.where(reachable, dist, 0).astype(np.float32) / scale
+    rgb = np.zeros((w, h, 3), dtype=np.uint8) # surfarray wants (x, y)
+    rgb[..., 0] = (40 + 215 * t).T
+    rgb[..., 2] = (255 - 215 * t).T
+    rgb[~reachable.T] = 0 # colorkey: unreachable cells stay untinted
+    heat = pygame.surfarray.make_surface(rgb)
+    heat.set_colorkey((0, 0, 0))
+    heat.set_alpha(110)
+    surf.blit(pygame.transform.scale(heat, (w * cs, h * cs)), (camera.offset_x, camera.offset_y))
+
 def draw_tower_range(surf, tower, cell_size, camera, color=(255,255,255,80)):
     cs = int(cell_size * camera.zoom)
     radius = int(tower.range * cs)
@@ -163,11 +201,63 @@ def draw_tower_range(surf, tower, cell_size, camera, color=(255,255,255,80)):
     pygame.draw.circle(overlay, color, (radius, radius), radius)
     surf.blit(overlay, (cx - radius, cy - radius))
 
+# One color per algorithm in comparison mode, in ALGORITHMS order
+COMPARE_COLORS = [
+    (255, 255, 0), (80, 200, 255), (0, 255, 160), (255, 120, 200), (255, 90, 60), (170, 120, 255),
+    (255, 170, 40), (120, 255, 80), (60, 120, 255), (200, 200, 200), (255, 60, 140), (0, 200, 200),
+    (255, 255, 160),
+]
+
+def draw_comparison_paths(surf, algorithms, results, cell_size, camera):
+    """Overlays every algorithm's path at once; each is nudged a little sideways so shared stretches stay visible."""
+    cs = int(cell_size * camera.zoom)
+    for i, algorithm in enumerate(algorithms):
+        path = results.get(algorithm, (None, None))[0]
+        if not path or len(path) < 2:
+            continue
+        shift = (i - len(algorithms) // 2) * max(1, cs // 16)
+        pts = [(x * cs + cs // 2 + camera.offset_x + shift, y * cs + cs // 2 + camera.offset_y + shift) for x, y in path]
+        pygame.draw.lines(surf, COMPARE_COLORS[i % len(COMPARE_COLORS)], False, pts, 2)
+
+def draw_comparison_table(surf, algorithms, results, pending, error=None):
+    """Side-by-side time / visited / length table for comparison mode, in the map's bottom-left corner."""
+    font = pygame.font.SysFont(DEFAULT_FONT_NAME, 14)
+    row_h = 17
+    cols = [0, 110, 190, 260] # name, ms, visited, length
+    width = 310
+    height = row_h * (len(algorithms) + 2) + 8
+    x = 8
+    y = surf.get_height() - height - 8
+    panel = pygame.Surface((width, height), pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 170))
+    surf.blit(panel, (x, y))
+    x += 6
+    y += 4
+    for col, text in zip(cols, ["Algorithm", "ms", "visited", "length"]):
+        surf.blit(font.render(text, True, (2, 255, 255)), (x + col, y))
+    y += row_h
+    for i, algorithm in enumerate(algorithms):
+        pygame.draw.rect(surf, COMPARE_COLORS[i % len(COMPARE_COLORS)], (x, y + 4, 8, 8))
+        surf.blit(font.render(algorithm, True, (255, 255, 255)), (x + 12, y))
+        if algorithm in results:
+            path, stats = results[algorithm]
+            if "error" in stats:
+                cells = ["error", "", ""]
+            else:
+                cells = [f"{stats['time_ms']:.2f}", str(stats["visited"]), str(stats["length"]) if path else "none"]
+        else:
+            cells = ["...", "", ""]
+        for col, text in zip(cols[1:], cells):
+            surf.blit(font.render(text, True, (255, 255, 255)), (x + col, y))
+        y += row_h
+    status = f"Comparison failed: {error}" if error else (f"Running {pending} more..." if pending else "C: close comparison")
+    surf.blit(font.render(status, True, (200, 200, 200)), (x, y))
+
 def draw_projectiles(surf, projectiles, cell_size, camera):
     cs = int(cell_size * camera.zoom)
-    for p in projectiles:
-        px = p.x * cs + cs // 2 + camera.offset_x
-        py = p.y * cs + cs // 2 + camera.offset_y
+    for x, y in projectiles.positions():
+        px = x * cs + cs // 2 + camera.offset_x
+        py = y * cs + cs // 2 + camera.offset_y
         pygame.draw.circle(surf, (255, 255, 255), (int(px), int(py)), max(2, cs // 8))
 
 # -----------------------------
@@ -181,7 +271,7 @@ _sidebar_rects = {
     "algo_button": None,
 }
 
-def draw_sidebar(surf, level, player, wave_index, deck_count, is_placing_tower, selected_tower=None, algorithm="astar", path_stats=None):
+def draw_sidebar(surf, level, player, wave_index, deck_count, is_placing_tower, selected_tower=None, algorithm="astar", path_stats=None, cache_stats=None, show_counters=False, search_load=None):
     w, h = surf.get_size()
     sidebar_w = 260
     rect = pygame.Rect(w - sidebar_w, 0, sidebar_w, h)
@@ -245,6 +335,22 @@ def draw_sidebar(surf, level, player, wave_index, deck_count, is_placing_tower,
         txt = pygame.font.SysFont("arial", 16, bold=True).render(f"Sell ({refund})", True, (0,0,0))
         surf.blit(txt, (sell_rect.centerx - txt.get_width()//2, sell_rect.centery - txt.get_height()//2))
         _sidebar_rects["sell_button"] = sell_rect.copy()
+    elif show_counters and path_stats and "expanded" in path_stats:
+        _sidebar_rects["sell_button"] = None
+        # Search counters panel (I): where the search spent its work, not just how long it took
+        font_stat = pygame.font.SysFont(DEFAULT_FONT_NAME, 16)
+        alloc_kb = path_stats.get("alloc_kb")
+        rows = [
+            ("Search Counters (I)", (2,255,255)),
+            (f"Nodes Expanded: {path_stats['expanded']}", (255,255,255)),
+            (f"Open List Pushes: {path_stats['pushes']}", (255,255,255)),
+            (f"Open List Pops: {path_stats['pops']}", (255,255,255)),
+            (f"Stale Pops Skipped: {path_stats['stale']}", (255,255,255)),
+            (f"Peak Open List: {path_stats['peak_open']}", (255,255,255)),
+            (f"Allocated: {alloc_kb} KB" if alloc_kb is not None else "Allocated: n/a", (255,255,255)),
+        ]
+        for text, color in rows:
+            surf.blit(font_stat.render(text, True, color), (x, y)); y += 22
     else:
         _sidebar_rects["sell_button"] = None
         # Hotkey info
@@ -255,7 +361,8 @@ def draw_sidebar(surf, level, player, wave_index, deck_count, is_placing_tower,
         surf.blit(f.render("Esc: Quit and Return to Map", True, (2,255,255)), (x, y)); y += 24
         #surf.blit(f.render("F1: (Dev) Win Level", True, (2,255,255)), (x, y)); y += 24
         #surf.blit(f.render("F2: (Dev) Place All Pieces", True, (2,255,255)), (x, y)); y += 24
-        surf.blit(f.render("S: Show/Hide Visited Nodes", True, (2,255,255)), (x, y))
+        surf.blit(f.render("S: Show/Hide Visited Nodes", True, (2,255,255)), (x, y)); y += 24
+        surf.blit(f.render("V: Show/Hide Valid Spots", True, (2,255,255)), (x, y))
 
     # Move y to the position after the fixed-height contextual panel
     y = context_panel_y_start + context_panel_height
@@ -268,17 +375,29 @@ def draw_sidebar(surf, level, player, wave_index, deck_count, is_placing_tower,
     _sidebar_rects["algo_button"] = algo_rect.copy()
 
     # Algorithm stats
+    font_stat = pygame.font.SysFont(DEFAULT_FONT_NAME, 16)
     if path_stats:
-        font_stat = pygame.font.SysFont(DEFAULT_FONT_NAME, 16)
         time_ms = path_stats.get("time_ms", 0)
         visited = path_stats.get("visited", 0)
         length = path_stats.get("length", 0)
-        surf.blit(font_stat.render(f"Execution Time: {time_ms:.3f} ms", True, (255,255,255)), (x, y + 40))
-        surf.blit(font_stat.render(f"Nodes Visited: {visited}", True, (255,255,255)), (x, y + 60))
-        surf.blit(font_stat.render(f"Path Length: {length}", True, (255,255,255)), (x, y + 80))
+        surf.blit(font_stat.render(f"Execution Time: {time_ms:.3f} ms", True, (255,255,255)), (x, y + 38))
+        surf.blit(font_stat.render(f"Nodes Visited: {visited}", True, (255,255,255)), (x, y + 56))
+        surf.blit(font_stat.render(f"Path Length: {length}", True, (255,255,255)), (x, y + 74))
+    if cache_stats:
+        hits = cache_stats.get("hits", 0)
+        misses = cache_stats.get("misses", 0)
+        surf.blit(font_stat.render(f"Path Cache: {hits} hits / {misses} misses", True, (255,255,255)), (x, y + 92))
+    if search_load:
+        # (searches in progress, ms used this frame, ms budget); no budget when a background thread runs them
+        running, used_ms, budget_ms = search_load
+        if budget_ms is None:
+            load_text = f"Searches: {running} running (thread)"
+        else:
+            load_text = f"Searches: {running} running, {used_ms:.1f}/{budget_ms:.1f} ms"
+        surf.blit(font_stat.render(load_text, True, (255,255,255)), (x, y + 110))
 
     # Start wave button
-    btn_rect = pygame.Rect(x, h - 58, sidebar_w - 2*padding, 48)
+    btn_rect = pygame.Rect(x, h - 50, sidebar_w - 2*padding, 40)
     pygame.draw.rect(surf, (100,180,100), btn_rect, border_radius=8)
     txt = pygame.font.SysFont(DEFAULT_FONT_NAME, 20, bold=True).render("Start Wave", True, (0,0,0))
     surf.blit(txt, (btn_rect.centerx - txt.get_width()//2, btn_rect.centery - txt.get_height()//2))
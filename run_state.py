@@ -44,20 +44,24 @@ def advance_to_next_level(run_state, level_id):
             n["cleared"] = False
             break
     run_state.phase = "fight"
+    # The map nodes have id 0 and 1, but the json has id 1 and 2.
+    # We'll assume a +1 mapping for now.
+    return load_level(level_id + 1)
+
+def load_level(json_level_id):
+    """Builds the Level with this id in data/levels.json."""
     with open(os.path.join("data", "levels.json")) as f:
         levels_data = json.load(f)["levels"]
-        # Find the level data that matches the ID from the map node.
-        # The map nodes have id 0 and 1, but the json has id 1 and 2.
-        # We'll assume a +1 mapping for now.
-        json_level_id = level_id + 1
-        level_data = next((l for l in levels_data if l["id"] == json_level_id), None)
-        if not level_data:
-            raise ValueError(f"Could not find level with id {json_level_id} in data/levels.json")
-        return Level(
-            name=level_data["name"],
-            gold=level_data["gold"],
-            waves=[[
-                EnemyGroup(g["type"], g["count"], g.get("spawn_interval", 0.5))
-                for g in w["sequence"]
-            ] for w in level_data["waves"]]
-        )
\ No newline at end of file
+    level_data = next((l for l in levels_data if l["id"] == json_level_id), None)
+    if not level_data:
+        raise ValueError(f"Could not find level with id {json_level_id} in data/levels.json")
+    return Level(
+        name=level_data["name"],
+        gold=level_data["gold"],
+        waves=[[
+            EnemyGroup(g["type"], g["count"], g.get("spawn_interval", 0.5))
+            for g in w["sequence"]
+        ] for w in level_data["waves"]],
+        spawns=[tuple(p) for p in level_data["spawns"]] if "spawns" in level_data else None,
+        cores=[tuple(p) for p in level_data["cores"]] if "cores" in level_data else None
+    )
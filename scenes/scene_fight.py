@@ -1,53 +1,45 @@
-import pygame, random, sys
-from enum import Enum
+import pygame, sys
 from constants import * # Imports EMPTY, OBSTACLE, FIXED_OBSTACLE, SWAMP, etc.
-from grid import cell_center, create_grid, set_cells, OBSTACLE, EMPTY, FIXED_OBSTACLE
-from piece import get_piece_shapes, rotate_piece, can_place_piece, get_absolute_cells
-from pathfinding import find_path
-from enemy import update_enemies, create_enemy, recompute_enemy_paths
-from tower import can_place_tower, update_towers, create_tower
-from render.render_fight import draw_zoomed_map, draw_tower_preview, draw_piece_preview, tower_list_click_test, sidebar_click_test, draw_projectiles, draw_sidebar, draw_tower_range
+from grid import cell_center
+from piece import rotate_piece, can_place_piece, compute_placement_map_steps
+from pathfinding import ALGORITHMS, UNIFORM_COST_ONLY, SLICE_EXPANSIONS, find_path_steps, path_cache_stats
+from connectivity import ConnectivityIndex
+from compare import AlgorithmComparison
+from path_service import get_path_service, SlicedPathService
+from simulation import Simulation, Phase
+from tower import can_place_tower, create_tower
+from render.render_fight import draw_zoomed_map, draw_tower_preview, draw_piece_preview, tower_list_click_test, sidebar_click_test, draw_projectiles, draw_sidebar, draw_tower_range, draw_valid_spots, draw_distance_heatmap, draw_comparison_paths, draw_comparison_table
 from sound_manager import play_music, play_sound
 
 class FightScene:
+    """Input and drawing for a fight; the fight itself (grid, enemies, towers, waves) is a Simulation."""
     def __init__(self, game, level):
         self.game = game
         self.level = level
         self.run_state = game.run_state
 
-        self.grid = create_grid(22, 20)
-        self.gw = len(self.grid[0])
-        self.gh = len(self.grid)
-
         # Pathfinding algorithm
-        self.algorithms = ["astar", "ucs", "greedy_bfs", "dfs"]
+        self.algorithms = list(ALGORITHMS) # every search registered in find_path, in TAB order
         self.algo_index = 0
         self.pathfinding_algorithm = self.algorithms[self.algo_index]
 
-        # Set spawn (top-left) and goal (center) points
-        self.start = (0, 0)
-        self.goal = (self.gw // 2, self.gh // 2)
-        
-        # Add random fixed obstacles
-        obstacle_chance = 0.08
-        for r in range(self.gh):
-            for c in range(self.gw):
-                # Ensure start/goal and their neighbors are not blocked
-                if abs(r - self.start[1]) > 1 or abs(c - self.start[0]) > 1:
-                    if abs(r - self.goal[1]) > 1 or abs(c - self.goal[0]) > 1:
-                        if self.grid[r][c] == EMPTY and random.random() < obstacle_chance:
-                            self.grid[r][c] = FIXED_OBSTACLE
-
-        self.enemies = []
-        self.towers = []
-        self.projectiles = []
+        # Searches run on the path service's background thread and the simulation picks up their answers
+        self.path_service = get_path_service()
+        self.time_sliced = False # B: run them in budgeted slices inside update() instead (SlicedPathService)
+        self.sim = Simulation(level, self.run_state.player, algorithm=self.pathfinding_algorithm,
+                              path_service=self.path_service, want_visited=True)
+        self.grid = self.sim.grid
+        if self.grid.weighted:
+            # Swamp makes step costs differ, which JPS and bidirectional BFS can't honour
+            self.algorithms = [a for a in self.algorithms if a not in UNIFORM_COST_ONLY]
+        self.gw = self.grid.w
+        self.gh = self.grid.h
+        self.player = self.sim.player
 
         self.camera = Camera(0, 0, 1.0, 36)
 
-        # pieces / deck: 20 pieces randomly selected from available shapes
-        self.pieces = get_piece_shapes()
-        self.piece_keys = list(self.pieces.keys())
-        self.deck = [random.choice(self.piece_keys) for _ in range(20)]
+        # pieces come off the simulation's deck
+        self.pieces = self.sim.pieces
         self.current_piece_key = None
         self._select_new_piece()
         self.rotation = 0        
@@ -59,31 +51,21 @@ class FightScene:
         self.selected_tower_id = self.tower_types[self.selected_tower_type]
         self.clicked_tower = None     # tower object clicked for stats panel
         self.hover_tower = None       # tower object currently hovered (for range display)
-        
-        # waves
-        self.current_wave_index = 0
-        self.wave_spawned = False
-
-        # player
-        self.player = self.run_state.player
-        self.player.gold = self.level.gold # Set gold for this level
-        self.wave_index = 0
-        self.deck_count = len(self.deck)
-        self.phase = Phase.Prepare
+        self.deck_count = len(self.sim.deck)
+        self.phase = Phase.Prepare # follows sim.phase, plus GrandVictory once every level is cleared
 
         # input helpers
         self.is_panning = False
         self._pan_start = (0,0)
         self._cam_start = (0,0)
         
-        self.spawn_queue = []  # list of (EnemyClass, spawn_time)
-        self.time_elapsed = 0.0
-        self.preview_path = None
-        self.path_stats = {"time_ms": 0, "visited": 0} # For displaying pathfinding performance
-        self.visited_nodes_for_preview = set()
         self.show_visited_nodes = False
-    
-        self._recompute_preview_path()
+        self.show_counters = False # expanded sidebar panel with per-search counters (expansions, pushes, peak open list)
+        self.comparison = None     # AlgorithmComparison while comparison mode (C) is on
+        self.show_heatmap = False
+        self.placement_map = None     # {(gx, gy): (path, visited)} of valid anchors for the current piece
+        self.placement_map_key = None # (grid version, piece, rotation, algorithm) the placement map was built for
+        self.show_valid_spots = False
     # ===================
     # Core Logic 
     # ===================
@@ -146,6 +128,16 @@ class FightScene:
                 self._dev_auto_place_pieces()
             elif e.key == pygame.K_s:
                 self.show_visited_nodes = not self.show_visited_nodes # Show/hide visited nodes
+            elif e.key == pygame.K_h:
+                self.show_heatmap = not self.show_heatmap # Show/hide distance heatmap
+            elif e.key == pygame.K_v:
+                self.show_valid_spots = not self.show_valid_spots # Show/hide valid piece spots
+            elif e.key == pygame.K_c:
+                self._toggle_comparison() # Run every algorithm side by side
+            elif e.key == pygame.K_b:
+                self._toggle_time_slicing() # Background thread / per-frame search budget
+            elif e.key == pygame.K_i:
+                self._toggle_counters() # Show/hide search counters
         elif e.type == pygame.MOUSEWHEEL:
             self.zoomimg(e)
         elif e.type == pygame.MOUSEBUTTONDOWN:
@@ -171,109 +163,67 @@ class FightScene:
                 self.show_tower_range(e)
 
     def update(self, dt):
-        if self.player.hp <= 0 and self.phase != Phase.GameOver:
-            self.phase = Phase.GameOver
-        
-        if self.phase != Phase.Running:
+        self.path_service.advance() # time-sliced searches get this frame's budget; a no-op for the thread
+        if self.comparison is not None:
+            # Never waits: resubmits only after a grid change and just collects whatever finished
+            self.comparison.request(self.grid, self.sim.start, self.sim.goal)
+            self.comparison.poll()
+        if self.phase in (Phase.Victory, Phase.GrandVictory, Phase.GameOver):
             return
-        self.time_elapsed += dt
-        for info in list(self.spawn_queue):
-            enemy_type, spawn_time = info
-            if self.time_elapsed >= spawn_time:
-                e = create_enemy(enemy_type, self.start, self.goal)
-                path, _, _ = find_path(self.grid, e.pos, self.goal, self.pathfinding_algorithm)
-                e.set_path(path)
-                self.enemies.append(e)
-                self.spawn_queue.remove(info)
-        # update enemies movement
-        reached = update_enemies(self.enemies, dt, self.goal)
-        for e in reached:
-            self.player.hp -= 1
-            if e in self.enemies:
-                self.enemies.remove(e)
-        # towers spawn projectiles via update_towers (appends to self.projectiles)
-        update_towers(self.towers, self.enemies, dt, self.projectiles)
-        # update projectiles (move & apply damage on hit)
-        for p in list(self.projectiles):
-            p.update(dt, self.enemies)
-            if p.dead:
-                # optionally, if the projectile's origin tower wants to count kills:
-                # if p.target.is_dead(): increment kills on origin_tower
-                if hasattr(p, "origin_tower") and p.origin_tower and p.target.is_dead():
-                    p.origin_tower.kills = getattr(p.origin_tower, "kills", 0) + 1
-                self.projectiles.remove(p)
-        # remove dead enemies and award gold
-        for e in list(self.enemies):
-            if e.is_dead():
-                self.player.gold += e.gold
-                if e in self.enemies:
-                    self.enemies.remove(e)
-        # check wave completion
-        if self.wave_spawned and not self.enemies and not any(not p.dead for p in self.projectiles):
-            # wave was spawned and there are no enemies and no in-flight projectiles
-            self.wave_spawned = False
-            self.current_wave_index += 1
-            self.wave_index = self.current_wave_index
-            if self.current_wave_index >= len(self.level.waves):
-                # Mark level as cleared
-                for level_node in self.run_state.levels:
-                    if level_node["id"] == self.run_state.current_level_id:
-                        level_node["cleared"] = True
-                
-                # Check if all levels are now cleared
-                all_cleared = all(level.get('cleared', False) for level in self.run_state.levels)
-                if all_cleared:
-                    self.phase = Phase.GrandVictory
-                else:
-                    self.phase = Phase.Victory
-
-            else:
-                self.phase = Phase.Prepare
+        self.sim.advance(dt) # runs the fixed-dt steps this frame covers
+        for kind, _ in self.sim.pop_events():
+            if kind == "enemy_died":
+                play_sound("enemy_die.mp3")
+        self.phase = self.sim.phase
+        if self.phase == Phase.Victory:
+            self._clear_level()
 
     def render(self, screen):
         screen.fill((18, 18, 18))
         # Step 1: compute preview path/validity
-        preview_path = self.preview_path
+        sim = self.sim
+        preview_path = sim.route
         preview_valid = True
+        visited_nodes = sim.route_visited
+        placement_map = None
         mx, my = pygame.mouse.get_pos()
         mouse_gx, mouse_gy = self._screen_to_grid(mx, my)
-        if mouse_gx is not None and self.placement_mode == "piece" and self.current_piece_key is not None:
-            shape = self.pieces[self.current_piece_key]
-            rotated = rotate_piece(shape, self.rotation)
-            valid = can_place_piece(self.grid, mouse_gx, mouse_gy, rotated, self.start, self.goal, self.pathfinding_algorithm)
-            if valid:
-                from copy import deepcopy
-                test_grid = deepcopy(self.grid)
-                cells = get_absolute_cells(mouse_gx, mouse_gy, rotated)
-                set_cells(test_grid, cells, OBSTACLE)
-                new_path, _, visited_for_preview = find_path(test_grid, self.start, self.goal, self.pathfinding_algorithm)
-                if new_path:
-                    preview_path = new_path
-                    preview_valid = True
-                    self.visited_nodes_for_preview = visited_for_preview
-                else:
-                    preview_valid = False
+        if self.placement_mode == "piece" and self.current_piece_key is not None:
+            # Built once per grid/piece/rotation/algorithm change, then just indexed every frame
+            placement_map = self._get_placement_map()
+            placement = placement_map.get((mouse_gx, mouse_gy)) if placement_map is not None else None
+            if placement:
+                preview_path, visited_nodes = placement
         # Step 2: draw map with path
         draw_zoomed_map(screen, self.grid, self.camera,
-            enemies=self.enemies, towers=self.towers,
-            projectiles=self.projectiles,
+            enemies=sim.enemies, towers=sim.towers,
+            projectiles=sim.projectiles,
             draw_path=preview_path, is_path_valid=preview_valid,
-            visited_nodes=self.visited_nodes_for_preview if self.show_visited_nodes else None
+            visited_nodes=visited_nodes if self.show_visited_nodes else None,
+            routes=list(sim.routes.values()) if sim.multi_route else None
         )
-        # Step 3: draw core icon
+        if self.show_heatmap:
+            draw_distance_heatmap(screen, sim.get_distance_map(), cell_size=self.camera.cell_size, camera=self.camera)
+        if placement_map is not None and self.show_valid_spots:
+            draw_valid_spots(screen, placement_map, len(sim.route) if sim.route else 0,
+                             cell_size=self.camera.cell_size, camera=self.camera)
+        if self.comparison is not None:
+            draw_comparison_paths(screen, self.comparison.algorithms, self.comparison.results,
+                                  cell_size=self.camera.cell_size, camera=self.camera)
+        # Step 3: draw core icons
         cs = int(self.camera.cell_size * self.camera.zoom)
-        goal_gx, goal_gy = self.goal
-        cx, cy = cell_center(goal_gx, goal_gy, cs)
-        sx = cx + self.camera.offset_x
-        sy = cy + self.camera.offset_y
-        pygame.draw.circle(screen, (180, 60, 60), (int(sx), int(sy)), max(6, cs//4))
         font = pygame.font.SysFont(DEFAULT_FONT_NAME, 16, bold=True)
         txt = font.render(str(self.player.hp), True, (255,255,255))
-        screen.blit(txt, (int(sx - txt.get_width()//2), int(sy - txt.get_height()//2)))
+        for goal_gx, goal_gy in sim.cores:
+            cx, cy = cell_center(goal_gx, goal_gy, cs)
+            sx = cx + self.camera.offset_x
+            sy = cy + self.camera.offset_y
+            pygame.draw.circle(screen, (180, 60, 60), (int(sx), int(sy)), max(6, cs//4))
+            screen.blit(txt, (int(sx - txt.get_width()//2), int(sy - txt.get_height()//2)))
         # Step 4: draw preview overlays
         if mouse_gx is not None:
             if self.placement_mode == "tower":
-                valid = can_place_tower(self.grid, mouse_gx, mouse_gy, self.towers)
+                valid = can_place_tower(self.grid, mouse_gx, mouse_gy, sim.towers)
                 draw_tower_preview(screen, mouse_gx, mouse_gy, self.selected_tower_id,
                                    cell_size=self.camera.cell_size, valid=valid, camera=self.camera)
                 if valid:
@@ -282,9 +232,12 @@ class FightScene:
                     draw_tower_range(screen, tmp_t, cell_size=self.camera.cell_size,
                                      camera=self.camera, color=(255, 255, 255, 80))
             elif self.placement_mode == "piece" and self.current_piece_key is not None:
-                shape = self.pieces[self.current_piece_key]
-                rotated = rotate_piece(shape, self.rotation)
-                valid = can_place_piece(self.grid, mouse_gx, mouse_gy, rotated, self.start, self.goal, self.pathfinding_algorithm)
+                rotated = rotate_piece(self.pieces[self.current_piece_key], self.rotation)
+                if placement_map is not None:
+                    valid = (mouse_gx, mouse_gy) in placement_map
+                else:
+                    # Map still building in the background: the connectivity index answers on its own
+                    valid = can_place_piece(self.grid, mouse_gx, mouse_gy, rotated, sim.spawns, sim.cores, index=sim.connectivity)
                 draw_piece_preview(screen, mouse_gx, mouse_gy, rotated,
                                    cell_size=self.camera.cell_size,
                                    valid=valid,
@@ -299,13 +252,20 @@ class FightScene:
                              cell_size=self.camera.cell_size,
                              camera=self.camera, color=(255,220,80,110))
         # Step 6: projectiles
-        draw_projectiles(screen, self.projectiles,
+        draw_projectiles(screen, sim.projectiles,
                          cell_size=self.camera.cell_size, camera=self.camera)
+        if self.comparison is not None:
+            draw_comparison_table(screen, self.comparison.algorithms, self.comparison.results,
+                                  len(self.comparison.futures), self.comparison.error)
         # Step 7: sidebar
-        self.deck_count = len(self.deck)
-        draw_sidebar(screen, self.level, self.player, self.wave_index, self.deck_count,
+        self.deck_count = len(sim.deck)
+        draw_sidebar(screen, self.level, self.player, sim.wave_index, self.deck_count,
                      self.placement_mode == "tower", selected_tower=self.clicked_tower,
-                     algorithm=self.pathfinding_algorithm, path_stats=self.path_stats)
+                     algorithm=self.pathfinding_algorithm, path_stats=sim.route_stats,
+                     cache_stats=path_cache_stats(), show_counters=self.show_counters,
+                     search_load=(self.path_service.in_progress(),
+                                  self.path_service.used_ms if self.time_sliced else None,
+                                  self.path_service.budget_ms if self.time_sliced else None))
         # Step 8: flip
         if self.phase == Phase.GameOver:
             s = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
@@ -350,32 +310,17 @@ class FightScene:
     # ===================
     def _select_new_piece(self):
         """Selects the next piece from the deck."""
-        self.current_piece_key = self.deck[0] if self.deck else None
+        self.current_piece_key = self.sim.deck[0] if self.sim.deck else None
 
     def _place_piece(self, gx, gy):
         """Attempts to place the current piece at a grid location."""
-        # if not placing tower and there's a current piece -> try place piece
-        shape = self.pieces[self.current_piece_key]
-        rotated = rotate_piece(shape, self.rotation)
-        if can_place_piece(self.grid, gx, gy, rotated, self.start, self.goal, algorithm=self.pathfinding_algorithm):
-            cells = get_absolute_cells(gx, gy, rotated)
-            set_cells(self.grid, cells, self.current_piece_key)
-            if self.deck:
-                self.deck.pop(0)
+        if self.sim.place_piece(gx, gy, self.rotation): # re-plans the route and every enemy
             self._select_new_piece()
-            self._recompute_preview_path()
-            self.deck_count = len(self.deck)
-            recompute_enemy_paths(self.enemies, self.grid, self.goal, self.pathfinding_algorithm)
+            self.deck_count = len(self.sim.deck)
 
     def _place_tower(self, gx, gy):
         """Attempts to place the selected tower at a grid location."""
-        if can_place_tower(self.grid, gx, gy, self.towers):
-            tower = create_tower(self.selected_tower_id, gx, gy)
-            if self.player.gold < tower.cost:
-                return # Not enough gold
-            self.player.gold -= tower.cost
-            self.towers.append(tower)
-            recompute_enemy_paths(self.enemies, self.grid, self.goal, self.pathfinding_algorithm)
+        self.sim.place_tower(self.selected_tower_id, gx, gy) # None when taken or short on gold
 
     def _handle_sidebar_click(self, mx, my):
         """Handles clicks on the sidebar UI. Returns True if a sidebar element was
@@ -386,9 +331,7 @@ class FightScene:
             self._switch_algo()
             return True
         elif clicked_element == "sell_button" and self.clicked_tower: # sell before deselect
-            refund = int(self.clicked_tower.cost * 0.5)
-            self.player.gold += refund
-            self.towers.remove(self.clicked_tower)
+            self.sim.sell_tower(self.clicked_tower)
             self.clicked_tower = None
             return True
         elif clicked_element == "start_wave":
@@ -423,7 +366,7 @@ class FightScene:
     def _select_existing_tower(self, gx, gy):
         """Selects a tower at a grid location to show its stats."""
         self.clicked_tower = None
-        for tower in self.towers:
+        for tower in self.sim.towers:
             if tower.x == gx and tower.y == gy:
                 self.clicked_tower = tower
                 break
@@ -484,29 +427,16 @@ class FightScene:
     # ===================
     def _start_wave_action(self):
         """Starts the next wave if conditions are met."""
-        if not self.wave_spawned and self.current_wave_index < len(self.level.waves):
-            self.spawn_wave()
-            self.wave_spawned = True
+        if self.sim.start_wave():
             self.phase = Phase.Running
 
-    def spawn_wave(self):
-        """Initializes the spawning sequence for the current wave."""
-        wave = self.level.waves[self.current_wave_index]
-        self.spawn_queue.clear()
-        self.time_elapsed = 0.0
-        randRange = 2.5
-        for group in wave:
-            for i in range(group.count):
-                spawn_time = i * group.spawn_interval + random.uniform(-randRange, randRange)
-                self.spawn_queue.append((group.name, self.time_elapsed + spawn_time))
-
     def show_tower_range(self, e):
         """Sets the tower to be hovered for displaying its range."""
         mx, my = e.pos
         gx, gy = self._screen_to_grid(mx, my)
         self.hover_tower = None
         if gx is not None:
-            for t in self.towers:
+            for t in self.sim.towers:
                 if t.x == gx and t.y == gy:
                     self.hover_tower = t
                     break
@@ -515,16 +445,32 @@ class FightScene:
         """Cycles to the next pathfinding algorithm."""
         self.algo_index = (self.algo_index + direction) % len(self.algorithms)
         self.pathfinding_algorithm = self.algorithms[self.algo_index]
-        self._recompute_preview_path()
-        recompute_enemy_paths(self.enemies, self.grid, self.goal, self.pathfinding_algorithm)
+        self.sim.set_algorithm(self.pathfinding_algorithm)
 
-    def _win_level(self):
-        """Developer hotkey action to instantly win the level."""
-        # First, ensure the preview path is computed for the final state if needed
-        if self.preview_path is None:
-            self._recompute_preview_path()
-
-        print("DEV: Instantly winning level.")
+    def _toggle_comparison(self):
+        """Turns comparison mode on (every algorithm in worker processes) or off."""
+        if self.comparison is None:
+            self.comparison = AlgorithmComparison(self.algorithms)
+            self.comparison.request(self.grid, self.sim.start, self.sim.goal)
+        else:
+            self.comparison.cancel()
+            self.comparison = None
+
+    def _toggle_time_slicing(self):
+        """Switches searches between the background thread and budgeted slices run by update()."""
+        self.time_sliced = not self.time_sliced
+        self.path_service = SlicedPathService() if self.time_sliced else get_path_service()
+        self.placement_map = None
+        self.sim.use_path_service(self.path_service) # cancels the old service's jobs
+
+    def _toggle_counters(self):
+        """Shows or hides the search counters, re-running the route search to measure them."""
+        self.show_counters = not self.show_counters
+        self.sim.instrument = self.show_counters
+        self.sim.recompute_route()
+
+    def _clear_level(self):
+        """Marks the level cleared in the run and shows Victory, or GrandVictory once every level is."""
         for level_node in self.run_state.levels:
             if level_node["id"] == self.run_state.current_level_id:
                 level_node["cleared"] = True
@@ -536,8 +482,16 @@ class FightScene:
         else:
             self.phase = Phase.Victory
 
+    def _win_level(self):
+        """Developer hotkey action to instantly win the level."""
+        print("DEV: Instantly winning level.")
+        self._clear_level()
+
     def _return_to_map(self):
         """Saves HP and returns to the map scene."""
+        if self.comparison is not None:
+            self.comparison.cancel()
+        self.path_service.cancel()
         self.run_state.player.hp = self.player.hp
         from scenes.scene_map import MapScene
         self.game.change_scene(MapScene(self.game))
@@ -545,40 +499,34 @@ class FightScene:
     def _dev_auto_place_pieces(self):
         """Developer hotkey to randomly place all pieces from the deck."""
         print("DEV: Auto-placing all pieces...")
-        max_attempts_per_piece = 200
-        placed_count = 0
-
-        while self.deck:
-            piece_key = self.deck[0]
-            shape = self.pieces[piece_key]
-            placed = False
-
-            for _ in range(max_attempts_per_piece):
-                rotation = random.randint(0, 3)
-                rotated_shape = rotate_piece(shape, rotation)
-                gx = random.randint(0, self.gw - 1)
-                gy = random.randint(0, self.gh - 1)
-
-                if can_place_piece(self.grid, gx, gy, rotated_shape, self.start, self.goal, self.pathfinding_algorithm):
-                    cells = get_absolute_cells(gx, gy, rotated_shape)
-                    set_cells(self.grid, cells, piece_key)
-                    self.deck.pop(0)
-                    placed = True
-                    placed_count += 1
-                    break
-            
-            if not placed:
-                print(f"DEV: Could not find a valid spot for piece '{piece_key}'. Stopping.")
-                break # Stop if a piece can't be placed
-
+        placed_count = self.sim.auto_place_pieces()
+        if self.sim.deck:
+            print(f"DEV: Could not find a valid spot for piece '{self.sim.deck[0]}'. Stopping.")
         self._select_new_piece()
-        self._recompute_preview_path()
-        recompute_enemy_paths(self.enemies, self.grid, self.goal, self.pathfinding_algorithm)
         print(f"DEV: Placed {placed_count} pieces.")
 
-    def _recompute_preview_path(self):
-        """Calculates and caches the main preview path and its stats."""
-        self.preview_path, self.path_stats, self.visited_nodes_for_preview = find_path(self.grid, self.start, self.goal, self.pathfinding_algorithm)
+    def _get_placement_map(self, wait=False):
+        """
+        Returns the valid anchors (with their resulting paths) for the current piece.
+        A stale map is rebuilt on the path service; until it's done this returns None, unless wait=True.
+        """
+        key = (self.grid.version, self.current_piece_key, self.rotation, self.pathfinding_algorithm)
+        if self.placement_map is None or self.placement_map_key != key:
+            sim = self.sim
+            rotated = rotate_piece(self.pieces[self.current_piece_key], self.rotation)
+            future = self.path_service.submit(self.grid, ("placement",) + key[1:], _build_placement_map, rotated,
+                                              sim.start, sim.goal, sim.spawns, sim.cores, self.pathfinding_algorithm)
+            if not (wait or future.done()):
+                return None
+            self.placement_map = future.result()
+            self.placement_map_key = key
+        return self.placement_map
+
+def _build_placement_map(grid, cells, start, goal, spawns, cores, algorithm):
+    """Path service job in steps form: the placement map for one rotated piece on a grid snapshot."""
+    route, _, route_visited = yield from find_path_steps(grid, start, goal, algorithm)
+    return (yield from compute_placement_map_steps(grid, cells, start, goal, ConnectivityIndex(grid, spawns, cores),
+                                                   route, route_visited, algorithm, SLICE_EXPANSIONS))
 
 class Camera:
     def __init__(self, offset_x, offset_y, zoom, cell_size):
@@ -586,10 +534,3 @@ class Camera:
         self.offset_y = offset_y
         self.zoom = zoom
         self.cell_size = cell_size
-    
-class Phase(Enum):
-    Prepare = 1
-    Running = 2
-    Victory = 3
-    GameOver = 4
-    GrandVictory = 5
\ No newline at end of file
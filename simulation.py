@@ -0,0 +1,414 @@
+import random, tracemalloc
+from collections import deque
+from enum import Enum
+from grid import create_grid, set_cells, EMPTY, FIXED_OBSTACLE, SWAMP
+from piece import get_piece_shapes, rotate_piece, can_place_piece, get_absolute_cells
+from pathfinding import find_path, flow_field, flow_field_path, distance_field, distance_field_path, LPAStar, hpa_update_cells, alt_update_cells, multi_target_search
+from connectivity import ConnectivityIndex
+from enemy import EnemyStore, update_enemies, create_enemy, recompute_enemy_paths, request_enemy_paths
+from tower import can_place_tower, create_tower, TowerScheduler
+from projectile import PROJECTILE_MODES
+from run_state import Player
+
+FIXED_DT = 1 / 60        # game seconds per step()
+MAX_STEPS_PER_ADVANCE = 8 # advance() drops frame time beyond this many steps instead of spiralling
+GRID_SIZE = (22, 20)
+OBSTACLE_CHANCE = 0.08
+SWAMP_CHANCE = 0.03
+DECK_SIZE = 20           # pieces dealt per fight
+SPAWN_JITTER = 2.5       # seconds an enemy may spawn before or after its slot
+
+class Phase(Enum):
+    Prepare = 1
+    Running = 2
+    Victory = 3
+    GameOver = 4
+    GrandVictory = 5
+
+class Simulation:
+    """
+    One fight without pygame: grid, enemies, towers, projectiles, spawn queue and waves.
+    Game time only moves in FIXED_DT steps and every random choice (obstacles, swamp, deck,
+    spawn jitter) comes from one RNG seeded with `seed`, so the same seed and the same actions
+    replay the same fight. FightScene draws it and feeds it input; run_level() plays one headless.
+    Searches run inline unless a PathService is given, which then answers them in the background.
+    """
+    def __init__(self, level, player=None, seed=None, algorithm="astar", path_service=None, want_visited=False, size=GRID_SIZE, projectile_mode="homing"):
+        self.level = level
+        self.player = player or Player()
+        self.player.gold = level.gold
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.grid = create_grid(*size)
+
+        # Spawn gates (default top-left) and cores (default center) from the level
+        self.spawns = level.spawns or [(0, 0)]
+        self.cores = level.cores or [(self.grid.w // 2, self.grid.h // 2)]
+        # The first spawn/core pair is what the route, its stats and overlays show
+        self.start = self.spawns[0]
+        self.goal = self.cores[0]
+        self.multi_route = len(self.spawns) > 1 or len(self.cores) > 1
+        self.routes = {}      # spawn -> route to its nearest core, only kept when multi_route
+        self.spawn_count = 0  # enemies take the spawn gates in turn
+        self._add_terrain()
+
+        # pieces / deck: randomly dealt from the available shapes
+        self.pieces = get_piece_shapes()
+        piece_keys = list(self.pieces.keys())
+        self.deck = [self.rng.choice(piece_keys) for _ in range(DECK_SIZE)]
+
+        self.enemies = EnemyStore(self.grid) # live enemies as NumPy rows, iterated like a list of Enemy
+        self.towers = []
+        self.tower_scheduler = TowerScheduler(self.grid, FIXED_DT) # wakes only the towers that can fire
+        self.projectile_mode = projectile_mode # "homing" steps shots every tick, "intercept" schedules their impacts
+        self.projectiles = PROJECTILE_MODES[projectile_mode]()
+        self.events = [] # [(kind, enemy)] since the last pop_events(), kind is "enemy_died" or "core_hit"
+
+        # waves
+        self.wave_index = 0
+        self.wave_spawned = False
+        self.spawn_queue = deque() # (enemy type, spawn_time) for the current wave, soonest first
+        self.time_elapsed = 0.0 # game seconds into the current wave
+        self.ticks = 0          # steps run while a wave was live
+        self.lag = 0.0          # frame time advance() hasn't turned into steps yet
+        self.phase = Phase.Prepare
+
+        # routing
+        self.algorithm = algorithm
+        self.want_visited = want_visited # keep the route search's visited set (for the overlay)
+        self.instrument = False          # add search counters to route_stats
+        self.route = None                # start -> goal route new enemies copy on single-spawn maps
+        self.route_stats = {"time_ms": 0, "visited": 0}
+        self.route_visited = set()
+        self.flow_field = None   # shared goal field: (dist, next_step) tables in flow_field mode, distance_map in wavefront mode
+        self.distance_map = None # NumPy distance_field toward the goal, rebuilt lazily after grid changes
+        self.planner = None      # incremental LPAStar that survives grid changes, only kept in lpa_star mode
+        self.connectivity = ConnectivityIndex(self.grid, self.spawns, self.cores) # answers "would this piece block?"
+        self.path_service = path_service
+        self.route_request = None # Future for the route of the current grid
+        self.route_requests = []  # [(enemy, Future)] re-routes the enemies haven't picked up yet
+        self.counters_request = None # Future for the route's instrumented re-run, while instrument is on
+        self.recompute_route()
+
+    def _add_terrain(self):
+        """Scatters fixed obstacles and swamp patches from the simulation's RNG."""
+        grid = self.grid
+        for r in range(grid.h):
+            for c in range(grid.w):
+                # Ensure spawns/cores and their neighbors are not blocked
+                if all(abs(r - y) > 1 or abs(c - x) > 1 for x, y in self.spawns + self.cores):
+                    if grid.get(c, r) == EMPTY and self.rng.random() < OBSTACLE_CHANCE:
+                        grid.set_cells([(c, r)], FIXED_OBSTACLE)
+        # Swamp is still walkable, but slow to cross and avoided by weighted searches
+        swamp = []
+        for r in range(grid.h):
+            for c in range(grid.w):
+                if self.rng.random() < SWAMP_CHANCE:
+                    swamp.extend([(c, r), (c + 1, r), (c, r + 1), (c + 1, r + 1)])
+        grid.set_terrain(swamp, SWAMP)
+
+    # ===================
+    # Time
+    # ===================
+    def advance(self, dt):
+        """Turns `dt` seconds of frame time into whole steps, carrying the remainder. Returns the number of steps run."""
+        self.collect_routes()
+        self.lag = min(self.lag + dt, MAX_STEPS_PER_ADVANCE * FIXED_DT)
+        steps = 0
+        while self.lag >= FIXED_DT:
+            self.lag -= FIXED_DT
+            self.step()
+            steps += 1
+        return steps
+
+    def step(self):
+        """Advances the fight by one FIXED_DT tick."""
+        if self.player.hp <= 0:
+            self.phase = Phase.GameOver
+        if self.phase != Phase.Running:
+            return
+        dt = FIXED_DT
+        self.ticks += 1
+        self.time_elapsed += dt
+        # Step 1: spawn every enemy whose time has come
+        while self.spawn_queue and self.time_elapsed >= self.spawn_queue[0][1]:
+            enemy_type, _ = self.spawn_queue.popleft()
+            self.enemies.append(self._spawn_enemy(enemy_type))
+        # Step 2: move enemies, the ones reaching a core cost a life
+        for e in update_enemies(self.enemies, dt):
+            self.player.hp -= 1
+            self.events.append(("core_hit", e))
+            self.enemies.remove(e)
+        # Step 3: the towers that can fire do so into self.projectiles, then the projectiles that reach their target hit it
+        self.tower_scheduler.update(self.enemies, self.projectiles)
+        self.projectiles.update(dt, self.enemies)
+        # Step 4: remove dead enemies and award gold
+        for e in self.enemies.dead():
+            self.player.gold += e.gold
+            self.events.append(("enemy_died", e))
+            self.enemies.remove(e)
+        # Step 5: the wave is over once it has spawned and nothing is left alive or in flight
+        if self.wave_spawned and not self.spawn_queue and not self.enemies and not self.projectiles:
+            self.wave_spawned = False
+            self.wave_index += 1
+            self.phase = Phase.Victory if self.wave_index >= len(self.level.waves) else Phase.Prepare
+
+    def _spawn_enemy(self, enemy_type):
+        """Creates one enemy at the next spawn gate, already walking its route."""
+        spawn = self.spawns[self.spawn_count % len(self.spawns)]
+        self.spawn_count += 1
+        goal = self.goal
+        if self.multi_route:
+            # Each enemy gets its own copy of the spawn's shared route (paths are consumed as they walk)
+            path = list(self.routes.get(spawn) or [])
+            goal = path[-1] if path else goal
+        elif self.algorithm == "flow_field":
+            path = flow_field_path(self.flow_field, spawn)
+        elif self.algorithm == "wavefront":
+            path = distance_field_path(self.flow_field, spawn, self.grid.costs)
+        elif self.planner is not None:
+            path = self.planner.path(spawn)
+        else:
+            # Single spawn: the route already is this enemy's
+            path = list(self.route) if self.route else None
+        e = create_enemy(enemy_type, spawn, goal)
+        e.set_path(path)
+        if self.route_request is not None:
+            # The route is from before the last grid change, so this enemy needs the new one too
+            self.route_requests.append((e, self.path_service.request(self.grid, spawn, goal, self.algorithm)))
+        return e
+
+    def pop_events(self):
+        """Returns the events since the last call and forgets them."""
+        events, self.events = self.events, []
+        return events
+
+    # ===================
+    # Actions
+    # ===================
+    def start_wave(self):
+        """Queues the next wave's enemies with their jittered spawn times. Returns False if none can start."""
+        if self.wave_spawned or self.wave_index >= len(self.level.waves):
+            return False
+        self.time_elapsed = 0.0
+        queue = []
+        for group in self.level.waves[self.wave_index]:
+            for i in range(group.count):
+                spawn_time = i * group.spawn_interval + self.rng.uniform(-SPAWN_JITTER, SPAWN_JITTER)
+                queue.append((group.name, spawn_time))
+        # Sorted once so step() only ever looks at the head of the queue
+        self.spawn_queue = deque(sorted(queue, key=lambda info: info[1]))
+        self.wave_spawned = True
+        self.phase = Phase.Running
+        return True
+
+    def place_piece(self, gx, gy, rotation=0):
+        """Places the next piece of the deck at a grid location. Returns False if it doesn't fit or would cut a route."""
+        if not self.deck:
+            return False
+        key = self.deck[0]
+        rotated = rotate_piece(self.pieces[key], rotation)
+        if not can_place_piece(self.grid, gx, gy, rotated, self.spawns, self.cores, index=self.connectivity):
+            return False
+        cells = get_absolute_cells(gx, gy, rotated)
+        set_cells(self.grid, cells, key)
+        self.deck.pop(0)
+        self._on_grid_changed(cells)
+        self.recompute_route()
+        self.reroute_enemies()
+        return True
+
+    def auto_place_pieces(self, max_attempts_per_piece=200):
+        """Drops every remaining piece at random valid spots. Stops at the first piece that finds none; returns how many were placed."""
+        placed_count = 0
+        while self.deck:
+            shape = self.pieces[self.deck[0]]
+            for _ in range(max_attempts_per_piece):
+                rotated = rotate_piece(shape, self.rng.randint(0, 3))
+                gx = self.rng.randint(0, self.grid.w - 1)
+                gy = self.rng.randint(0, self.grid.h - 1)
+                if can_place_piece(self.grid, gx, gy, rotated, self.spawns, self.cores, index=self.connectivity):
+                    cells = get_absolute_cells(gx, gy, rotated)
+                    set_cells(self.grid, cells, self.deck.pop(0))
+                    self._on_grid_changed(cells)
+                    placed_count += 1
+                    break
+            else:
+                break
+        self.recompute_route()
+        self.reroute_enemies()
+        return placed_count
+
+    def place_tower(self, tower_id, gx, gy):
+        """Buys a tower at a grid location. Returns it, or None if the spot is taken or gold is short."""
+        if not can_place_tower(self.grid, gx, gy, self.towers):
+            return None
+        tower = create_tower(tower_id, gx, gy)
+        if self.player.gold < tower.cost:
+            return None
+        self.player.gold -= tower.cost
+        self.towers.append(tower)
+        self.tower_scheduler.add(tower)
+        self.reroute_enemies()
+        return tower
+
+    def sell_tower(self, tower):
+        """Removes a tower for half its cost back. Returns the refund."""
+        refund = int(tower.cost * 0.5)
+        self.player.gold += refund
+        self.towers.remove(tower)
+        self.tower_scheduler.remove(tower)
+        return refund
+
+    def set_algorithm(self, algorithm):
+        """Switches the search enemies are routed with and re-plans everything."""
+        self.algorithm = algorithm
+        self.recompute_route()
+        self.reroute_enemies()
+
+    def use_path_service(self, service):
+        """Moves searches onto `service` (None: run them inline) and re-plans everything there."""
+        if self.path_service is not None:
+            self.path_service.cancel()
+        self.path_service = service
+        self.recompute_route()
+        self.reroute_enemies()
+
+    # ===================
+    # Routing
+    # ===================
+    def _on_grid_changed(self, cells):
+        """Refreshes per-grid search state after set_cells changed `cells`."""
+        if self.planner is not None:
+            self.planner.update_cells(cells)
+        hpa_update_cells(self.grid, cells) # keeps the cached HPA* graph instead of rebuilding it on the next search
+        alt_update_cells(self.grid, cells) # repairs the ALT landmark tables around the new piece
+        self.connectivity = ConnectivityIndex(self.grid, self.spawns, self.cores)
+        self.distance_map = None
+
+    def get_distance_map(self):
+        """Returns the NumPy distance field toward the goal, recomputing it if the grid changed."""
+        if self.distance_map is None:
+            self.distance_map = distance_field(self.grid, self.goal)
+        return self.distance_map
+
+    def recompute_route(self):
+        """Plans the start -> goal route, and the shared tables the algorithm routes enemies with, for the current grid."""
+        self.route_request = None
+        self.counters_request = None
+        if self.multi_route:
+            # Every spawn's route to its nearest core, from one multi-target search
+            self.routes, _ = multi_target_search(self.grid, self.spawns, self.cores, want_visited=False)
+        if self.algorithm == "lpa_star":
+            # The planner is repaired in place by _on_grid_changed, so only build it on first use
+            if self.planner is None:
+                self.planner = LPAStar(self.grid, self.goal)
+                self.planner.instrument = self.instrument
+                self.planner.compute()
+            self.planner.instrument = self.instrument
+            self.route = self.planner.path(self.start)
+            self.route_stats = {"time_ms": self.planner.time_ms, "visited": len(self.planner.expanded),
+                                "length": len(self.route) if self.route else 0}
+            if self.instrument and self.planner.counters:
+                self.route_stats.update(self.planner.counters) # counters of the last repair
+            self.route_visited = self.planner.expanded
+            self.flow_field = None
+            return
+        self.planner = None
+        if self.path_service is None:
+            self._set_route(find_path(self.grid, self.start, self.goal, self.algorithm, want_visited=self.want_visited))
+        else:
+            # The old route stays in use until the background search answers
+            self.route_request = self.path_service.request(self.grid, self.start, self.goal, self.algorithm, want_visited=self.want_visited)
+        # Rebuild the shared goal field once per grid change so enemies never search on their own
+        if self.algorithm == "flow_field":
+            self.flow_field = flow_field(self.grid, self.goal)
+        elif self.algorithm == "wavefront":
+            self.flow_field = self.get_distance_map()
+        else:
+            self.flow_field = None
+
+    def _set_route(self, result):
+        """Adopts a finished route search's (path, stats, visited)."""
+        path, stats, visited = result
+        self.route = path
+        self.route_stats = dict(stats) # the path cache keeps the original
+        self.route_visited = visited or set()
+        if not self.instrument:
+            return
+        if self.path_service is None:
+            self.route_stats.update(self._measure_search_counters())
+        else:
+            # A second search on the frame loop would stall it, so the counters come back like the route did
+            self.counters_request = self.path_service.request_counters(self.grid, self.start, self.goal, self.algorithm)
+
+    def reroute_enemies(self):
+        """Re-plans every live enemy for the current grid and algorithm."""
+        if self.path_service is None or self.multi_route or self.algorithm in ("flow_field", "wavefront", "lpa_star"):
+            # Inline, or a shared-table mode where one search already served everyone
+            self.route_requests = []
+            recompute_enemy_paths(self.enemies, self.grid, self.goal, self.algorithm, field=self.flow_field,
+                                  planner=self.planner, goals=self.cores if self.multi_route else None)
+            return
+        # One search per enemy: queue them on the path service, enemies keep walking their old route meanwhile
+        self.route_requests = request_enemy_paths(self.enemies, self.grid, self.goal, self.algorithm, self.path_service)
+
+    def collect_routes(self):
+        """Picks up finished background searches. Answers for an older grid were cancelled or are no longer asked for."""
+        if self.route_request is not None and self.route_request.done():
+            future, self.route_request = self.route_request, None
+            if not future.cancelled():
+                self._set_route(future.result())
+        if self.counters_request is not None and self.counters_request.done():
+            future, self.counters_request = self.counters_request, None
+            if not future.cancelled():
+                _, stats, _ = future.result()
+                self.route_stats.update(_search_counters(stats))
+        waiting = []
+        for e, future in self.route_requests:
+            if not future.done():
+                waiting.append((e, future))
+            elif not future.cancelled() and e in self.enemies:
+                path, _, _ = future.result()
+                if not e.adopt_path(path):
+                    # It walked off the planned route in the meantime: plan again from where it is now
+                    start_node = (round(e.pos[0]), round(e.pos[1]))
+                    waiting.append((e, self.path_service.request(self.grid, start_node, self.goal, self.algorithm)))
+        self.route_requests = waiting
+
+    def _measure_search_counters(self):
+        """
+        Re-runs the route search inline, instrumented and under tracemalloc. Kept apart from the
+        timed run, which tracing would slow down. Only used without a path service; with one the
+        re-run is a service job (PathService.request_counters) and reports no alloc_kb.
+        """
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        try:
+            _, stats, _ = find_path(self.grid, self.start, self.goal, self.algorithm,
+                                    use_cache=False, want_visited=False, instrument=True)
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        return _search_counters(stats)
+
+def _search_counters(stats):
+    """The counter entries of an instrumented find_path's stats, without the timed run's own fields."""
+    return {k: v for k, v in stats.items() if k not in ("time_ms", "visited", "length")}
+
+def run_level(level, seed=None, algorithm="astar", setup=None, max_time=600.0, projectile_mode="homing"):
+    """
+    Plays a whole level headless and returns the Simulation. setup(sim) places pieces and towers
+    first; after that every wave starts as soon as the previous one is cleared. Stops at Victory,
+    GameOver or after max_time seconds of game time. projectile_mode "intercept" suits fast-forwarding.
+    """
+    sim = Simulation(level, seed=seed, algorithm=algorithm, projectile_mode=projectile_mode)
+    if setup is not None:
+        setup(sim)
+    max_ticks = int(max_time / FIXED_DT)
+    while sim.phase not in (Phase.Victory, Phase.GameOver) and sim.ticks < max_ticks:
+        if sim.phase == Phase.Prepare:
+            sim.start_wave()
+        sim.step()
+    return sim
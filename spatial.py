@@ -0,0 +1,50 @@
+import numpy as np
+
+BUCKET_SIZE = 2.0 # cells per bucket side; tower ranges (2.6-3) then span 3-4 buckets
+
+class SpatialHash:
+    """
+    Uniform-grid index of points in cell units, rebuilt in one vectorized pass. Points are
+    sorted by bucket (row-major), so the buckets of one bucket row that a query box overlaps
+    are a single contiguous slice of that order: a radius query gathers one slice per bucket
+    row and tests only those points. Cost then follows how crowded the query area is, not how
+    many points there are in total.
+    """
+    def __init__(self, bucket_size=BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.order = np.empty(0, dtype=np.intp)  # point indices sorted by bucket
+        self.starts = np.zeros(1, dtype=np.intp) # bucket b holds order[starts[b]:starts[b + 1]]
+        self.cols = 0
+        self.rows = 0
+
+    def rebuild(self, xs, ys):
+        """Indexes the points (xs[i], ys[i])."""
+        if not len(xs):
+            self.order = np.empty(0, dtype=np.intp)
+            self.cols = self.rows = 0
+            return
+        bx = np.maximum((xs // self.bucket_size).astype(np.intp), 0)
+        by = np.maximum((ys // self.bucket_size).astype(np.intp), 0)
+        self.cols = int(bx.max()) + 1
+        self.rows = int(by.max()) + 1
+        keys = by * self.cols + bx
+        self.order = np.argsort(keys, kind="stable")
+        self.starts = np.zeros(self.cols * self.rows + 1, dtype=np.intp)
+        np.cumsum(np.bincount(keys, minlength=self.cols * self.rows), out=self.starts[1:])
+
+    def candidates(self, x, y, radius):
+        """Indices of the points in the buckets overlapping the query circle's box, ascending. A superset of the answer."""
+        if not self.cols:
+            return self.order
+        size = self.bucket_size
+        bx0 = max(int((x - radius) // size), 0)
+        bx1 = min(int((x + radius) // size), self.cols - 1)
+        by0 = max(int((y - radius) // size), 0)
+        by1 = min(int((y + radius) // size), self.rows - 1)
+        if bx0 > bx1 or by0 > by1:
+            return self.order[:0]
+        starts = self.starts
+        slices = [self.order[starts[by * self.cols + bx0]:starts[by * self.cols + bx1 + 1]] for by in range(by0, by1 + 1)]
+        found = slices[0] if len(slices) == 1 else np.concatenate(slices)
+        # Ascending indices keep ties resolved the same way as a plain scan over every point
+        return np.sort(found)
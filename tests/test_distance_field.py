@@ -0,0 +1,19 @@
+from benchmarks.maps import swamp_map, endpoints
+from pathfinding import distance_field, distance_field_path
+
+def test_distance_field_path_stays_on_walkable_cells_on_swamp():
+    """Every downhill walk on a weighted field only steps on walkable cells and ends at the goal (dist 0)."""
+    for seed in range(40):
+        w, h = 12 + seed % 7, 10 + seed % 5
+        grid = swamp_map(w, h, seed=seed)
+        _, goal = endpoints(w, h)
+        dist = distance_field(grid, goal)
+        for y in range(h):
+            for x in range(w):
+                if dist[y, x] < 0:
+                    continue
+                path = distance_field_path(dist, (x, y), grid.costs)
+                assert path is not None
+                assert all(grid.is_walkable(cx, cy) for cx, cy in path)
+                gx, gy = path[-1]
+                assert dist[gy, gx] == 0
@@ -1,5 +1,8 @@
 import json, os, math
-from assets import get_assets
+import numpy as np
+
+WHEEL_SLOTS = 256 # timer wheel slots, one per tick; cooldowns longer than that just stay parked for extra turns
+COVER_MARGIN = 0.75 # an enemy rounds to a cell whose centre is at most ~0.71 cells from it
 
 # Load tower data from JSON
 with open(os.path.join("data", "towers.json")) as f:
@@ -20,8 +23,7 @@ class Tower:
         self.color = tuple(data["color"])
         self.cooldown = 0.0
         self.kills = 0
-        assets = get_assets()
-        self.image = assets["towers"].get(tower_id)
+        self.splash_radius = 0.0 # cells around the impact its shots also hit, 0 for single-target
 
     def in_range(self, enemy):
         """Distance uses grid units (cells). Enemy.pos is (x,y) in grid coords."""
@@ -42,34 +44,22 @@ class Tower:
         }
 
     def update(self, enemies, dt):
-        """Called each frame. If cooldown finished and there is a target, produce a Projectile instance (not applied to enemies directly).
-        Returns: Projectile instance or None."""
-        # lazy import to avoid cycles
-        from projectile import Projectile
+        """Called each frame. If cooldown finished and there is a target, returns the enemy to fire at (None otherwise)."""
         self.cooldown -= dt
         if self.cooldown > 0:
             return None
-        # target selection: nearest enemy within range (or prefer lowest hp / earliest)
-        targets = [e for e in enemies if not e.is_dead() and self.in_range(e)]
-        if not targets:
+        # target selection: nearest living enemy within range, from the EnemyStore's spatial index
+        target = enemies.nearest(self.x, self.y, self.range)
+        if target is None:
             return None
-        # simple: choose enemy closest to tower
-        target = min(targets, key=lambda e: math.hypot(e.pos[0] - self.x, e.pos[1] - self.y))
-        # spawn projectile at tower center (grid coords)
-        proj = Projectile(self.x, self.y, target, damage=self.damage, speed=8.0, origin_tower=self)
         # reset cooldown
         self.cooldown = 1.0 / self.fire_rate
-        return proj
+        return target
 
 class CannonTower(Tower):
     def __init__(self, x, y):
         super().__init__(x, y, tower_id="cannon")
-
-    def update(self, enemies, dt):
-        proj = super().update(enemies, dt)
-        if proj:
-            proj.splash_radius = 1.5
-        return proj
+        self.splash_radius = 1.5
 
 TOWER_CLASSES = {
     "bolt": Tower, 
@@ -90,21 +80,136 @@ def create_tower(tower_id, x, y):
 
 def can_place_tower(grid, x, y, towers):
     """Checks if a tower can be placed at a given grid coordinate."""
-    if not (0 <= y < len(grid) and 0 <= x < len(grid[0])):
+    if not (0 <= y < grid.h and 0 <= x < grid.w):
         return False
     # Check if a tower already exists at this position
     if any(t.x == x and t.y == y for t in towers):
         return False
-    cell_value = grid[y][x]
-    # Can place on any cell that is a piece (represented by a string key)
-    return isinstance(cell_value, str)
+    # Can place on any cell that is a piece (its key lives in the grid's side table)
+    return grid.piece_at(x, y) is not None
 
 def update_towers(towers, enemies, dt, projectiles):
-    """Update towers; append spawned projectiles into projectiles list."""
+    """Update towers; every tower that fires launches a projectile into the ProjectileStore."""
     for tower in towers:
-        p = tower.update(enemies, dt)
-        if p:
-            projectiles.append(p)
+        target = tower.update(enemies, dt)
+        if target is not None:
+            projectiles.fire(tower, target)
+
+class TowerScheduler:
+    """
+    Runs the towers one tick at a time without visiting every tower every tick. A tower that
+    fired is parked on a timer wheel (one slot per tick) until its cooldown runs out. A ready
+    tower with nothing in range is parked on the cells its range covers, and only wakes when an
+    enemy stands on one of them. Per-tick work then follows the towers that can act, plus one
+    vectorized pass over the enemy positions.
+    Same rules as Tower.update: a tower fires at the nearest living enemy in range as soon as it
+    is ready, then waits 1 / fire_rate seconds, for exactly as many ticks as the countdown there.
+    """
+    def __init__(self, grid, tick, slots=WHEEL_SLOTS):
+        self.w, self.h = grid.w, grid.h
+        self.tick = tick      # seconds per update()
+        self.now = 0          # ticks run so far
+        self.wheel = [[] for _ in range(slots)] # slot -> [(due tick, tower)], cooling towers
+        self.due = {}         # cooling tower -> due tick (entries on the wheel that disagree are stale)
+        self.ready = []       # towers to try this tick: placed or cooled down, and not yet parked
+        self.order = {}       # tower -> placement number, so towers act in placement order like the old list
+        self.placed = 0
+        self.cooldown_ticks = {} # cooldown -> ticks it lasts, see _cooldown_ticks
+        self.coverage = {}    # tower -> flat indices of the cells its range covers
+        self.idle = set()     # ready towers parked on their cells
+        self.watchers = [set() for _ in range(self.w * self.h)] # cell -> idle towers covering it
+        self.watched = np.zeros(self.w * self.h, dtype=bool)     # cell has any idle tower
+
+    def add(self, tower):
+        """Starts running a tower; it can fire on the next update()."""
+        self.order[tower] = self.placed
+        self.placed += 1
+        reach = tower.range + COVER_MARGIN
+        r = int(reach)
+        self.coverage[tower] = [cy * self.w + cx
+                                for cy in range(max(tower.y - r, 0), min(tower.y + r, self.h - 1) + 1)
+                                for cx in range(max(tower.x - r, 0), min(tower.x + r, self.w - 1) + 1)
+                                if math.hypot(cx - tower.x, cy - tower.y) <= reach]
+        self.ready.append(tower)
+
+    def remove(self, tower):
+        """Stops running a tower, wherever it is parked."""
+        del self.order[tower]
+        self.due.pop(tower, None)
+        self._unwatch(tower)
+        if tower in self.ready:
+            self.ready.remove(tower)
+        del self.coverage[tower]
+
+    def _watch(self, tower):
+        """Parks a ready tower on the cells it covers."""
+        if tower in self.idle:
+            return
+        self.idle.add(tower)
+        for cell in self.coverage[tower]:
+            self.watchers[cell].add(tower)
+            self.watched[cell] = True
+
+    def _unwatch(self, tower):
+        """Takes a tower off the cells it covers, if it was watching them."""
+        if tower not in self.idle:
+            return
+        self.idle.discard(tower)
+        for cell in self.coverage[tower]:
+            watchers = self.watchers[cell]
+            watchers.discard(tower)
+            if not watchers:
+                self.watched[cell] = False
+
+    def _cooldown_ticks(self, cooldown):
+        """Ticks a cooldown lasts, counted like Tower.update's per-tick countdown (float rounding included, so a 0.5 s cooldown lasts 31 ticks there and here)."""
+        ticks = self.cooldown_ticks.get(cooldown)
+        if ticks is None:
+            left, ticks = cooldown, 0
+            while left > 0:
+                left -= self.tick
+                ticks += 1
+            self.cooldown_ticks[cooldown] = ticks = max(ticks, 1)
+        return ticks
+
+    def update(self, enemies, projectiles):
+        """Runs one tick: every tower that can fire launches a projectile into `projectiles`."""
+        self.now += 1
+        # Step 1: towers whose cooldown ran out this tick
+        candidates = set(self.ready)
+        self.ready = []
+        slot = self.wheel[self.now % len(self.wheel)]
+        if slot:
+            later = []
+            for due, tower in slot:
+                if self.due.get(tower) != due:
+                    continue # sold since
+                if due <= self.now:
+                    del self.due[tower]
+                    candidates.add(tower)
+                else:
+                    later.append((due, tower))
+            slot[:] = later
+        # Step 2: idle towers covering a cell an enemy stands on
+        n = len(enemies)
+        if n and self.watched.any():
+            cx = np.clip(np.rint(enemies.x[:n]).astype(np.intp), 0, self.w - 1)
+            cy = np.clip(np.rint(enemies.y[:n]).astype(np.intp), 0, self.h - 1)
+            cells = np.unique(cy * self.w + cx)
+            for cell in cells[self.watched[cells]].tolist():
+                candidates.update(self.watchers[cell])
+        # Step 3: the candidates look for a target; one that finds none watches its cells until an enemy comes
+        for tower in sorted(candidates, key=self.order.__getitem__):
+            target = enemies.nearest(tower.x, tower.y, tower.range)
+            if target is None:
+                self._watch(tower)
+                continue
+            self._unwatch(tower)
+            projectiles.fire(tower, target)
+            tower.cooldown = 1.0 / tower.fire_rate
+            due = self.now + self._cooldown_ticks(tower.cooldown)
+            self.due[tower] = due
+            self.wheel[due % len(self.wheel)].append((due, tower))
 
 def tower_data():
     """Exposes raw tower data from JSON."""